@@ -3,7 +3,8 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from .models import (
     UserProfile, Invite, Location, Ticket,
-    TicketImage, TicketResolution , AuditLog
+    TicketImage, TicketResolution , AuditLog, TicketEvent,
+    BusinessCalendar, Holiday, SLAPolicy, RevokedToken, EmailOutbox
 )
 
 # ✅ Always use get_user_model for AUTH_USER_MODEL
@@ -96,6 +97,35 @@ class InviteAdmin(admin.ModelAdmin):
     search_fields = ('email', 'role')
 
 
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    """Read-only: tokens are revoked through core/utils/revocation.py (logout / rotation)."""
+    list_display = ('jti', 'user', 'reason', 'revoked_at', 'expires_at')
+    list_filter = ('reason',)
+    search_fields = ('jti', 'user__email')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(EmailOutbox)
+class EmailOutboxAdmin(admin.ModelAdmin):
+    """Read-only: rows are queued by core/utils/outbox.py and sent by the drain task."""
+    list_display = ('to_email', 'kind', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('to_email',)
+    readonly_fields = ('last_error',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(Location)
 class LocationAdmin(admin.ModelAdmin):
     list_display = ('building_name', 'floor_number', 'room_identifier')
@@ -126,11 +156,44 @@ class TicketResolutionAdmin(admin.ModelAdmin):
     search_fields = ('ticket__id',)
 
 
+@admin.register(TicketEvent)
+class TicketEventAdmin(admin.ModelAdmin):
+    list_display = ('ticket', 'seq', 'type', 'actor', 'created_at')
+    search_fields = ('ticket__id',)
+    list_filter = ('type',)
+    list_select_related = ('actor',)
+
+
+class HolidayInline(admin.TabularInline):
+    model = Holiday
+    extra = 1
+
+
+@admin.register(BusinessCalendar)
+class BusinessCalendarAdmin(admin.ModelAdmin):
+    list_display = ('name', 'timezone')
+    search_fields = ('name',)
+    inlines = [HolidayInline]
+
+
+@admin.register(SLAPolicy)
+class SLAPolicyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'category', 'building_name', 'urgency', 'calendar', 'secondary_after', 'admin_after', 'is_active')
+    list_filter = ('is_active', 'category', 'urgency', 'calendar')
+    search_fields = ('name', 'building_name')
+    list_select_related = ('calendar',)
+
+
 
 
 
 @admin.register(AuditLog)
 class AuditLogAdmin(admin.ModelAdmin):
-    list_display = ('action', 'performed_by', 'target_user', 'timestamp')
-    search_fields = ('action', 'details')
+    list_display = ('action', 'performed_by', 'target_user', 'ip_address', 'timestamp')
+    search_fields = ('action', 'details', 'extra__email')  # details are templates, values are in extra
     list_filter = ('action',)
+    # No JOINs into users: AuditLog may live in its own database (core/db_routers.py)
+    list_select_related = ()
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related("performed_by", "target_user")
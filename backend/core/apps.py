@@ -6,5 +6,6 @@ class CoreConfig(AppConfig):
     name = "core"
 
     def ready(self):
-        # Import signals so they're registered when the app is ready
+        # Import signals and system checks so they're registered when the app is ready
+        import core.checks
         import core.signals
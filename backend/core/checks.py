@@ -0,0 +1,35 @@
+# core/checks.py
+"""
+System checks.
+
+Several features keep state in the default cache that every process must
+see: login-anomaly sketches and blocks, task leases, auth-cache version
+stamps, email OTP codes and the last_login buffer. A per-process cache
+(LocMemCache, DummyCache) silently splits that state per worker, so it is
+an error unless settings.SHARED_CACHE_REQUIRED is off (DEBUG and tests).
+"""
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+
+PER_PROCESS_CACHES = (LocMemCache, DummyCache)
+
+
+def cache_is_shared(alias: str = DEFAULT_CACHE_ALIAS) -> bool:
+    """False for caches that live inside one process."""
+    return not isinstance(caches[alias], PER_PROCESS_CACHES)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    if getattr(settings, "SHARED_CACHE_REQUIRED", False) and not cache_is_shared():
+        return [
+            Error(
+                f"The default cache ({type(caches[DEFAULT_CACHE_ALIAS]).__name__}) is not shared between processes.",
+                hint="Set CACHE_REDIS_URL or REDIS_URL, or point CACHES['default'] at another shared backend.",
+                id="core.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,19 @@
+# core/db_backends/postgresql_audit/base.py
+"""
+PostgreSQL engine for the dedicated audit database (core/db_routers.py).
+
+Only the audit tables are migrated there; the users, tickets and invites
+they reference stay in "default". The early migrations still declare those
+references as constrained foreign keys, so this engine reports no foreign
+key support and the schema editor creates no constraints at all — not
+even AuditLog → AuditUserAgent, which the application keeps consistent.
+"""
+from django.db.backends.postgresql import base, features
+
+
+class DatabaseFeatures(features.DatabaseFeatures):
+    supports_foreign_keys = False
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    features_class = DatabaseFeatures
@@ -0,0 +1,112 @@
+# core/db_routers.py
+"""
+Send audit tables to their own database.
+
+When settings.DATABASES has an "audit" alias, AuditLog and AuditUserAgent
+are read, written and migrated there; everything else stays on "default".
+Without the alias the router is a no-op and audit rows live next to the
+rest of the data as before.
+
+Cross-database notes:
+- AuditLog's user / ticket / invite foreign keys have no DB constraint
+  (db_constraint=False) and use on_delete=SET_NULL_IF_SAME_DB: in a single
+  database, deleting a user or ticket nulls the reference as before; with
+  the audit database split off, the ids are kept as plain references and
+  the delete never touches the audit database.
+- "default" keeps the full schema, audit tables included (unused once
+  split, or holding the rows from before the split), so the historical
+  migrations apply unchanged. The audit database only gets the audit
+  tables; use the core.db_backends.postgresql_audit engine for it, which
+  creates no foreign key constraints (the referenced tables live in
+  "default").
+- Don't select_related() from AuditLog into users/tickets; use
+  prefetch_related(), which runs a second query on the right database.
+- Audit writes are deferred with transaction.on_commit() on "default"
+  (see defer_audit_write), so a ticket/user transaction never holds its
+  locks while waiting on the audit database, and a rolled-back request
+  leaves no audit row behind.
+
+Setup:
+    AUDIT_DB_NAME=fixit_audit (+ optional AUDIT_DB_HOST/PORT/USER/PASSWORD/ENGINE)
+    python manage.py migrate                    # default database
+    python manage.py migrate --database=audit   # audit tables only
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import SET_NULL
+
+AUDIT_DB_ALIAS = "audit"
+AUDIT_APP_LABEL = "core"
+AUDIT_MODELS = {"auditlog", "audituseragent"}
+
+
+# =====================================================
+# 🛠 Helpers
+# =====================================================
+def audit_db_enabled() -> bool:
+    return AUDIT_DB_ALIAS in settings.DATABASES
+
+
+def is_audit_model(app_label, model_name) -> bool:
+    return app_label == AUDIT_APP_LABEL and (model_name or "").lower() in AUDIT_MODELS
+
+
+def defer_audit_write(write):
+    """
+    Run `write()` now, or — when audit rows live in their own database —
+    once the current transaction on "default" commits (immediately if
+    there is none). Returns write()'s result, or None when deferred.
+    """
+    if not audit_db_enabled():
+        return write()
+    transaction.on_commit(write, using=DEFAULT_DB_ALIAS)
+    return None
+
+
+def SET_NULL_IF_SAME_DB(collector, field, sub_objs, using):
+    """
+    on_delete for AuditLog's references: SET_NULL while audit rows share
+    the database, nothing once they live in the audit database (a delete
+    on "default" can't update them; the id stays as a plain reference).
+    """
+    if not audit_db_enabled():
+        SET_NULL(collector, field, sub_objs, using)
+
+
+SET_NULL_IF_SAME_DB.lazy_sub_objs = True  # like SET_NULL: the collector doesn't fetch the rows
+
+
+# =====================================================
+# 🧭 Router
+# =====================================================
+class AuditLogRouter:
+    """Route audit models to the "audit" alias when it is configured."""
+
+    def _db_for(self, model):
+        if not audit_db_enabled():
+            return None
+        if is_audit_model(model._meta.app_label, model._meta.model_name):
+            return AUDIT_DB_ALIAS
+        # Explicit, or Django would follow the instance hint of an AuditLog
+        # (e.g. log.performed_by) into the audit database
+        return DEFAULT_DB_ALIAS
+
+    def db_for_read(self, model, **hints):
+        return self._db_for(model)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # AuditLog → user/ticket/invite references are allowed across databases
+        if is_audit_model(obj1._meta.app_label, obj1._meta.model_name) or is_audit_model(
+            obj2._meta.app_label, obj2._meta.model_name
+        ):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # "default" keeps every table; the audit database only the audit ones
+        if audit_db_enabled() and db == AUDIT_DB_ALIAS:
+            return is_audit_model(app_label, model_name)
+        return None
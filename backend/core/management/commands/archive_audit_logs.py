@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.utils.audit_archive import archive_audit_logs
+
+
+class Command(BaseCommand):
+    help = "Export aged audit logs to compressed, date-sharded NDJSON files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=settings.AUDIT_LOG_RETENTION_DAYS,
+            help="Archive rows older than this many days (default: AUDIT_LOG_RETENTION_DAYS)",
+        )
+        parser.add_argument("--directory", help="Archive directory (default: AUDIT_LOG_ARCHIVE_DIR)")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["older_than_days"])
+        result = archive_audit_logs(cutoff, directory=options["directory"])
+        for name in result["files"]:
+            self.stdout.write(f"  + {name}")
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {result['rows']} audit logs into {len(result['files'])} files.")
+        )
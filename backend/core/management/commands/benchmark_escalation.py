@@ -0,0 +1,103 @@
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from core.models import AuditLog, Location, Ticket, create_audit
+from core.utils.escalation import escalate_due_tickets
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark set-based escalation against the old per-ticket loop on synthetic tickets. "
+        "Everything runs in one transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tickets", type=int, default=100_000, help="Synthetic open tickets to create")
+        parser.add_argument(
+            "--legacy-sample",
+            type=int,
+            default=1000,
+            help="Tickets to run through the old loop (the total is extrapolated from them)",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        with transaction.atomic():
+            now = timezone.now()
+            open_count = self._seed(options["tickets"], now)
+            self.stdout.write(f"Seeded {open_count} open tickets")
+
+            legacy_per_ticket, legacy_queries = self._legacy(options["legacy_sample"])
+            self.stdout.write(
+                f"Per-ticket loop:  {legacy_per_ticket * 1000:.2f} ms/ticket, "
+                f"{legacy_queries:.1f} queries/ticket → ~{legacy_per_ticket * open_count:.1f}s "
+                f"for {open_count} tickets (extrapolated)"
+            )
+
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                summary = escalate_due_tickets(now)
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Set-based engine: {elapsed:.2f}s, {len(queries)} queries, "
+                f"escalated {summary['total']} ({summary})"
+            )
+
+            # Steady state: the next per-minute run only scans tickets that became due
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                summary = escalate_due_tickets(now + timedelta(minutes=1))
+                elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"Next minute:      {elapsed * 1000:.1f} ms, {len(queries)} queries, escalated {summary['total']}"
+            )
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Rolled back benchmark data."))
+
+    def _seed(self, count, now):
+        location, _ = Location.objects.get_or_create(building_name="Benchmark", floor_number="1", room_identifier="BENCH")
+        urgencies = [Ticket.Urgency.STANDARD, Ticket.Urgency.URGENT]
+        tickets = [
+            Ticket(
+                location=location,
+                title=f"Benchmark ticket {i}",
+                description="Synthetic ticket for benchmark_escalation",
+                category=Ticket.Category.CLEANING,
+                urgency=random.choice(urgencies),
+                status=Ticket.Status.CREATED,
+                created_at=now - timedelta(minutes=random.randint(0, 72 * 60)),
+            )
+            for i in range(count)
+        ]
+        for ticket in tickets:  # bulk_create skips save()
+            ticket.next_escalation_at = ticket.compute_next_escalation_at()
+        Ticket.objects.bulk_create(tickets, batch_size=5000)
+        return Ticket.objects.exclude(status__in=Ticket.INACTIVE_STATUSES).count()
+
+    def _legacy(self, sample):
+        """The old check_escalation body on `sample` tickets, inside a savepoint that is undone."""
+        sid = transaction.savepoint()
+        tickets = list(
+            Ticket.objects.exclude(status__in=Ticket.INACTIVE_STATUSES).order_by("?")[:sample]
+        )
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for ticket in tickets:
+                if ticket.auto_escalate(performed_by=None):
+                    create_audit(
+                        AuditLog.Action.TICKET_ESCALATED,
+                        performed_by=None,
+                        details=f"Ticket #{ticket.id} escalated automatically to {ticket.escalation_level}.",
+                        extra={"ticket": ticket.id, "escalation_level": ticket.escalation_level},
+                    )
+            elapsed = time.perf_counter() - started
+        transaction.savepoint_rollback(sid)
+        n = max(1, len(tickets))
+        return elapsed / n, len(queries) / n
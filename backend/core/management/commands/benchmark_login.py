@@ -0,0 +1,101 @@
+import time
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, get_hasher, make_password
+from django.contrib.auth.models import update_last_login
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from core.models import Role, UserProfile, create_audit
+from core.serializers import EmailTokenObtainPairSerializer, UserProfileSerializer
+from core.views import EmailLoginView
+
+User = get_user_model()
+PASSWORD = "Benchmark-Passw0rd!"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark login: the old pipeline (two authenticate() calls, repeated lookups) against "
+        "POST /api/auth/login/. Single-threaded, so logins/s is per core. Rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--logins", type=int, default=20, help="Logins per pipeline")
+
+    def handle(self, *args, **options):
+        count = options["logins"]
+        hasher = get_hasher()
+        self.stdout.write(f"Hasher: {hasher.algorithm}, {getattr(hasher, 'iterations', '?')} iterations")
+
+        with transaction.atomic():
+            emails = self._seed(count)
+
+            encoded = make_password(PASSWORD)
+            started = time.perf_counter()
+            hasher.verify(PASSWORD, encoded)
+            self._report("One password check (floor)", time.perf_counter() - started, 1, None, None)
+
+            self._report("Old pipeline", *self._run(emails, self._legacy_login))
+
+            client = APIClient(HTTP_HOST="localhost")
+
+            def new_login(email):
+                response = client.post("/api/auth/login/", {"email": email, "password": PASSWORD}, format="json")
+                assert response.status_code == 200, response.content
+
+            with mock.patch.object(EmailLoginView, "throttle_classes", []):
+                self._report("New login endpoint", *self._run(emails, new_login))
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Rolled back benchmark users."))
+
+    def _seed(self, count):
+        encoded = make_password(PASSWORD)  # hashed once, shared by every synthetic user
+        role, _ = Role.objects.get_or_create(name="Student")
+        users = User.objects.bulk_create(
+            User(email=f"login-bench-{i}@bench.invalid", username=f"login-bench-{i}", password=encoded)
+            for i in range(count)
+        )
+        UserProfile.objects.bulk_create(UserProfile(user=user, role=role, is_email_verified=True) for user in users)
+        return [user.email for user in users]
+
+    def _run(self, emails, login):
+        original_encode = PBKDF2PasswordHasher.encode
+        hashes = 0
+
+        def counting_encode(hasher, *args, **kwargs):
+            nonlocal hashes
+            hashes += 1
+            return original_encode(hasher, *args, **kwargs)
+
+        with mock.patch.object(PBKDF2PasswordHasher, "encode", counting_encode), \
+                CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for email in emails:
+                login(email)
+            elapsed = time.perf_counter() - started
+        return elapsed, len(emails), len(queries), hashes
+
+    def _report(self, label, elapsed, logins, queries, hashes):
+        per_login = elapsed / logins
+        line = f"{label:<28} {per_login * 1000:8.1f} ms/login  {1 / per_login:7.2f} logins/s/core"
+        if queries is not None:
+            line += f"  {queries / logins:5.1f} queries  {hashes / logins:.1f} hashes per login"
+        self.stdout.write(line)
+
+    @staticmethod
+    def _legacy_login(email):
+        """The previous serializer + EmailLoginView steps, without the HTTP layer."""
+        user = User.objects.get(email=email)
+        user = authenticate(request=None, username=user.email, password=PASSWORD)
+        user = authenticate(request=None, email=user.email, password=PASSWORD)  # TokenObtainSerializer.validate
+        refresh = EmailTokenObtainPairSerializer.get_token(user)
+        str(refresh), str(refresh.access_token)
+        user = User.objects.get(email=email)
+        update_last_login(None, user)
+        profile, _ = UserProfile.objects.get_or_create(user=user)
+        UserProfileSerializer(profile).data
+        create_audit("Login", performed_by=user, target_user=user, details="User logged in")
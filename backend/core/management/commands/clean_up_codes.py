@@ -1,13 +1,13 @@
 # core/management/commands/cleanup_reset_codes.py
 from django.core.management.base import BaseCommand
-from core.models import PasswordResetCode
+from core.utils import purge
 
 
 class Command(BaseCommand):
     help = "Delete expired password reset codes"
 
     def handle(self, *args, **options):
-        deleted = PasswordResetCode.cleanup_expired()
+        result = purge.run_job("password_reset_codes")
         self.stdout.write(
-            self.style.SUCCESS(f"Deleted {deleted} expired reset codes.")
+            self.style.SUCCESS(f"Deleted {result.deleted} expired reset codes.")
         )
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.conf import settings
+from core.utils import audit_partitions
+
+
+class Command(BaseCommand):
+    help = "Pre-create monthly AuditLog partitions (PostgreSQL only)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=settings.AUDIT_LOG_PARTITION_PREMAKE_MONTHS,
+            help="Number of future months to create in addition to the current one",
+        )
+
+    def handle(self, *args, **options):
+        if not audit_partitions.is_partitioned():
+            self.stdout.write(self.style.WARNING("core_auditlog is not partitioned on this database."))
+            return
+
+        created = audit_partitions.ensure_partitions(months_ahead=options["months"])
+        for name in created:
+            self.stdout.write(f"  + {name}")
+        self.stdout.write(self.style.SUCCESS(f"Created {len(created)} audit log partitions."))
@@ -1,12 +1,18 @@
-from django.core.management.base import BaseCommand
-from core.models import Ticket  # import from your models
+from django.core.management.base import BaseCommand, CommandError
+from core.utils import locks
+from core.utils.escalation import escalate_due_tickets
+
 
 class Command(BaseCommand):
     help = "Automatically escalates overdue tickets based on age/urgency"
 
     def handle(self, *args, **options):
-        escalated = 0
-        for ticket in Ticket.objects.all():
-            if ticket.auto_escalate():
-                escalated += 1
-        self.stdout.write(self.style.SUCCESS(f"Escalated {escalated} tickets"))
+        # Same lease as the periodic check_escalation task, so the two never overlap
+        with locks.Lease("check_escalation") as lease:
+            if not lease.held:
+                raise CommandError("check_escalation is running elsewhere; try again shortly.")
+            summary = escalate_due_tickets(fence=lease.verify)
+        for rule, count in summary.items():
+            if rule != "total":
+                self.stdout.write(f"  {rule}: {count}")
+        self.stdout.write(self.style.SUCCESS(f"Escalated {summary['total']} tickets"))
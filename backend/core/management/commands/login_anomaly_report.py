@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from core.utils import login_anomaly
+
+
+class Command(BaseCommand):
+    help = "Show the heaviest failed-login sources (per IP / per email) over the detector window"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=None, help="How many keys to show per dimension")
+
+    def handle(self, *args, **options):
+        detector = login_anomaly.get_detector()
+        for dim in login_anomaly.DIMENSIONS:
+            self.stdout.write(
+                self.style.MIGRATE_HEADING(
+                    f"{dim} (last {detector.window}s, threshold {detector.thresholds[dim]})"
+                )
+            )
+            rows = detector.top(dim, k=options["top"])
+            if not rows:
+                self.stdout.write("  (no failures)")
+            for key, count in rows:
+                self.stdout.write(f"  {count:>6}  {key}")
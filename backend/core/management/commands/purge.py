@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from core.utils import purge
+
+
+class Command(BaseCommand):
+    help = "Run retention purges in primary-key batches (resumable; see core/utils/purge.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("jobs", nargs="*", help=f"Jobs to run (default: all): {', '.join(purge.JOBS)}")
+        parser.add_argument("--list", action="store_true", help="List the jobs and how many rows each would delete")
+        parser.add_argument("--dry-run", action="store_true", help="Walk the batches without deleting")
+        parser.add_argument("--batch-size", type=int, help="Rows per batch (default: PURGE_BATCH_SIZE)")
+        parser.add_argument("--sleep", type=float, help="Seconds between batches (default: PURGE_BATCH_SLEEP_SECONDS)")
+        parser.add_argument("--time-budget", type=float, help="Seconds per job (default: PURGE_TIME_BUDGET_SECONDS)")
+        parser.add_argument("--reset-checkpoint", action="store_true", help="Start from the first row instead of the checkpoint")
+        parser.add_argument("--verbose-batches", action="store_true", help="Print every batch")
+
+    def handle(self, *args, **options):
+        unknown = set(options["jobs"]) - set(purge.JOBS)
+        if unknown & {"audit_logs", "audit_logs_high_sensitivity"}:
+            raise CommandError("Audit logs are archived before they are purged: run the core.tasks.cleanup_audit_logs task")
+        if unknown:
+            raise CommandError(f"Unknown jobs: {', '.join(sorted(unknown))}")
+        jobs = options["jobs"] or list(purge.JOBS)
+
+        if options["list"]:
+            now = timezone.now()
+            for name in jobs:
+                self.stdout.write(f"  {name:<30} {purge.JOBS[name](now).count():>9} rows")
+            return
+
+        on_batch = None
+        if options["verbose_batches"]:
+            def on_batch(stats):
+                self.stdout.write(
+                    f"    batch {stats.batch}: {stats.rows} rows, {stats.deleted} deleted (+{stats.cascaded} related), "
+                    f"{stats.elapsed_ms} ms, last pk {stats.last_pk}"
+                )
+
+        for name in jobs:
+            if options["reset_checkpoint"]:
+                purge.reset_checkpoint(name)
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            result = purge.run_job(
+                name,
+                batch_size=options["batch_size"],
+                sleep=options["sleep"],
+                time_budget=options["time_budget"],
+                dry_run=options["dry_run"],
+                on_batch=on_batch,
+            )
+            style = self.style.SUCCESS if result.completed else self.style.WARNING
+            self.stdout.write(style(f"  {result.summary()}"))
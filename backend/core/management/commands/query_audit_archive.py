@@ -0,0 +1,45 @@
+import json
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.utils.audit_archive import iter_archived_logs, iter_archive_indexes
+
+
+def _parse_when(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f"Invalid date/datetime: {value}")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Stream archived audit logs as NDJSON, filtered by time range and action"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Start (inclusive), e.g. 2026-01-01 or 2026-01-01T08:00")
+        parser.add_argument("--until", help="End (exclusive)")
+        parser.add_argument("--action", action="append", default=[], help="Repeat to match several actions")
+        parser.add_argument("--directory", help="Archive directory (default: AUDIT_LOG_ARCHIVE_DIR)")
+        parser.add_argument("--files-only", action="store_true", help="Only list matching archive files")
+
+    def handle(self, *args, **options):
+        start, end = _parse_when(options["since"]), _parse_when(options["until"])
+        actions, directory = options["action"], options["directory"]
+
+        if options["files_only"]:
+            for path, index in iter_archive_indexes(start, end, actions, directory):
+                self.stdout.write(f"{path}  {index['count']} rows  {index['first']} → {index['last']}")
+            return
+
+        for row in iter_archived_logs(start, end, actions, directory):
+            self.stdout.write(json.dumps(row, separators=(",", ":"), ensure_ascii=False))
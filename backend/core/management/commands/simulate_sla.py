@@ -0,0 +1,69 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+from core.utils import sla_simulator
+
+
+class Command(BaseCommand):
+    help = (
+        "What-if: how many historical tickets would have escalated under the current and candidate "
+        "SLA policies. Read-only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="Start date (default: 183 days ago)")
+        parser.add_argument("--until", help="End date, exclusive (default: now)")
+        parser.add_argument(
+            "--scenarios",
+            help='JSON file: a scenario or a list of them, {"name": ..., "policies": [...]} '
+                 "(see core/utils/sla_simulator.parse_scenario)",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the raw result as JSON")
+
+    def handle(self, *args, **options):
+        scenarios = []
+        if options["scenarios"]:
+            try:
+                with open(options["scenarios"], encoding="utf-8") as f:
+                    scenarios = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                raise CommandError(f"Cannot read scenarios: {e}")
+            if isinstance(scenarios, dict):
+                scenarios = [scenarios]
+
+        now = timezone.now()
+        try:
+            result = sla_simulator.simulate(
+                options["since"] or now - timedelta(days=183),
+                options["until"] or now,
+                scenarios,
+            )
+        except sla_simulator.SimulationError as e:
+            raise CommandError(str(e))
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        self.stdout.write(
+            f"{result['tickets']} tickets created {result['since']:%Y-%m-%d} .. {result['until']:%Y-%m-%d} "
+            f"(loaded in {result['load_seconds']}s)"
+        )
+        self._table("actual", result["actual"])
+        for scenario in result["scenarios"]:
+            self._table(f"{scenario['name']} ({scenario['elapsed_ms']} ms)", scenario)
+
+    def _table(self, title, summary):
+        totals = summary["totals"]
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"{title}: Secondary {totals['Secondary']}, Admin {totals['Admin']}"
+        ))
+        for category, counts in sorted(summary["by_category"].items()):
+            self.stdout.write(
+                f"  {category:<14} {counts['tickets']:>7} tickets  "
+                f"{counts['Secondary']:>6} Secondary  {counts['Admin']:>6} Admin"
+            )
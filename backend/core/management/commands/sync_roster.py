@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils import roster
+
+
+class Command(BaseCommand):
+    help = "Sync student accounts from a registrar roster CSV; only new and changed rows are written (see core/utils/roster.py)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Roster CSV (student_id, email, first_name, last_name, course_code, ...)")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+        parser.add_argument("--batch-size", type=int, help="Rows per transaction (default: ROSTER_BATCH_SIZE)")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as file:
+                report = roster.sync(file, dry_run=options["dry_run"], batch_size=options["batch_size"])
+        except (OSError, roster.RosterError) as e:
+            raise CommandError(str(e))
+
+        for change in report.changes:
+            fields = f" ({', '.join(change['fields'])})" if change["action"] != "created" else ""
+            self.stdout.write(f"  line {change['line']:>6}  {change['student_id']:<16} {change['action']}{fields}")
+        for error in report.errors:
+            self.stdout.write(self.style.WARNING(f"  line {error['line']:>6}  {error['student_id']:<16} {error['error']}"))
+        style = self.style.WARNING if report.failed else self.style.SUCCESS
+        self.stdout.write(style(("Dry run: " if report.dry_run else "") + report.summary()))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+import core.tasks  # noqa: F401  (registers the @single_instance tasks)
+from core.utils import locks
+
+
+class Command(BaseCommand):
+    help = "Show lease counters (acquired / skipped / lost) and the last holder of each periodic task"
+
+    def handle(self, *args, **options):
+        for name in sorted(locks.registry):
+            s = locks.stats(name)
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(
+                f"  acquired {s['acquired']}, skipped {s['skipped']} (contended), lost {s['lost']}"
+                + (f", held now (token {s['held_by']})" if s["held_by"] is not None else "")
+            )
+            last = s["last"]
+            if last:
+                duration = f", ran {last['duration']}s" if "duration" in last else ", running"
+                self.stdout.write(
+                    f"  last: token {last['token']} on {last['host']} (pid {last['pid']}) "
+                    f"at {last['acquired_at']:%Y-%m-%d %H:%M:%S}{duration}"
+                    + (", LOST" if last.get("lost") else "")
+                )
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_high_sensitivity(apps, schema_editor):
+    AuditLog = apps.get_model("core", "AuditLog")
+    AuditLog.objects.using(schema_editor.connection.alias).filter(
+        action__in=getattr(settings, "AUDIT_LOG_HIGH_SENS_ACTIONS", [])
+    ).update(high_sensitivity=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_populate_roles_permissions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='high_sensitivity',
+            field=models.BooleanField(default=False, editable=False, help_text='Set from AUDIT_LOG_HIGH_SENS_ACTIONS; routes the row to the long-retention partitions'),
+        ),
+        migrations.RunPython(backfill_high_sensitivity, migrations.RunPython.noop),
+    ]
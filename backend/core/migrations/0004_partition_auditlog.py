@@ -0,0 +1,153 @@
+# core/migrations/0004_partition_auditlog.py
+"""
+Convert core_auditlog into a partitioned table on PostgreSQL.
+
+    core_auditlog (LIST high_sensitivity)
+      ├── core_auditlog_std  (RANGE timestamp, monthly)
+      └── core_auditlog_high (RANGE timestamp, monthly)
+
+Other backends keep the plain table; retention falls back to DELETE there.
+"""
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations
+from django.utils import timezone
+
+OLD_TABLE = "core_auditlog_unpartitioned"
+SETS = {"false": "core_auditlog_std", "true": "core_auditlog_high"}
+
+
+def _month_start(value):
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def _add_months(value, months):
+    index = value.year * 12 + (value.month - 1) + months
+    return value.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def _copy_indexes_and_fks(cursor, source, target):
+    """Return (index DDL, FK DDL) that recreate `source`'s indexes/FKs on `target`."""
+    cursor.execute(
+        "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname NOT LIKE %s",
+        [source, "%pkey"],
+    )
+    indexes = [
+        re.sub(rf" ON (ONLY )?(public\.)?{source} ", f" ON {target} ", indexdef)
+        for _, indexdef in cursor.fetchall()
+    ]
+    cursor.execute(
+        "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE conrelid = %s::regclass AND contype = 'f'",
+        [source],
+    )
+    fks = [
+        f'ALTER TABLE {target} ADD CONSTRAINT "{name}" {definition}'
+        for name, definition in cursor.fetchall()
+    ]
+    return indexes, fks
+
+
+def partition_auditlog(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+
+    premake = getattr(settings, "AUDIT_LOG_PARTITION_PREMAKE_MONTHS", 3)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE core_auditlog RENAME TO {OLD_TABLE}")
+        cursor.execute(f"ALTER INDEX core_auditlog_pkey RENAME TO {OLD_TABLE}_pkey")
+        indexes, fks = _copy_indexes_and_fks(cursor, OLD_TABLE, "core_auditlog")
+
+        # The identity sequence can't live on a partitioned table (PG < 17);
+        # replace it with a plain sequence that continues from the same value.
+        cursor.execute(f"SELECT pg_get_serial_sequence('{OLD_TABLE}', 'id')")
+        (old_sequence,) = cursor.fetchone()
+        cursor.execute(f"SELECT last_value FROM {old_sequence}")
+        (last_id,) = cursor.fetchone()
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0), MIN(timestamp) FROM {OLD_TABLE}")
+        max_id, oldest = cursor.fetchone()
+        cursor.execute(f"ALTER TABLE {OLD_TABLE} ALTER COLUMN id DROP IDENTITY")
+        cursor.execute("CREATE SEQUENCE core_auditlog_id_seq AS bigint")
+        cursor.execute("SELECT setval('core_auditlog_id_seq', %s)", [max(last_id or 1, max_id, 1)])
+
+        cursor.execute(
+            f"CREATE TABLE core_auditlog (LIKE {OLD_TABLE} INCLUDING DEFAULTS) "
+            "PARTITION BY LIST (high_sensitivity)"
+        )
+        cursor.execute("ALTER TABLE core_auditlog ALTER COLUMN id SET DEFAULT nextval('core_auditlog_id_seq')")
+        cursor.execute("ALTER SEQUENCE core_auditlog_id_seq OWNED BY core_auditlog.id")
+        cursor.execute(
+            'ALTER TABLE core_auditlog ADD CONSTRAINT core_auditlog_pkey '
+            'PRIMARY KEY (id, high_sensitivity, "timestamp")'
+        )
+
+        now = timezone.now()
+        first = _month_start(oldest or now)
+        last = _add_months(_month_start(now), premake)
+        for value, parent in SETS.items():
+            cursor.execute(
+                f"CREATE TABLE {parent} PARTITION OF core_auditlog FOR VALUES IN ({value}) "
+                'PARTITION BY RANGE ("timestamp")'
+            )
+            cursor.execute(f"CREATE TABLE {parent}_default PARTITION OF {parent} DEFAULT")
+            month = first
+            while month <= last:
+                end = _add_months(month, 1)
+                cursor.execute(
+                    f"CREATE TABLE {parent}_p{month:%Y%m} PARTITION OF {parent} "
+                    "FOR VALUES FROM (%s) TO (%s)",
+                    [month, end],
+                )
+                month = end
+
+        cursor.execute(f"INSERT INTO core_auditlog SELECT * FROM {OLD_TABLE}")
+        cursor.execute(f"DROP TABLE {OLD_TABLE}")
+        for statement in indexes + fks:
+            cursor.execute(statement)
+
+
+def unpartition_auditlog(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "postgresql":
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE core_auditlog RENAME TO {OLD_TABLE}")
+        cursor.execute(f"ALTER INDEX core_auditlog_pkey RENAME TO {OLD_TABLE}_pkey")
+        indexes, fks = _copy_indexes_and_fks(cursor, OLD_TABLE, "core_auditlog")
+        cursor.execute("SELECT last_value FROM core_auditlog_id_seq")
+        (last_id,) = cursor.fetchone()
+        cursor.execute(f"ALTER TABLE {OLD_TABLE} ALTER COLUMN id DROP DEFAULT")
+        cursor.execute("DROP SEQUENCE core_auditlog_id_seq")
+
+        cursor.execute(f"CREATE TABLE core_auditlog (LIKE {OLD_TABLE} INCLUDING DEFAULTS)")
+        cursor.execute(
+            "ALTER TABLE core_auditlog ALTER COLUMN id ADD GENERATED BY DEFAULT AS IDENTITY "
+            "(START WITH %s)",
+            [last_id + 1],
+        )
+        cursor.execute("ALTER TABLE core_auditlog ADD CONSTRAINT core_auditlog_pkey PRIMARY KEY (id)")
+        cursor.execute(f"INSERT INTO core_auditlog SELECT * FROM {OLD_TABLE}")
+        cursor.execute(f"DROP TABLE {OLD_TABLE} CASCADE")
+        for statement in indexes + fks:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_auditlog_high_sensitivity'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            partition_auditlog,
+            unpartition_auditlog,
+            hints={"model_name": "auditlog"},
+        ),
+    ]
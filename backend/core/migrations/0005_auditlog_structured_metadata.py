@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:25
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_partition_auditlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditUserAgent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ua_hash', models.CharField(max_length=40, unique=True)),
+                ('user_agent', models.TextField()),
+                ('first_seen', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='extra',
+            field=models.JSONField(blank=True, help_text='Structured details for the action (compact JSON)', null=True),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='ip_address',
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='user_agent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='core.audituseragent'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# core/migrations/0006_backfill_auditlog_metadata.py
+"""
+Move request metadata that create_audit used to append to `details`
+("... | IP=1.2.3.4 | UA=Mozilla/5.0 ...") into the structured columns.
+Rows are processed in primary-key batches so the table is never locked
+as a whole.
+"""
+import hashlib
+import ipaddress
+import re
+
+from django.db import migrations
+
+BATCH_SIZE = 5000
+METADATA_SUFFIX = re.compile(r"\s*\| IP=(?P<ip>.*?) \| UA=(?P<ua>.*)$", re.DOTALL)
+
+
+def _clean_ip(value):
+    try:
+        return str(ipaddress.ip_address(value.strip()))
+    except ValueError:
+        return None
+
+
+def backfill_metadata(apps, schema_editor):
+    AuditLog = apps.get_model("core", "AuditLog")
+    AuditUserAgent = apps.get_model("core", "AuditUserAgent")
+    db = schema_editor.connection.alias
+
+    interned = {}
+
+    def intern(user_agent):
+        if not user_agent or user_agent == "unknown UA":
+            return None
+        user_agent = user_agent[:1000]
+        ua_hash = hashlib.sha1(user_agent.encode("utf-8")).hexdigest()
+        if ua_hash not in interned:
+            obj, _ = AuditUserAgent.objects.using(db).get_or_create(
+                ua_hash=ua_hash, defaults={"user_agent": user_agent}
+            )
+            interned[ua_hash] = obj.id
+        return interned[ua_hash]
+
+    last_pk = 0
+    while True:
+        batch = list(
+            AuditLog.objects.using(db)
+            .filter(pk__gt=last_pk, details__contains="| IP=")
+            .order_by("pk")
+            .only("pk", "details", "timestamp", "high_sensitivity")[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        for log in batch:
+            match = METADATA_SUFFIX.search(log.details)
+            if not match:
+                continue
+            log.ip_address = _clean_ip(match.group("ip"))
+            log.user_agent_id = intern(match.group("ua").strip())
+            log.details = log.details[: match.start()].strip()
+
+        AuditLog.objects.using(db).bulk_update(batch, ["details", "ip_address", "user_agent"])
+        last_pk = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_auditlog_structured_metadata'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            backfill_metadata,
+            migrations.RunPython.noop,
+            hints={"model_name": "auditlog"},
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_backfill_auditlog_metadata'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='auditlog',
+            options={'ordering': ['-timestamp', '-id']},
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='core_auditl_action_d9fb24_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='core_auditl_timesta_80074f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='core_auditl_target__e3061b_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='core_auditl_target__bd5329_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='core_auditl_target__a3d04b_idx',
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action',
+            field=models.CharField(choices=[('User Created', 'User Created'), ('User Profile Created', 'User Profile Created'), ('Role Assigned', 'Role Assigned'), ('OTP Verified', 'OTP Verified'), ('OTP Resent', 'OTP Resent'), ('Invite Created', 'Invite Created'), ('Invite Accepted', 'Invite Accepted'), ('Invite Approved', 'Invite Approved'), ('Invite Rejected', 'Invite Rejected'), ('Password Reset Requested', 'Password Reset Requested'), ('Password Reset Confirmed', 'Password Reset Confirmed'), ('Login', 'Login'), ('Logout', 'Logout'), ('Login Failed', 'Login Failed'), ('Token Refreshed', 'Token Refreshed'), ('Ticket Created', 'Ticket Created'), ('Ticket Updated', 'Ticket Updated'), ('Ticket Assigned', 'Ticket Assigned'), ('Ticket Unassigned', 'Ticket Unassigned'), ('Ticket Accepted', 'Ticket Accepted'), ('Ticket Resolved', 'Ticket Resolved'), ('Ticket Closed', 'Ticket Closed'), ('Ticket Reopened', 'Ticket Reopened'), ('Ticket Escalated', 'Ticket Escalated')], max_length=50),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='performed_by',
+            field=models.ForeignKey(db_index=False, help_text='The user who performed the action (may be null for system actions)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='target_invite',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='If the action was related to an invite', null=True, on_delete=django.db.models.deletion.SET_NULL, to='core.invite'),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='target_ticket',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='If the action was related to a ticket', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='audit_logs', to='core.ticket'),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='target_user',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='The user who was the subject of the action', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='targeted_audit_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='auditlog_ts_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['action', '-timestamp', '-id'], name='auditlog_action_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['performed_by', '-timestamp', '-id'], name='auditlog_performer_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['target_user', '-timestamp', '-id'], name='auditlog_tuser_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['target_ticket', '-timestamp', '-id'], name='auditlog_tticket_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['target_invite', '-timestamp', '-id'], name='auditlog_tinvite_ts_idx'),
+        ),
+    ]
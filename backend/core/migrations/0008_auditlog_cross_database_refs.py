@@ -0,0 +1,63 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:30
+
+import core.db_routers
+from django.conf import settings
+from django.db import migrations, models
+
+
+def drop_cross_database_constraints(apps, schema_editor):
+    """
+    AuditLog's user/ticket/invite references no longer carry FK constraints
+    so the table can move to the "audit" database (core/db_routers.py).
+    Earlier migrations created them; drop them here. The user_agent FK
+    stays (same database). An audit database built with the
+    postgresql_audit engine never had any.
+    """
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT conname FROM pg_constraint "
+                "WHERE conrelid = 'core_auditlog'::regclass AND contype = 'f' "
+                "AND confrelid <> 'core_audituseragent'::regclass"
+            )
+            for (name,) in cursor.fetchall():
+                cursor.execute(f"ALTER TABLE core_auditlog DROP CONSTRAINT {connection.ops.quote_name(name)}")
+    elif connection.vendor == "sqlite":
+        # SQLite keeps FKs in the table definition; rebuild it from the current model state
+        schema_editor._remake_table(apps.get_model("core", "AuditLog"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_auditlog_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='performed_by',
+            field=models.ForeignKey(db_constraint=False, db_index=False, help_text='The user who performed the action (may be null for system actions)', null=True, on_delete=core.db_routers.SET_NULL_IF_SAME_DB, related_name='audit_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='target_invite',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, help_text='If the action was related to an invite', null=True, on_delete=core.db_routers.SET_NULL_IF_SAME_DB, to='core.invite'),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='target_ticket',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, help_text='If the action was related to a ticket', null=True, on_delete=core.db_routers.SET_NULL_IF_SAME_DB, related_name='audit_logs', to='core.ticket'),
+        ),
+        migrations.AlterField(
+            model_name='auditlog',
+            name='target_user',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, help_text='The user who was the subject of the action', null=True, on_delete=core.db_routers.SET_NULL_IF_SAME_DB, related_name='targeted_audit_logs', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(
+            drop_cross_database_constraints,
+            migrations.RunPython.noop,
+            hints={"model_name": "auditlog"},
+        ),
+    ]
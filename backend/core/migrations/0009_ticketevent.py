@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+
+def backfill_created_events(apps, schema_editor):
+    """Start every existing ticket's timeline with its "created" event."""
+    Ticket = apps.get_model("core", "Ticket")
+    TicketEvent = apps.get_model("core", "TicketEvent")
+    db = schema_editor.connection.alias
+
+    batch = []
+    tickets = Ticket.objects.using(db).values_list("id", "reporter_id", "status", "category", "urgency", "created_at")
+    for ticket_id, reporter_id, status, category, urgency, created_at in tickets.iterator(chunk_size=BATCH_SIZE):
+        batch.append(TicketEvent(
+            ticket_id=ticket_id,
+            seq=1,
+            type="created",
+            actor_id=reporter_id,
+            payload={"status": status, "category": category, "urgency": urgency},
+            created_at=created_at,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            TicketEvent.objects.using(db).bulk_create(batch)
+            batch = []
+    TicketEvent.objects.using(db).bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_auditlog_cross_database_refs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('seq', models.PositiveIntegerField()),
+                ('type', models.CharField(choices=[('created', 'Created'), ('status_changed', 'Status Changed'), ('escalated', 'Escalated'), ('assigned', 'Assigned'), ('accepted', 'Accepted'), ('unassigned', 'Unassigned'), ('resolved', 'Resolved')], max_length=30)),
+                ('payload', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('actor', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('ticket', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='core.ticket')),
+            ],
+            options={
+                'ordering': ['ticket', 'seq'],
+                'constraints': [models.UniqueConstraint(fields=('ticket', 'seq'), name='ticketevent_ticket_seq_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_created_events, migrations.RunPython.noop),
+    ]
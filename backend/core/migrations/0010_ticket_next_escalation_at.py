@@ -0,0 +1,45 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:43
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Frozen copies of Ticket.SECONDARY_ESCALATION_AFTER / ADMIN_ESCALATION_AFTER
+SECONDARY_ESCALATION_AFTER = {"Urgent": timedelta(hours=4), "Standard": timedelta(hours=24)}
+ADMIN_ESCALATION_AFTER = timedelta(hours=48)
+
+
+def backfill_next_escalation_at(apps, schema_editor):
+    """Set the deadline on every ticket that can still escalate (one UPDATE per case)."""
+    Ticket = apps.get_model("core", "Ticket")
+    db = schema_editor.connection.alias
+    escalating = Ticket.objects.using(db).exclude(status__in=["Resolved", "Closed"])
+
+    for urgency, after in SECONDARY_ESCALATION_AFTER.items():
+        escalating.filter(escalation_level="None", urgency=urgency).update(
+            next_escalation_at=F("created_at") + after
+        )
+    escalating.filter(escalation_level="Secondary").update(
+        next_escalation_at=F("created_at") + ADMIN_ESCALATION_AFTER
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_ticketevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='next_escalation_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('next_escalation_at__isnull', False)), fields=['next_escalation_at'], name='ticket_next_escalation_idx'),
+        ),
+        migrations.RunPython(backfill_next_escalation_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:49
+
+import core.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_ticket_next_escalation_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessCalendar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('timezone', models.CharField(default='Asia/Manila', max_length=64)),
+                ('opening_hours', models.JSONField(default=core.models.default_opening_hours, help_text='Weekday (0 = Monday) → local time ranges, e.g. {"0": [["08:00", "12:00"], ["13:00", "17:00"]]}')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Holiday',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('name', models.CharField(blank=True, max_length=100)),
+                ('calendar', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='holidays', to='core.businesscalendar')),
+            ],
+            options={
+                'ordering': ['date'],
+                'constraints': [models.UniqueConstraint(fields=('calendar', 'date'), name='holiday_calendar_date_uniq')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SLAPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('category', models.CharField(blank=True, choices=[('Cleaning', 'Cleaning'), ('Plumbing', 'Plumbing'), ('Electrical', 'Electrical'), ('Structural', 'Structural'), ('HVAC', 'HVAC'), ('Technology', 'Technology'), ('Equipment', 'Equipment'), ('Disturbance', 'Disturbance'), ('Security', 'Security'), ('Parking', 'Parking')], max_length=50)),
+                ('building_name', models.CharField(blank=True, help_text='Location.building_name', max_length=100)),
+                ('urgency', models.CharField(blank=True, choices=[('Standard', 'Standard'), ('Urgent', 'Urgent')], max_length=50)),
+                ('secondary_after', models.DurationField(blank=True, help_text='Time until Secondary escalation (empty: no Secondary step)', null=True)),
+                ('admin_after', models.DurationField(blank=True, help_text='Time until Admin escalation (empty: never)', null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('calendar', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='policies', to='core.businesscalendar')),
+            ],
+            options={
+                'verbose_name': 'SLA policy',
+                'verbose_name_plural': 'SLA policies',
+                'constraints': [models.CheckConstraint(condition=models.Q(('secondary_after__isnull', True), ('admin_after__isnull', True), ('secondary_after__lt', models.F('admin_after')), _connector='OR'), name='slapolicy_secondary_before_admin')],
+            },
+        ),
+    ]
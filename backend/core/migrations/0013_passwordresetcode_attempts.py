@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_revokedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='passwordresetcode',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_customuser_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditlog',
+            name='action',
+            field=models.CharField(choices=[('User Created', 'User Created'), ('User Profile Created', 'User Profile Created'), ('Roster Synced', 'Roster Synced'), ('Role Assigned', 'Role Assigned'), ('OTP Verified', 'OTP Verified'), ('OTP Resent', 'OTP Resent'), ('Invite Created', 'Invite Created'), ('Invite Accepted', 'Invite Accepted'), ('Invite Approved', 'Invite Approved'), ('Invite Rejected', 'Invite Rejected'), ('Password Reset Requested', 'Password Reset Requested'), ('Password Reset Confirmed', 'Password Reset Confirmed'), ('Login', 'Login'), ('Logout', 'Logout'), ('Login Failed', 'Login Failed'), ('Token Refreshed', 'Token Refreshed'), ('Ticket Created', 'Ticket Created'), ('Ticket Updated', 'Ticket Updated'), ('Ticket Assigned', 'Ticket Assigned'), ('Ticket Unassigned', 'Ticket Unassigned'), ('Ticket Accepted', 'Ticket Accepted'), ('Ticket Resolved', 'Ticket Resolved'), ('Ticket Closed', 'Ticket Closed'), ('Ticket Reopened', 'Ticket Reopened'), ('Ticket Escalated', 'Ticket Escalated')], max_length=50),
+        ),
+    ]
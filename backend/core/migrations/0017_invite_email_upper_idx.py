@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 08:47
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_emailoutbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invite',
+            index=models.Index(django.db.models.functions.text.Upper('email'), name='core_invite_email_upper_idx'),
+        ),
+    ]
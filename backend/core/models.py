@@ -1,17 +1,23 @@
 # backend/core/models.py
+import enum
+import hashlib
 import logging
-import random
+import re
+import threading
 import uuid
+from collections import OrderedDict
 from datetime import timedelta
 
 from django.conf import settings
-from django.core.exceptions import ValidationError
-from django.core.validators import RegexValidator
-from django.db import models, transaction
+from django.core.exceptions import ObjectDoesNotExist, ValidationError
+from django.core.validators import RegexValidator, validate_ipv46_address
+from django.contrib.postgres.indexes import OpClass
+from django.db import models, router, transaction
+from django.db.models.functions import Upper
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from django.contrib.auth.hashers import make_password, check_password
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractUser, BaseUserManager, PermissionsMixin
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
 
@@ -20,6 +26,8 @@ from django.contrib.auth.signals import user_logged_in, user_logged_out, user_lo
 
 # Validators
 from core.validators import validate_file_size, validate_image_extension
+from core.db_routers import SET_NULL_IF_SAME_DB, defer_audit_write
+from core.utils import otp
 
 
 logger = logging.getLogger(__name__)
@@ -78,6 +86,14 @@ class CustomUser(AbstractUser, PermissionsMixin):
 
     objects = CustomUserManager()
 
+    class Meta(AbstractUser.Meta):
+        # Prefix search (istartswith → UPPER(col) LIKE 'ABC%') in the user directory
+        indexes = [
+            models.Index(OpClass(Upper("email"), name="text_pattern_ops"), name="core_user_email_prefix_idx"),
+            models.Index(OpClass(Upper("first_name"), name="text_pattern_ops"), name="core_user_first_prefix_idx"),
+            models.Index(OpClass(Upper("last_name"), name="text_pattern_ops"), name="core_user_last_prefix_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -101,6 +117,15 @@ class Permission(models.Model):
     """
     Defines permissions and allowed ticket categories per role.
     """
+    class Bit(enum.IntFlag):
+        """Compiled permission bits (core/utils/rbac.py); also the `perm` JWT claim."""
+        REPORT = 1 << 0
+        FIX = 1 << 1
+        ASSIGN = 1 << 2
+        MANAGE_USERS = 1 << 3
+        ADMIN = 1 << 4
+        SYSTEM = 1 << 5  # system-level roles (SYSTEM_ROLE_NAMES)
+
     role = models.OneToOneField(Role, on_delete=models.CASCADE, related_name="permissions")
     can_report = models.BooleanField(default=False)
     can_fix = models.BooleanField(default=False)
@@ -162,18 +187,15 @@ class UserProfile(models.Model):
         if getattr(self.user, "email", None):
             self.email_domain = self.user.email.split("@")[-1].lower()
 
-        # Auto-assign role only for self-registered users
+        # Auto-assign role only for self-registered users (in-memory domain trie, Visitor if unmapped)
         if not self.role:
-            mapping = DomainRoleMapping.objects.filter(domain=self.email_domain).first()
-            if mapping:
-                self.role = mapping.role
-            else:
-                # fallback role if no mapping found
-                self.role, _ = Role.objects.get_or_create(name="Visitor")
+            from core.utils import domain_roles
+            self.role = domain_roles.resolve(self.email_domain)
 
         super().save(*args, **kwargs)
 
     # === Permissions ===
+    # Flags come from the compiled role table (core/utils/rbac.py): a bit test, no query
     @property
     def permissions(self):
         try:
@@ -181,13 +203,25 @@ class UserProfile(models.Model):
         except (AttributeError, Permission.DoesNotExist):
             return None
 
+    @property
+    def compiled_role(self):
+        from core.utils import rbac
+        return rbac.get_role(self.role_id)
+
+    def has_perm_bit(self, perm) -> bool:
+        return bool(self.compiled_role.mask & perm)
+
+    @property
+    def perm_mask(self) -> int:
+        return self.compiled_role.mask
+
     @property
     def can_report(self):
-        return bool(self.permissions and self.permissions.can_report)
+        return self.has_perm_bit(Permission.Bit.REPORT)
 
     @property
     def can_fix(self):
-        return bool(self.permissions and self.permissions.can_fix)
+        return self.has_perm_bit(Permission.Bit.FIX)
 
     @property
     def requires_proof(self):
@@ -195,29 +229,32 @@ class UserProfile(models.Model):
 
     @property
     def can_assign(self):
-        return bool(self.permissions and self.permissions.can_assign)
+        return self.has_perm_bit(Permission.Bit.ASSIGN)
 
     @property
     def can_manage_users(self):
-        return bool(self.permissions and self.permissions.can_manage_users)
+        return self.has_perm_bit(Permission.Bit.MANAGE_USERS)
 
     @property
     def is_admin_level(self):
-        return bool(self.permissions and self.permissions.is_admin_level)
+        return self.has_perm_bit(Permission.Bit.ADMIN)
 
     @property
     def can_close_tickets(self):
         return self.is_admin_level
 
+    @property
+    def features(self):
+        return list(self.compiled_role.features)
+
     def allowed_categories(self):
-        return self.permissions.allowed_categories if self.permissions else []
+        return list(self.compiled_role.allowed_categories)
 
     # 🔑 Find fixers eligible for a given category
     @classmethod
     def fixers_for_category(cls, category):
-        return cls.objects.filter(
-            role__permissions__allowed_categories__contains=[category]
-        )
+        from core.utils import rbac
+        return cls.objects.filter(role_id__in=rbac.get_table().role_ids_with_category(category))
 
     def __str__(self):
         return f"{self.user.email} - {self.role.name if self.role else 'No Role'}"
@@ -283,12 +320,9 @@ class PasswordResetCodeManager(models.Manager):
             # Mark all old active codes as used
             self.filter(user=user, is_used=False).update(is_used=True)
 
-            # Generate raw OTP (6-digit)
-            raw_code = f"{random.randint(100000, 999999)}"
-            hashed_code = make_password(raw_code)
-
-            # Save hashed version
-            obj = self.create(user=user, code_hash=hashed_code)
+            # Generate raw OTP (6-digit), store its keyed digest
+            raw_code = otp.generate_code()
+            obj = self.create(user=user, code_hash=otp.digest(PasswordResetCode.PURPOSE, user.pk, raw_code))
 
             # Return both for external use (raw_code is sent to email)
             return obj, raw_code
@@ -307,6 +341,10 @@ class PasswordResetCode(models.Model):
     code_hash = models.CharField(max_length=128, blank=True, db_index=True)
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
     is_used = models.BooleanField(default=False, db_index=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    EXPIRY = timedelta(minutes=15)
+    PURPOSE = "password_reset"  # HMAC domain (core/utils/otp.py)
 
     objects = PasswordResetCodeManager()
 
@@ -325,44 +363,84 @@ class PasswordResetCode(models.Model):
     # ======================
     def is_expired(self) -> bool:
         """Check if the OTP has expired (15 minutes)."""
-        return self.created_at + timedelta(minutes=15) < timezone.now()
+        return self.created_at + self.EXPIRY < timezone.now()
+
+    def verify_code(self, raw_code: str):
+        """
+        Validate an OTP; every call counts as an attempt.
+        Returns an otp.Verdict (OK, INVALID, EXPIRED or LOCKED).
+        """
+        if self.is_used or self.is_expired():
+            return otp.Verdict.EXPIRED
+        # Count the attempt atomically, so parallel guesses share the limit
+        counted = PasswordResetCode.objects.filter(
+            pk=self.pk, attempts__lt=settings.OTP_MAX_ATTEMPTS
+        ).update(attempts=models.F("attempts") + 1)
+        if not counted:
+            return otp.Verdict.LOCKED
+        self.attempts += 1
+        if "$" in self.code_hash:  # hashed with make_password before HMAC codes
+            valid = check_password(raw_code, self.code_hash)
+        else:
+            valid = otp.matches(self.code_hash, self.PURPOSE, self.user_id, raw_code)
+        return otp.Verdict.OK if valid else otp.Verdict.INVALID
 
     def check_code(self, raw_code: str) -> bool:
         """
         Validate an OTP.
-        Returns True if correct, not expired, and not already used.
+        Returns True if correct, not expired, not already used and not locked.
         """
-        if self.is_used or self.is_expired():
-            return False
-        return check_password(raw_code, self.code_hash)
+        return self.verify_code(raw_code) is otp.Verdict.OK
 
-    def mark_used(self):
-        """Mark the OTP as used (after successful reset)."""
+    def mark_used(self) -> bool:
+        """Mark the OTP as used (after successful reset); False if it already was."""
         self.is_used = True
-        self.save(update_fields=["is_used"])
+        return bool(PasswordResetCode.objects.filter(pk=self.pk, is_used=False).update(is_used=True))
 
     # ======================
     # Cleanup
     # ======================
     @classmethod
-    def cleanup_expired(cls):
+    def cleanup_expired(cls, **kwargs):
         """
-        Delete all expired or already used reset codes.
+        Delete all expired or already used reset codes, in batches.
         Called by Celery / cron / management command.
         """
-        now = timezone.now()
-        expired = cls.objects.filter(
-            models.Q(is_used=True) | models.Q(created_at__lt=now - timedelta(minutes=15))
-        )
-        count = expired.count()
-        expired.delete()
-        return count
+        from core.utils import purge
+        return purge.run_job("password_reset_codes", **kwargs).deleted
 
     def __str__(self):
         status = "used" if self.is_used else "active"
         return f"PasswordResetCode for {self.user.email} ({status})"
 
 
+class RevokedToken(models.Model):
+    """
+    Exact store of revoked refresh tokens (by jti), checked only when the
+    in-memory Bloom filter says "maybe" (see core/utils/revocation.py).
+    Rows are purged once the token would have expired anyway.
+    """
+    class Reason(models.TextChoices):
+        LOGOUT = "logout", "Logout"
+        ROTATED = "rotated", "Rotated"
+        ADMIN = "admin", "Revoked by admin"
+
+    jti = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="revoked_tokens",
+    )
+    reason = models.CharField(max_length=10, choices=Reason.choices)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.jti} ({self.reason}, expires {self.expires_at:%Y-%m-%d %H:%M})"
+
+
 class Invite(models.Model):
     """
     Invitation system to onboard privileged users (fixers/admins).
@@ -401,9 +479,18 @@ class Invite(models.Model):
                 fields=["email", "is_used"], name="unique_active_invite_per_email"
             )
         ]
+        indexes = [
+            # 🔎 Case-insensitive lookups (core/utils/invites.py)
+            models.Index(Upper("email"), name="core_invite_email_upper_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         """Auto-set expiry and admin approval flags when saving."""
+        self.apply_defaults()
+        super().save(*args, **kwargs)
+
+    def apply_defaults(self):
+        """Expiry and approval flags; called by save() and before bulk_create (which skips save)."""
         expiry_hours = getattr(settings, "INVITE_EXPIRY_HOURS", 24)
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(hours=expiry_hours)
@@ -412,8 +499,6 @@ class Invite(models.Model):
         if self.role and getattr(self.role, "requires_admin_approval", False):
             self.requires_admin_approval = True
 
-        super().save(*args, **kwargs)
-
     # =====================================================
     # ⏳ Expiration & Usage Enforcement
     # =====================================================
@@ -510,6 +595,16 @@ class Ticket(models.Model):
         STANDARD = "Standard", "Standard"
         URGENT = "Urgent", "Urgent"
 
+    # ⏱️ Built-in escalation thresholds, used when no SLAPolicy matches (core/utils/sla.py)
+    SECONDARY_ESCALATION_AFTER = {
+        Urgency.URGENT: timedelta(hours=4),
+        Urgency.STANDARD: timedelta(hours=24),
+    }
+    ADMIN_ESCALATION_AFTER = timedelta(hours=48)
+    INACTIVE_STATUSES = (Status.RESOLVED, Status.CLOSED)
+    # Fields that move next_escalation_at when they change
+    ESCALATION_SCHEDULE_FIELDS = {"status", "urgency", "category", "location", "escalation_level", "created_at"}
+
     reporter = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -555,6 +650,9 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(default=timezone.now, db_index=True)
     updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
+    # ⏰ Deadline of the next escalation step (NULL = nothing left to escalate), kept in sync by save()
+    next_escalation_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     class Meta:
         indexes = [
             models.Index(fields=["status"]),
@@ -562,6 +660,12 @@ class Ticket(models.Model):
             models.Index(fields=["created_at"]),
             models.Index(fields=["urgency"]),
             models.Index(fields=["title"]),
+            # Partial: the scheduler only ever scans tickets that can still escalate
+            models.Index(
+                fields=["next_escalation_at"],
+                name="ticket_next_escalation_idx",
+                condition=models.Q(next_escalation_at__isnull=False),
+            ),
         ]
         constraints = [
             models.CheckConstraint(
@@ -579,6 +683,16 @@ class Ticket(models.Model):
         self._original_status = getattr(self, "status", None)
         self._original_escalation_level = getattr(self, "escalation_level", None)
 
+    def save(self, *args, **kwargs):
+        self.next_escalation_at = self.compute_next_escalation_at()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and self.ESCALATION_SCHEDULE_FIELDS.intersection(update_fields):
+            kwargs["update_fields"] = {*update_fields, "next_escalation_at"}
+        super().save(*args, **kwargs)
+        # post_save receivers have seen the change; the next save compares against this state
+        self._original_status = self.status
+        self._original_escalation_level = self.escalation_level
+
     # 🔒 Validation rules
     def clean(self):
         errors = {}
@@ -625,38 +739,35 @@ class Ticket(models.Model):
         old = Ticket.objects.filter(pk=self.pk).values(field).first()
         return old and getattr(self, field) != old[field]
 
+    def sla_deadlines(self):
+        """Escalation deadlines from the matching SLA policy (see core/utils/sla.py)."""
+        from core.utils import sla
+        return sla.ticket_deadlines(self)
+
+    def compute_next_escalation_at(self):
+        """When auto_escalate() would next change this ticket, or None if it never will."""
+        if self.status in self.INACTIVE_STATUSES:
+            return None
+        return self.sla_deadlines().next_for(self.escalation_level)
+
     # 🚨 Auto-escalation with audit log
     def auto_escalate(self, performed_by=None):
-        now = timezone.now()
-        age = now - self.created_at
-
-        if self.status in {self.Status.RESOLVED, self.Status.CLOSED}:
+        if self.status in self.INACTIVE_STATUSES:
             return False
 
-        changed = False
-        new_level = self.escalation_level
-
-        if self.escalation_level == self.Escalation.NONE:
-            if self.urgency == self.Urgency.URGENT and age > timedelta(hours=4):
-                new_level = self.Escalation.SECONDARY
-                changed = True
-            elif self.urgency == self.Urgency.STANDARD and age > timedelta(hours=24):
-                new_level = self.Escalation.SECONDARY
-                changed = True
-
-        if age > timedelta(hours=48) and self.escalation_level != self.Escalation.ADMIN:
-            new_level = self.Escalation.ADMIN
-            changed = True
-
-        if changed and new_level != self.escalation_level:
+        new_level = self.sla_deadlines().target_level(self.escalation_level, timezone.now())
+        if new_level is not None:
             with transaction.atomic():
                 self.escalation_level = new_level
+                self._performed_by = performed_by
                 self.save(update_fields=["escalation_level", "updated_at"])
                 create_audit(
                     action=AuditLog.Action.TICKET_ESCALATED,
                     performed_by=performed_by,
                     target_user=self.reporter,
-                    details=f"Ticket #{self.id} escalated to {self.escalation_level}",
+                    target_ticket=self,
+                    details="Ticket #{ticket} escalated to {escalation_level}",
+                    extra={"escalation_level": self.escalation_level},
                 )
             return True
         return False
@@ -666,12 +777,14 @@ class Ticket(models.Model):
         if self.status != self.Status.CLOSED:
             with transaction.atomic():
                 self.status = self.Status.CLOSED
+                self._performed_by = performed_by
                 self.save(update_fields=["status", "updated_at"])
                 create_audit(
                     action=AuditLog.Action.TICKET_CLOSED,
                     performed_by=performed_by,
                     target_user=self.reporter,
-                    details=f"Ticket #{self.id} closed.",
+                    target_ticket=self,
+                    details="Ticket #{ticket} closed.",
                 )
         return self
 
@@ -680,12 +793,14 @@ class Ticket(models.Model):
         if self.status == self.Status.CLOSED:
             with transaction.atomic():
                 self.status = self.Status.REOPENED
+                self._performed_by = performed_by
                 self.save(update_fields=["status", "updated_at"])
                 create_audit(
                     action=AuditLog.Action.TICKET_REOPENED,
                     performed_by=performed_by,
                     target_user=self.reporter,
-                    details=f"Ticket #{self.id} reopened.",
+                    target_ticket=self,
+                    details="Ticket #{ticket} reopened.",
                 )
         return self
 
@@ -835,14 +950,289 @@ class TicketResolution(models.Model):
         return f"Resolution for Ticket #{self.ticket.id} by {self.resolved_by}"
 
 
+# =====================================================
+# 🧾 Ticket timeline (append-only event store)
+# =====================================================
+class TicketEventManager(models.Manager):
+    def append(self, ticket, type, actor=None, **payload):
+        """
+        Append the next event to a ticket's timeline.
+        The ticket row is locked while the next `seq` is read, so concurrent
+        writers get consecutive numbers instead of a unique violation.
+        """
+        ticket_id = getattr(ticket, "pk", ticket)
+        with transaction.atomic(using=self.db):
+            list(Ticket.objects.select_for_update().filter(pk=ticket_id).values_list("pk"))
+            last = (
+                self.filter(ticket_id=ticket_id)
+                .order_by("-seq")
+                .values_list("seq", flat=True)
+                .first()
+            )
+            return self.create(
+                ticket_id=ticket_id,
+                seq=(last or 0) + 1,
+                type=type,
+                actor=actor if getattr(actor, "pk", None) else None,
+                payload=payload,
+            )
+
+
+class TicketEvent(models.Model):
+    """
+    One lifecycle step of a ticket, numbered 1..n per ticket.
+    Rows are only ever appended (see TicketEventManager.append); the
+    timeline is a single range scan on the (ticket, seq) unique index.
+    """
+
+    class Type(models.TextChoices):
+        CREATED = "created", "Created"
+        STATUS_CHANGED = "status_changed", "Status Changed"
+        ESCALATED = "escalated", "Escalated"
+        ASSIGNED = "assigned", "Assigned"
+        ACCEPTED = "accepted", "Accepted"
+        UNASSIGNED = "unassigned", "Unassigned"
+        RESOLVED = "resolved", "Resolved"
+
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.CASCADE,
+        db_index=False,  # covered by the (ticket, seq) unique index
+        related_name="events",
+    )
+    seq = models.PositiveIntegerField()
+    type = models.CharField(max_length=30, choices=Type.choices)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,
+        related_name="+",
+    )
+    payload = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    objects = TicketEventManager()
+
+    class Meta:
+        ordering = ["ticket", "seq"]
+        constraints = [
+            models.UniqueConstraint(fields=["ticket", "seq"], name="ticketevent_ticket_seq_uniq"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValidationError("Ticket events are append-only.")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"Ticket #{self.ticket_id} event {self.seq}: {self.type}"
+
+
+# =====================================================
+# ⏱️ SLA policies & business calendars (compiled by core/utils/sla.py)
+# =====================================================
+def default_opening_hours():
+    """Monday–Friday, 08:00–17:00."""
+    return {str(weekday): [["08:00", "17:00"]] for weekday in range(5)}
+
+
+class BusinessCalendar(models.Model):
+    """Hours an SLA clock runs in: weekly opening hours in a local timezone, minus holidays."""
+    name = models.CharField(max_length=100, unique=True)
+    timezone = models.CharField(max_length=64, default=settings.TIME_ZONE)
+    opening_hours = models.JSONField(
+        default=default_opening_hours,
+        help_text='Weekday (0 = Monday) → local time ranges, e.g. {"0": [["08:00", "12:00"], ["13:00", "17:00"]]}',
+    )
+
+    def clean(self):
+        from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+        from core.utils.sla import parse_opening_hours
+
+        errors = {}
+        try:
+            ZoneInfo(self.timezone)
+        except (ZoneInfoNotFoundError, ValueError):
+            errors["timezone"] = f"Unknown timezone {self.timezone!r}."
+        try:
+            parse_opening_hours(self.opening_hours)
+        except (TypeError, ValueError) as e:
+            errors["opening_hours"] = str(e)
+        if errors:
+            raise ValidationError(errors)
+
+    def __str__(self):
+        return f"{self.name} ({self.timezone})"
+
+
+class Holiday(models.Model):
+    calendar = models.ForeignKey(BusinessCalendar, on_delete=models.CASCADE, related_name="holidays")
+    date = models.DateField()
+    name = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        ordering = ["date"]
+        constraints = [
+            models.UniqueConstraint(fields=["calendar", "date"], name="holiday_calendar_date_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.name}".strip()
+
+
+class SLAPolicy(models.Model):
+    """
+    Escalation deadlines for the tickets it matches. Blank category / building /
+    urgency match anything; the most specific active policy wins (ties: lowest id).
+    Durations are business time on `calendar` (24/7 when empty).
+    """
+    name = models.CharField(max_length=100)
+    category = models.CharField(max_length=50, choices=Ticket.Category.choices, blank=True)
+    building_name = models.CharField(max_length=100, blank=True, help_text="Location.building_name")
+    urgency = models.CharField(max_length=50, choices=Ticket.Urgency.choices, blank=True)
+    calendar = models.ForeignKey(
+        BusinessCalendar,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="policies",
+    )
+    secondary_after = models.DurationField(
+        null=True, blank=True, help_text="Time until Secondary escalation (empty: no Secondary step)"
+    )
+    admin_after = models.DurationField(
+        null=True, blank=True, help_text="Time until Admin escalation (empty: never)"
+    )
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "SLA policy"
+        verbose_name_plural = "SLA policies"
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(secondary_after__isnull=True)
+                | models.Q(admin_after__isnull=True)
+                | models.Q(secondary_after__lt=models.F("admin_after")),
+                name="slapolicy_secondary_before_admin",
+            ),
+        ]
+
+    def __str__(self):
+        scope = " / ".join(filter(None, [self.category, self.building_name, self.urgency])) or "all tickets"
+        return f"{self.name} ({scope})"
+
+
+# =====================================================
+# 📮 Email outbox (drained by core/utils/outbox.py)
+# =====================================================
+class EmailOutbox(models.Model):
+    """
+    A transactional email, written in the transaction that triggers it and
+    delivered later by the outbox drainer (batched, one SMTP session).
+    """
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"  # permanent error or out of attempts
+
+    kind = models.CharField(max_length=50, blank=True, help_text="e.g. password_reset, invite")
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    dedup_key = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="Same key while the row is kept → enqueued once (default: hash of the message)",
+    )
+
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The drainer only scans pending rows that are due
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status="pending"),
+                name="emailoutbox_due_idx",
+            ),
+        ]
+        verbose_name = "Outgoing Email"
+        verbose_name_plural = "Email Outbox"
+
+    def __str__(self):
+        return f"{self.kind or 'email'} to {self.to_email} ({self.status})"
+
+
 # =====================================================
 # 📝 Audit Log
 # =====================================================
+class AuditUserAgentManager(models.Manager):
+    # 🧠 Process-wide cache of ua_hash → id, bounded LRU
+    _cache = OrderedDict()
+    _cache_lock = threading.Lock()
+    CACHE_SIZE = 2048
+
+    @staticmethod
+    def hash_user_agent(user_agent: str) -> str:
+        return hashlib.sha1(user_agent.encode("utf-8")).hexdigest()
+
+    def intern(self, user_agent):
+        """
+        Return the id of the row holding this User-Agent string, creating it
+        on first sight. Repeated strings are served from memory.
+        """
+        if not user_agent:
+            return None
+        user_agent = user_agent[:1000]
+        ua_hash = self.hash_user_agent(user_agent)
+
+        with self._cache_lock:
+            ua_id = self._cache.get(ua_hash)
+            if ua_id is not None:
+                self._cache.move_to_end(ua_hash)
+                return ua_id
+
+        obj, _ = self.get_or_create(ua_hash=ua_hash, defaults={"user_agent": user_agent})
+        # Cached only once committed: an id from a rolled-back transaction would dangle
+        transaction.on_commit(lambda: self._remember(ua_hash, obj.id), using=router.db_for_write(self.model))
+        return obj.id
+
+    def _remember(self, ua_hash, ua_id):
+        with self._cache_lock:
+            self._cache[ua_hash] = ua_id
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+
+class AuditUserAgent(models.Model):
+    """
+    Interned User-Agent strings.
+    AuditLog rows point here instead of repeating the same ~200 bytes per login.
+    """
+    ua_hash = models.CharField(max_length=40, unique=True)
+    user_agent = models.TextField()
+    first_seen = models.DateTimeField(default=timezone.now)
+
+    objects = AuditUserAgentManager()
+
+    def __str__(self):
+        return self.user_agent[:80]
+
+
 class AuditLog(models.Model):
     class Action(models.TextChoices):
         # 🔐 Auth / user management
         USER_CREATED = "User Created", "User Created"
         USER_PROFILE_CREATED = "User Profile Created", "User Profile Created"
+        ROSTER_SYNCED = "Roster Synced", "Roster Synced"
         ROLE_ASSIGNED = "Role Assigned", "Role Assigned"
         OTP_VERIFIED = "OTP Verified", "OTP Verified"
         OTP_RESENT = "OTP Resent", "OTP Resent"
@@ -868,61 +1258,143 @@ class AuditLog(models.Model):
         TICKET_REOPENED = "Ticket Reopened", "Ticket Reopened"
         TICKET_ESCALATED = "Ticket Escalated", "Ticket Escalated"
 
-    action = models.CharField(max_length=50, choices=Action.choices, db_index=True)
+    # Single-column indexes are covered by the composite indexes in Meta
+    action = models.CharField(max_length=50, choices=Action.choices)
 
+    # 🔗 Id references without a DB constraint so the table can live in its
+    # own database; nulled on delete only while it shares one (core/db_routers.py)
     performed_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.SET_NULL,
+        on_delete=SET_NULL_IF_SAME_DB,
+        db_constraint=False,
         null=True,
+        db_index=False,
         related_name="audit_logs",
         help_text="The user who performed the action (may be null for system actions)",
     )
     target_user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
-        on_delete=models.SET_NULL,
+        on_delete=SET_NULL_IF_SAME_DB,
+        db_constraint=False,
         null=True,
         blank=True,
+        db_index=False,
         related_name="targeted_audit_logs",
         help_text="The user who was the subject of the action",
     )
     target_invite = models.ForeignKey(
         Invite,
-        on_delete=models.SET_NULL,
+        on_delete=SET_NULL_IF_SAME_DB,
+        db_constraint=False,
         null=True,
         blank=True,
+        db_index=False,
         help_text="If the action was related to an invite",
     )
     target_ticket = models.ForeignKey(
         Ticket,
-        on_delete=models.SET_NULL,
+        on_delete=SET_NULL_IF_SAME_DB,
+        db_constraint=False,
         null=True,
         blank=True,
+        db_index=False,
         related_name="audit_logs",
         help_text="If the action was related to a ticket",
     )
 
+    # Short template; the values are in `extra` and filled in on read (see format_details)
     details = models.TextField(blank=True, null=True)
-    timestamp = models.DateTimeField(default=timezone.now, db_index=True)
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    # 🔎 Structured request metadata (previously appended to `details`)
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    user_agent = models.ForeignKey(
+        AuditUserAgent,
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    extra = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="Structured details for the action (compact JSON)",
+    )
+
+    # Partition key on PostgreSQL (see core/utils/audit_partitions.py)
+    high_sensitivity = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text="Set from AUDIT_LOG_HIGH_SENS_ACTIONS; routes the row to the long-retention partitions",
+    )
 
     class Meta:
-        ordering = ["-timestamp"]
+        ordering = ["-timestamp", "-id"]
+        # 📇 Every API filter + keyset page is one range scan on (filter, timestamp, id)
         indexes = [
-            models.Index(fields=["action"]),
-            models.Index(fields=["timestamp"]),
-            models.Index(fields=["target_ticket"]),
-            models.Index(fields=["target_user"]),
-            models.Index(fields=["target_invite"]),
+            models.Index(fields=["-timestamp", "-id"], name="auditlog_ts_id_idx"),
+            models.Index(fields=["action", "-timestamp", "-id"], name="auditlog_action_ts_idx"),
+            models.Index(fields=["performed_by", "-timestamp", "-id"], name="auditlog_performer_ts_idx"),
+            models.Index(fields=["target_user", "-timestamp", "-id"], name="auditlog_tuser_ts_idx"),
+            models.Index(fields=["target_ticket", "-timestamp", "-id"], name="auditlog_tticket_ts_idx"),
+            models.Index(fields=["target_invite", "-timestamp", "-id"], name="auditlog_tinvite_ts_idx"),
         ]
 
     def __str__(self):
-        performer = self.performed_by.email if self.performed_by else "System"
+        try:
+            performer = self.performed_by.email if self.performed_by else "System"
+        except ObjectDoesNotExist:  # user deleted; no FK constraint (see core/db_routers.py)
+            performer = f"user #{self.performed_by_id}"
         return f"{self.action} by {performer} at {self.timestamp:%Y-%m-%d %H:%M:%S}"
 
+    def save(self, *args, **kwargs):
+        self.high_sensitivity = self.is_high_sensitivity_action(self.action)
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def is_high_sensitivity_action(action) -> bool:
+        """True if the action falls under the longer retention policy."""
+        return action in getattr(settings, "AUDIT_LOG_HIGH_SENS_ACTIONS", [])
+
+    _PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
     @classmethod
-    def cleanup_old_logs(cls, days: int = 90):
-        """Delete logs older than N days (default: 90)."""
-        cutoff = timezone.now() - timedelta(days=days)
-        cls.objects.filter(timestamp__lt=cutoff).delete()
+    def format_details(cls, template, extra=None, **targets) -> str:
+        """
+        Fill the {name} placeholders of a details template from `extra` and the
+        target ids (ticket=, user=, invite=). Unknown names are left as they are,
+        so older rows that stored the full text read back unchanged.
+        """
+        if not template:
+            return template or ""
+        values = {name: value for name, value in targets.items() if value is not None}
+        if isinstance(extra, dict):
+            values.update(extra)
+        return cls._PLACEHOLDER.sub(lambda m: str(values.get(m.group(1), m.group(0))), template)
+
+    @property
+    def rendered_details(self) -> str:
+        return self.format_details(
+            self.details, self.extra,
+            ticket=self.target_ticket_id, user=self.target_user_id, invite=self.target_invite_id,
+        )
+
+    @staticmethod
+    def request_metadata(request):
+        """
+        Return (ip_address, user_agent) for a request, or (None, None).
+        Read up front so a deferred write doesn't need the request object.
+        """
+        if request is None:
+            return None, None
+        meta = getattr(request, "META", {})
+        ip = meta.get("REMOTE_ADDR") or None
+        try:
+            if ip:
+                validate_ipv46_address(ip)
+        except ValidationError:
+            ip = None
+        return ip, meta.get("HTTP_USER_AGENT", "")
 
 
 # =====================================================
@@ -936,29 +1408,34 @@ def create_audit(
     target_ticket=None,
     details: str = "",
     request=None,
+    extra=None,
 ):
     """Safe audit log creator with action validation + request metadata."""
     if action not in AuditLog.Action.values:
         return None
 
-    try:
-        # 🔎 Enrich details with request metadata if provided
-        if request:
-            ip = request.META.get("REMOTE_ADDR", "unknown IP")
-            ua = request.META.get("HTTP_USER_AGENT", "unknown UA")
-            details = f"{details} | IP={ip} | UA={ua}".strip()
+    # 🔎 Request metadata goes to structured columns, not into `details`
+    ip, user_agent = AuditLog.request_metadata(request)
 
-        return AuditLog.objects.create(
-            action=action,
-            performed_by=performed_by,
-            target_user=target_user,
-            target_invite=target_invite,
-            target_ticket=target_ticket,
-            details=details or "",
-        )
-    except Exception as e:
-        logger.error(f"[AuditLog] Failed to create log ({action}): {e}")
-        return None
+    def write():
+        try:
+            return AuditLog.objects.create(
+                action=action,
+                performed_by=performed_by,
+                target_user=target_user,
+                target_invite=target_invite,
+                target_ticket=target_ticket,
+                details=details or "",
+                ip_address=ip,
+                user_agent_id=AuditUserAgent.objects.intern(user_agent),
+                extra=extra,
+            )
+        except Exception as e:
+            logger.error(f"[AuditLog] Failed to create log ({action}): {e}")
+            return None
+
+    # 🗄️ Deferred to after commit when audit rows live in their own database
+    return defer_audit_write(write)
 
 
 # =====================================================
@@ -971,14 +1448,16 @@ def log_user_profile_events(sender, instance, created, **kwargs):
             AuditLog.Action.USER_PROFILE_CREATED,
             performed_by=None,  # system action
             target_user=instance.user,
-            details=f"UserProfile created for {instance.user.email} with role {instance.role}.",
+            details="UserProfile created for {email} with role {role}.",
+            extra={"email": instance.user.email, "role": getattr(instance.role, "name", None)},
         )
     elif hasattr(instance, "has_changed") and instance.has_changed("role"):
         create_audit(
             AuditLog.Action.ROLE_ASSIGNED,
             performed_by=getattr(instance, "_performed_by", None),
             target_user=instance.user,
-            details=f"Role updated to {instance.role} for {instance.user.email}.",
+            details="Role updated to {role} for {email}.",
+            extra={"email": instance.user.email, "role": getattr(instance.role, "name", None)},
         )
 
 
@@ -994,7 +1473,8 @@ def log_ticket_events(sender, instance, created, **kwargs):
             AuditLog.Action.TICKET_CREATED,
             performed_by=performed_by or instance.reporter,
             target_ticket=instance,
-            details=f"Ticket #{instance.id} created with category {instance.category}.",
+            details="Ticket #{ticket} created with category {category}.",
+            extra={"category": instance.category},
         )
     else:
         if hasattr(instance, "has_changed") and instance.has_changed("status"):
@@ -1008,14 +1488,16 @@ def log_ticket_events(sender, instance, created, **kwargs):
                 action,
                 performed_by=performed_by,
                 target_ticket=instance,
-                details=f"Ticket #{instance.id} status changed to {instance.status}.",
+                details="Ticket #{ticket} status changed to {status}.",
+                extra={"status": instance.status},
             )
         elif hasattr(instance, "has_changed") and instance.has_changed("escalation_level"):
             create_audit(
                 AuditLog.Action.TICKET_ESCALATED,
                 performed_by=performed_by,
                 target_ticket=instance,
-                details=f"Ticket #{instance.id} escalated to {instance.escalation_level}.",
+                details="Ticket #{ticket} escalated to {escalation_level}.",
+                extra={"escalation_level": instance.escalation_level},
             )
 
 
@@ -1029,7 +1511,8 @@ def log_ticket_assignment(sender, instance, created, **kwargs):
             performed_by=performed_by,
             target_user=instance.user,
             target_ticket=instance.ticket,
-            details=f"Ticket #{instance.ticket.id} assigned to {instance.user.email}.",
+            details="Ticket #{ticket} assigned to {email}.",
+            extra={"email": instance.user.email},
         )
     elif instance.accepted and instance.accepted_at:
         create_audit(
@@ -1037,7 +1520,8 @@ def log_ticket_assignment(sender, instance, created, **kwargs):
             performed_by=performed_by or instance.user,
             target_user=instance.user,
             target_ticket=instance.ticket,
-            details=f"{instance.user.email} accepted Ticket #{instance.ticket.id}.",
+            details="{email} accepted Ticket #{ticket}.",
+            extra={"email": instance.user.email},
         )
 
 
@@ -1049,7 +1533,8 @@ def log_ticket_unassignment(sender, instance, **kwargs):
         performed_by=performed_by,
         target_user=instance.user,
         target_ticket=instance.ticket,
-        details=f"Ticket #{instance.ticket.id} unassigned from {instance.user.email}.",
+        details="Ticket #{ticket} unassigned from {email}.",
+        extra={"email": instance.user.email},
     )
 
 
@@ -1062,7 +1547,8 @@ def log_ticket_resolution(sender, instance, created, **kwargs):
             performed_by=performed_by,
             target_user=instance.resolved_by,
             target_ticket=instance.ticket,
-            details=f"Ticket #{instance.ticket.id} resolved by {instance.resolved_by.email}.",
+            details="Ticket #{ticket} resolved by {email}.",
+            extra={"email": instance.resolved_by.email},
         )
 
 
@@ -1074,7 +1560,8 @@ def log_user_login(sender, request, user, **kwargs):
     create_audit(
         AuditLog.Action.LOGIN,
         performed_by=user,
-        details=f"User {user.email} logged in.",
+        details="User {email} logged in.",
+        extra={"email": user.email},
         request=request,
     )
 
@@ -1084,7 +1571,8 @@ def log_user_logout(sender, request, user, **kwargs):
     create_audit(
         AuditLog.Action.LOGOUT,
         performed_by=user,
-        details=f"User {user.email} logged out.",
+        details="User {email} logged out.",
+        extra={"email": user.email},
         request=request,
     )
 
@@ -1094,8 +1582,9 @@ def log_user_login_failed(sender, credentials, request, **kwargs):
     email = credentials.get("email") or credentials.get("username")
     create_audit(
         AuditLog.Action.LOGIN_FAILED,
-        details=f"Failed login attempt for {email}.",
+        details="Failed login attempt for {email}.",
         request=request,
+        extra={"email": email},
     )
 
 
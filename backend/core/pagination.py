@@ -0,0 +1,125 @@
+# core/pagination.py
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over a unique, ordered tuple of fields.
+
+    Unlike DRF's CursorPagination, the cursor holds the full sort key of the
+    last row (e.g. (timestamp, id)), so every page is a single index range
+    scan — no OFFSET, no duplicate handling, stable under concurrent inserts.
+
+    Views can override `keyset_ordering` (tuple of "-field"/"field").
+    Response: {"next": url | null, "results": [...]}.
+    """
+    ordering = ("-timestamp", "-id")
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, view):
+        return tuple(getattr(view, "keyset_ordering", None) or self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # ---------- Cursor encoding ----------
+    @staticmethod
+    def encode_cursor(values):
+        raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request, model, fields):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + "=" * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            if len(values) != len(fields):
+                raise ValueError
+            return [model._meta.get_field(f).to_python(v) for f, v in zip(fields, values)]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    @staticmethod
+    def keyset_filter(ordering, values):
+        """
+        Rows strictly after `values` in `ordering`:
+        (a, b) > (va, vb)  ==  a > va OR (a = va AND b > vb)
+        """
+        condition = Q()
+        for i, (term, value) in enumerate(zip(ordering, values)):
+            field = term.lstrip("-")
+            lookup = "lt" if term.startswith("-") else "gt"
+            step = Q(**{f"{field}__{lookup}": value})
+            for prev_term, prev_value in zip(ordering[:i], values[:i]):
+                step &= Q(**{prev_term.lstrip("-"): prev_value})
+            condition |= step
+
+        # Redundant bound on the leading column so the planner can use a range scan
+        first, first_value = ordering[0], values[0]
+        bound = "lte" if first.startswith("-") else "gte"
+        return Q(**{f"{first.lstrip('-')}__{bound}": first_value}) & condition
+
+    # ---------- Pagination ----------
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(view)
+        fields = [term.lstrip("-") for term in ordering]
+        page_size = self.get_page_size(request)
+
+        after = self.decode_cursor(request, queryset.model, fields)
+        if after is not None:
+            queryset = queryset.filter(self.keyset_filter(ordering, after))
+
+        rows = list(queryset.order_by(*ordering)[: page_size + 1])
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_values = [getattr(rows[-1], f) for f in fields] if rows else None
+        return rows
+
+    def get_next_link(self):
+        if not self.has_next or self.next_values is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_values))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([("next", self.get_next_link()), ("results", data)]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class TicketTimelinePagination(KeysetCursorPagination):
+    """Ticket events in order, keyed on the per-ticket sequence number."""
+    ordering = ("seq",)
+    page_size = 100
+
+
+class UserDirectoryPagination(KeysetCursorPagination):
+    """User directory (UserViewSet list), in id order."""
+    ordering = ("id",)
+    page_size = 50
@@ -2,7 +2,8 @@
 from datetime import timedelta
 import re
 
-from django.contrib.auth import get_user_model, authenticate
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_login_failed
 from django.utils import timezone
 
 from rest_framework import serializers
@@ -12,8 +13,9 @@ from core.models import (
     UserProfile, StudentProfile, Role, Invite,
     Ticket, TicketImage, TicketResolution,
     Location, PasswordResetCode, AuditLog,
-    TicketAssignment,
+    TicketAssignment, TicketEvent,
 )
+from core.utils import otp
 
 # ✅ Always reference your custom user
 User = get_user_model()
@@ -197,21 +199,8 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
     # ---------- Features ----------
     def get_features(self, obj):
-        """Build features dynamically from profile flags"""
-        features = []
-        if getattr(obj, "can_report", False):
-            features.extend(["canReport", "myReports"])
-        if getattr(obj, "can_fix", False):
-            features.extend(["assignedTickets", "uploadProof", "updateStatus", "workHistory"])
-        if getattr(obj, "can_assign", False):
-            features.extend(["overview", "assignTickets", "reviewProof", "escalate"])
-        if getattr(obj, "can_manage_users", False):
-            features.append("manageUsers")
-        if getattr(obj, "is_admin_level", False):
-            features.extend(["reportsView", "escalate", "closeTickets"])
-        if getattr(obj, "role", None) and obj.role.name.lower() in ["super admin", "university admin"]:
-            features.extend(["systemSettings", "aiReports"])
-        return list(dict.fromkeys(features))  # deduplicate
+        """Precompiled per role (core/utils/rbac.py)"""
+        return getattr(obj, "features", [])
 
     def get_allowed_categories(self, obj):
         return obj.allowed_categories() if hasattr(obj, "allowed_categories") else []
@@ -453,6 +442,17 @@ class TicketResolutionSerializer(serializers.ModelSerializer):
         model = TicketResolution
         fields = ["id", "resolved_by", "proof_image", "resolution_note", "timestamp"]
 
+# -----------------------------
+# Ticket Event Serializer (timeline)
+# -----------------------------
+class TicketEventSerializer(serializers.ModelSerializer):
+    actor_id = serializers.IntegerField(read_only=True)
+    actor_email = serializers.CharField(source="actor.email", read_only=True, default=None)
+
+    class Meta:
+        model = TicketEvent
+        fields = ["seq", "type", "actor_id", "actor_email", "payload", "created_at"]
+
 # -----------------------------
 # Ticket Serializer
 # -----------------------------
@@ -464,6 +464,10 @@ class TicketSerializer(serializers.ModelSerializer):
     assignees = serializers.SerializerMethodField(read_only=True)
     images = TicketImageSerializer(many=True, read_only=True)
     resolutions = TicketResolutionSerializer(many=True, read_only=True)
+    sla_policy = serializers.SerializerMethodField(read_only=True)
+    sla_secondary_due_at = serializers.SerializerMethodField(read_only=True)
+    sla_admin_due_at = serializers.SerializerMethodField(read_only=True)
+    sla_breached = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
         model = Ticket
@@ -472,7 +476,8 @@ class TicketSerializer(serializers.ModelSerializer):
             "escalation_level", "reporter", "reporter_name",
             "assignments", "assignees", "location", "location_name",
             "created_at", "updated_at",
-            "images", "resolutions"
+            "images", "resolutions",
+            "sla_policy", "sla_secondary_due_at", "sla_admin_due_at", "sla_breached",
         ]
         read_only_fields = [
             "id", "reporter", "reporter_name", "assignments", "assignees",
@@ -494,6 +499,29 @@ class TicketSerializer(serializers.ModelSerializer):
         users = [assignment.user for assignment in obj.assignments.all()]
         return UserSerializer(users, many=True).data
 
+    # ⏱️ SLA (compiled policy table, no extra queries)
+    def _sla(self, obj):
+        if not hasattr(obj, "_sla_deadlines"):
+            obj._sla_deadlines = obj.sla_deadlines()
+        return obj._sla_deadlines
+
+    def get_sla_policy(self, obj):
+        return self._sla(obj).policy.name
+
+    def get_sla_secondary_due_at(self, obj):
+        due = self._sla(obj).secondary_at
+        return serializers.DateTimeField().to_representation(due) if due else None
+
+    def get_sla_admin_due_at(self, obj):
+        due = self._sla(obj).admin_at
+        return serializers.DateTimeField().to_representation(due) if due else None
+
+    def get_sla_breached(self, obj):
+        if obj.escalation_level != Ticket.Escalation.NONE:
+            return True
+        due = self._sla(obj).next_for(obj.escalation_level)
+        return obj.status not in Ticket.INACTIVE_STATUSES and due is not None and due <= timezone.now()
+
 
 
 
@@ -520,30 +548,32 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
     username_field = User.EMAIL_FIELD if hasattr(User, "EMAIL_FIELD") else "email"
 
     def validate(self, attrs):
+        """
+        One joined query (user + profile + role + permissions + student
+        profile) and exactly one password hash. Same checks as
+        authenticate() with ModelBackend: wrong password or inactive
+        account → user_login_failed + the same generic error.
+        """
         email, password = attrs.get("email"), attrs.get("password")
         if not email or not password:
             raise serializers.ValidationError("Email and password required")
+        request = self.context.get("request")
 
-        try:
-            user = User.objects.get(email=email)
-        except User.DoesNotExist:
-            raise serializers.ValidationError("Invalid email or password")
-
-        user = authenticate(
-            request=self.context.get("request"),
-            username=user.email,
-            password=password,
+        user = (
+            User.objects.select_related("profile__role__permissions", "profile__student_profile")
+            .filter(email=email)
+            .first()
         )
-        if not user:
+        if user is None:
+            User().set_password(password)  # hash anyway: an unknown email must take as long as a wrong password
+        if user is None or not user.check_password(password) or not user.is_active:
+            # Report the failure like authenticate() would (audit + anomaly detector)
+            user_login_failed.send(sender=__name__, credentials={"email": email}, request=request)
             raise serializers.ValidationError("Invalid email or password")
-        if not user.is_active:
-            raise serializers.ValidationError("Account is inactive. Verify email first.")
+        self.user = user
 
-        # Call parent validation
-        data = super().validate({
-            self.username_field: getattr(user, self.username_field),
-            "password": password,
-        })
+        refresh = self.get_token(user)
+        data = {"refresh": str(refresh), "access": str(refresh.access_token)}
 
         # ✅ Add safe user info
         data["email"] = user.email
@@ -569,9 +599,11 @@ class EmailTokenObtainPairSerializer(TokenObtainPairSerializer):
                 user.profile.role.name if user.profile.role else None
             )  # always string or None
             token["is_email_verified"] = user.profile.is_email_verified
+            token["perm"] = user.profile.perm_mask  # Permission.Bit flags, as of issuing
         else:
             token["role"] = None
             token["is_email_verified"] = False
+            token["perm"] = 0
 
         return token
 
@@ -606,15 +638,17 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
         except User.DoesNotExist:
             raise serializers.ValidationError({"email": "No account found."})
 
-        try:
-            reset_code = PasswordResetCode.objects.filter(
-                user=user, code=code, is_used=False
-            ).latest("created_at")
-        except PasswordResetCode.DoesNotExist:
+        reset_code = PasswordResetCode.objects.filter(user=user, is_used=False).order_by("-created_at").first()
+        if reset_code is None:
             raise serializers.ValidationError({"code": "Invalid or used code."})
 
-        if reset_code.is_expired():
+        verdict = reset_code.verify_code(code)
+        if verdict is otp.Verdict.EXPIRED:
             raise serializers.ValidationError({"code": "This code has expired."})
+        if verdict is otp.Verdict.LOCKED:
+            raise serializers.ValidationError({"code": "Too many attempts, request a new code."})
+        if verdict is not otp.Verdict.OK:
+            raise serializers.ValidationError({"code": "Invalid or used code."})
 
         attrs["user"], attrs["reset_code"] = user, reset_code
         return attrs
@@ -625,16 +659,19 @@ class PasswordResetConfirmSerializer(serializers.Serializer):
             self.validated_data["reset_code"],
             self.validated_data["new_password"],
         )
+        if not reset_code.mark_used():
+            raise serializers.ValidationError({"code": "Invalid or used code."})
         user.set_password(new_password)
         user.save()
-        reset_code.mark_used()
         return user
 
 
 # ==================== Audit Logs ====================
 class AuditLogSerializer(serializers.ModelSerializer):
     performed_by = UserSerializer(read_only=True)
+    user_agent = serializers.CharField(source="user_agent.user_agent", read_only=True, default=None)
+    details = serializers.CharField(source="rendered_details", read_only=True)  # template filled from extra
 
     class Meta:
         model = AuditLog
-        fields = ["id", "action", "performed_by", "timestamp", "details"]
+        fields = ["id", "action", "performed_by", "timestamp", "details", "ip_address", "user_agent", "extra"]
@@ -3,11 +3,14 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
-from django.contrib.auth.models import update_last_login
 
 # ✅ Import models directly without circular import
-from core.models import Ticket, TicketAssignment, TicketResolution, UserProfile, AuditLog, Role
+from core.models import (
+    Ticket, TicketAssignment, TicketResolution, TicketEvent, UserProfile, AuditLog, Role, Permission,
+    BusinessCalendar, Holiday, SLAPolicy, DomainRoleMapping, StudentProfile,
+)
 from core.utils.audit import create_audit
+from core.utils import auth_cache, domain_roles, last_login, login_anomaly, sla
 
 User = get_user_model()
 
@@ -16,8 +19,8 @@ User = get_user_model()
 # 🛠 Utility
 # =====================================================
 def get_remote_ip(request):
-    """Safely extract remote IP address from request"""
-    return getattr(request, "META", {}).get("REMOTE_ADDR", "unknown IP")
+    """Safely extract remote IP address from request (None if unknown)"""
+    return getattr(request, "META", {}).get("REMOTE_ADDR") or None
 
 
 # =====================================================
@@ -31,7 +34,9 @@ def log_ticket_events(sender, instance, created, **kwargs):
         create_audit(
             AuditLog.Action.TICKET_CREATED,
             performed_by=performed_by or instance.reporter,
-            details=f"Ticket #{instance.id} created with category {instance.category}.",
+            target_ticket=instance,
+            details="Ticket #{ticket} created with category {category}.",
+            extra={"category": instance.category},
         )
     else:
         if instance.has_changed("status"):
@@ -44,13 +49,17 @@ def log_ticket_events(sender, instance, created, **kwargs):
             create_audit(
                 action,
                 performed_by=performed_by,
-                details=f"Ticket #{instance.id} status changed to {instance.status}.",
+                target_ticket=instance,
+                details="Ticket #{ticket} status changed to {status}.",
+                extra={"status": instance.status},
             )
         elif instance.has_changed("escalation_level"):
             create_audit(
                 AuditLog.Action.TICKET_ESCALATED,
                 performed_by=performed_by,
-                details=f"Ticket #{instance.id} escalated to {instance.escalation_level}.",
+                target_ticket=instance,
+                details="Ticket #{ticket} escalated to {escalation_level}.",
+                extra={"escalation_level": instance.escalation_level},
             )
 
 
@@ -63,14 +72,18 @@ def log_ticket_assignment(sender, instance, created, **kwargs):
             AuditLog.Action.TICKET_ASSIGNED,
             performed_by=performed_by,
             target_user=instance.user,
-            details=f"Ticket #{instance.ticket.id} assigned to {instance.user.email}.",
+            target_ticket=instance.ticket,
+            details="Ticket #{ticket} assigned to {email}.",
+            extra={"email": instance.user.email},
         )
     elif instance.accepted and instance.accepted_at:
         create_audit(
             AuditLog.Action.TICKET_ACCEPTED,
             performed_by=performed_by or instance.user,
             target_user=instance.user,
-            details=f"{instance.user.email} accepted Ticket #{instance.ticket.id}.",
+            target_ticket=instance.ticket,
+            details="{email} accepted Ticket #{ticket}.",
+            extra={"email": instance.user.email},
         )
 
 
@@ -81,7 +94,9 @@ def log_ticket_unassignment(sender, instance, **kwargs):
         AuditLog.Action.TICKET_UNASSIGNED,
         performed_by=performed_by,
         target_user=instance.user,
-        details=f"Ticket #{instance.ticket.id} unassigned from {instance.user.email}.",
+        target_ticket=instance.ticket,
+        details="Ticket #{ticket} unassigned from {email}.",
+        extra={"email": instance.user.email},
     )
 
 
@@ -102,10 +117,104 @@ def log_ticket_resolution(sender, instance, created, **kwargs):
             performed_by=instance.resolved_by,
             target_user=instance.resolved_by,
             target_ticket=instance.ticket,
-            details=f"Ticket #{instance.ticket.id} resolved by {instance.resolved_by.email}.",
+            details="Ticket #{ticket} resolved by {email}.",
+            extra={"email": instance.resolved_by.email},
         )
 
 
+# =====================================================
+# 🧾 Ticket timeline events
+# =====================================================
+@receiver(post_save, sender=Ticket)
+def record_ticket_events(sender, instance, created, **kwargs):
+    actor = getattr(instance, "_performed_by", None)
+
+    if created:
+        TicketEvent.objects.append(
+            instance,
+            TicketEvent.Type.CREATED,
+            actor=actor or instance.reporter,
+            status=instance.status,
+            category=instance.category,
+            urgency=instance.urgency,
+        )
+        return
+
+    if instance.has_changed("status"):
+        TicketEvent.objects.append(
+            instance,
+            TicketEvent.Type.STATUS_CHANGED,
+            actor=actor,
+            **{"from": instance._original_status, "to": instance.status},
+        )
+    if instance.has_changed("escalation_level"):
+        TicketEvent.objects.append(
+            instance,
+            TicketEvent.Type.ESCALATED,
+            actor=actor,
+            **{"from": instance._original_escalation_level, "to": instance.escalation_level},
+        )
+
+
+@receiver(post_save, sender=TicketAssignment)
+def record_assignment_events(sender, instance, created, **kwargs):
+    actor = getattr(instance, "_performed_by", None)
+
+    if created:
+        TicketEvent.objects.append(
+            instance.ticket_id, TicketEvent.Type.ASSIGNED, actor=actor, user_id=instance.user_id
+        )
+    elif instance.accepted and instance.accepted_at and "accepted" in (kwargs.get("update_fields") or {"accepted"}):
+        TicketEvent.objects.append(
+            instance.ticket_id, TicketEvent.Type.ACCEPTED, actor=actor or instance.user, user_id=instance.user_id
+        )
+
+
+@receiver(post_delete, sender=TicketAssignment)
+def record_unassignment_event(sender, instance, origin=None, **kwargs):
+    # Assignments removed because the ticket itself is being deleted aren't timeline events
+    if getattr(origin, "model", type(origin)) is Ticket:
+        return
+    TicketEvent.objects.append(
+        instance.ticket_id,
+        TicketEvent.Type.UNASSIGNED,
+        actor=getattr(instance, "_performed_by", None),
+        user_id=instance.user_id,
+    )
+
+
+@receiver(post_save, sender=TicketResolution)
+def record_resolution_event(sender, instance, created, **kwargs):
+    if created:
+        TicketEvent.objects.append(
+            instance.ticket_id,
+            TicketEvent.Type.RESOLVED,
+            actor=instance.resolved_by,
+            resolution_id=instance.id,
+        )
+
+
+# =====================================================
+# ⏱️ SLA rule changes
+# =====================================================
+@receiver([post_save, post_delete], sender=SLAPolicy)
+@receiver([post_save, post_delete], sender=BusinessCalendar)
+@receiver([post_save, post_delete], sender=Holiday)
+def invalidate_sla_rules(sender, **kwargs):
+    # Workers recompile on their next lookup; check_escalation then reschedules open tickets
+    sla.invalidate()
+
+
+# =====================================================
+# 🌐 Domain → role mappings
+# =====================================================
+@receiver([post_save, post_delete], sender=DomainRoleMapping)
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_domain_roles(sender, **kwargs):
+    # Every worker reloads the domain trie (and the Role values it hands out) on its next lookup
+    domain_roles.invalidate()
+
+
 # =====================================================
 # 👤 User & Profile signals
 # =====================================================
@@ -137,24 +246,58 @@ def create_user_profile(sender, instance, created, **kwargs):
             AuditLog.Action.USER_PROFILE_CREATED,
             performed_by=instance,
             target_user=instance,
-            details=f"UserProfile created for {instance.email} with role {profile.role.name}.",
+            details="UserProfile created for {email} with role {role}.",
+            extra={"email": instance.email, "role": profile.role.name},
         )
 
 
+@receiver([post_save, post_delete], sender=User)
+def invalidate_cached_user(sender, instance, update_fields=None, **kwargs):
+    """Cached auth snapshots (core/utils/auth_cache.py) leave out last_login."""
+    if update_fields and set(update_fields) <= auth_cache.USER_DEFERRED_FIELDS:
+        return
+    auth_cache.invalidate_user(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=UserProfile)
+def invalidate_cached_profile(sender, instance, **kwargs):
+    auth_cache.invalidate_user(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=StudentProfile)
+def invalidate_cached_student_profile(sender, instance, **kwargs):
+    """The /auth/profile/ payload includes the student profile."""
+    user_id = UserProfile.objects.filter(pk=instance.user_profile_id).values_list("user_id", flat=True).first()
+    if user_id is not None:  # None: deleted with its profile, which bumps the stamp itself
+        auth_cache.invalidate_user(user_id)
+
+
+@receiver([post_save, post_delete], sender=Role)
+@receiver([post_save, post_delete], sender=Permission)
+def invalidate_cached_roles(sender, **kwargs):
+    auth_cache.invalidate_roles()
+
+
 # =====================================================
 # 🔐 Auth signals
 # =====================================================
+# Replaces django.contrib.auth's own update_last_login receiver (a synchronous UPDATE per login)
+user_logged_in.disconnect(dispatch_uid="update_last_login")
+
+
 @receiver(user_logged_in)
 def log_user_login(sender, request, user, **kwargs):
     """Log login and update last_login field"""
-    # ✅ Update last_login timestamp
-    update_last_login(sender, user)
+    # ✅ Buffer the last_login timestamp (written in batches)
+    last_login.record(user)
 
     # ✅ Audit logging
     create_audit(
         AuditLog.Action.LOGIN,
         performed_by=user,
-        details=f"User {user.email} logged in from {get_remote_ip(request)}.",
+        details="User {email} logged in.",
+        extra={"email": user.email},
+        request=request,
     )
 
 
@@ -163,7 +306,8 @@ def log_user_logout(sender, request, user, **kwargs):
     create_audit(
         AuditLog.Action.LOGOUT,
         performed_by=user,
-        details=f"User {user.email} logged out.",
+        details="User {email} logged out.",
+        extra={"email": user.email},
     )
 
 
@@ -172,5 +316,9 @@ def log_user_login_failed(sender, credentials, request, **kwargs):
     email = credentials.get("email") or credentials.get("username")
     create_audit(
         AuditLog.Action.LOGIN_FAILED,
-        details=f"Failed login attempt for {email} from {get_remote_ip(request)}.",
+        details="Failed login attempt for {email}.",
+        request=request,
+        extra={"email": email},
     )
+    # 🚨 Streaming burst detection (in memory, never reads AuditLog)
+    login_anomaly.record_failure(ip=get_remote_ip(request), email=email)
@@ -2,78 +2,163 @@
 from celery import shared_task
 from django.utils import timezone
 from django.conf import settings
-from core.models import Ticket, create_audit, AuditLog, PasswordResetCode
+from core.models import PasswordResetCode
+from core.utils import audit_archive, audit_partitions, escalation, last_login, locks, outbox, purge
 from datetime import timedelta
 
 
+# Periodic tasks run under a lease (core/utils/locks.py): with several beat
+# schedulers or overlapping workers, only one run of each task proceeds.
 @shared_task
+@locks.single_instance()
 def check_escalation():
     """
-    Periodic Celery task to check tickets and escalate if needed.
-    Runs every hour (or as configured in Celery beat).
+    Periodic Celery task to escalate overdue tickets.
+    Runs every minute (or as configured in Celery beat); each run only
+    touches tickets whose indexed next_escalation_at has passed.
+    Deadlines come from the SLA policies; after a policy change the open
+    tickets are rescheduled first (see core/utils/escalation.py).
+    The escalation transaction is rolled back if the lease was lost meanwhile.
     """
+    escalation.reschedule_if_rules_changed()
     now = timezone.now()
-    count = 0
-
-    # ✅ Only tickets that are still active (not resolved/closed)
-    open_tickets = Ticket.objects.filter(
-        status__in=[
-            Ticket.Status.CREATED,
-            Ticket.Status.ASSIGNED,
-            Ticket.Status.IN_PROGRESS,
-            Ticket.Status.NEEDS_ASSISTANCE,
-        ]
+    summary = escalation.escalate_due_tickets(now, fence=locks.current_lease().verify)
+    return f"[Check Escalation] Completed at {now:%Y-%m-%d %H:%M}, escalated {summary['total']} tickets."
+
+
+@shared_task
+@locks.single_instance()
+def flush_last_logins():
+    """
+    Periodic Celery task to write buffered last_login times (core/utils/last_login.py).
+    Runs every minute: one batched UPDATE for all users who logged in meanwhile.
+    """
+    count = last_login.flush(fence=locks.current_lease().verify)
+    now = timezone.now()
+    return f"[Flush LastLogin] Completed at {now:%Y-%m-%d %H:%M}, updated {count} users."
+
+
+@shared_task
+def drain_email_outbox():
+    """
+    Deliver queued transactional email (core/utils/outbox.py).
+    Queued after each commit that adds email, and every minute from beat
+    for retries. Concurrent runs claim disjoint batches (SKIP LOCKED), so
+    this task is not single-instance.
+    """
+    stats = outbox.drain()
+    now = timezone.now()
+    return (
+        f"[Email Outbox] Completed at {now:%Y-%m-%d %H:%M}, sent {stats.sent}, "
+        f"retrying {stats.retried}, failed {stats.failed}."
     )
 
-    for ticket in open_tickets:
-        changed = ticket.auto_escalate(performed_by=None)  # System escalation
-        if changed:
-            # 🔔 Log escalation (system-triggered)
-            create_audit(
-                AuditLog.Action.TICKET_ESCALATED,
-                performed_by=None,  # None = System
-                details=(
-                    f"Ticket #{ticket.id} escalated automatically "
-                    f"to {ticket.escalation_level} at {now:%Y-%m-%d %H:%M}."
-                ),
-            )
-            count += 1
 
-    return f"[Check Escalation] Completed at {now:%Y-%m-%d %H:%M}, escalated {count} tickets."
+@shared_task
+@locks.single_instance()
+def cleanup_email_outbox():
+    """
+    Periodic Celery task to delete sent and failed outbox rows older than
+    EMAIL_OUTBOX_RETENTION_DAYS, in batches (core/utils/purge.py).
+    """
+    now = timezone.now()
+    result = purge.run_job("email_outbox", now, fence=locks.current_lease().verify)
+    return f"[Cleanup EmailOutbox] Completed at {now:%Y-%m-%d %H:%M}, deleted {result.deleted} emails."
 
 
 @shared_task
+@locks.single_instance()
 def cleanup_password_reset_codes():
     """
     Periodic Celery task to clean up expired/used PasswordResetCodes.
-    Runs daily (or as configured in Celery beat).
+    Runs daily (or as configured in Celery beat), in batches (core/utils/purge.py).
     """
-    count = PasswordResetCode.cleanup_expired()
+    count = PasswordResetCode.cleanup_expired(fence=locks.current_lease().verify)
     now = timezone.now()
     return f"[Cleanup PasswordResetCodes] Completed at {now:%Y-%m-%d %H:%M}, deleted {count} codes."
 
 
 @shared_task
+@locks.single_instance()
 def cleanup_audit_logs():
     """
     Periodic Celery task to clean up old AuditLogs based on retention policy.
     - Normal logs older than AUDIT_LOG_RETENTION_DAYS are deleted.
     - High-sensitivity logs older than AUDIT_LOG_RETENTION_HIGH_SENSITIVITY_DAYS are deleted.
+    On PostgreSQL the table is partitioned by month, so whole partitions are
+    detached and dropped instead of deleting row by row.
+    Otherwise rows are deleted in batches (core/utils/purge.py).
+    Rows are copied to the cold archive first when AUDIT_LOG_ARCHIVE_ENABLED.
     """
     now = timezone.now()
     normal_cutoff = now - timedelta(days=settings.AUDIT_LOG_RETENTION_DAYS)
     high_sens_cutoff = now - timedelta(days=settings.AUDIT_LOG_RETENTION_HIGH_SENSITIVITY_DAYS)
 
-    # Normal logs (exclude high-sensitivity actions)
-    normal_logs = AuditLog.objects.exclude(action__in=settings.AUDIT_LOG_HIGH_SENS_ACTIONS)
-    deleted_normal_count, _ = normal_logs.filter(timestamp__lt=normal_cutoff).delete()
+    if settings.AUDIT_LOG_ARCHIVE_ENABLED:
+        # Archive everything retention could touch (the earliest-expiring class)
+        audit_archive.archive_audit_logs(cutoff=max(normal_cutoff, high_sens_cutoff))
 
-    # High-sensitivity logs
-    high_sens_logs = AuditLog.objects.filter(action__in=settings.AUDIT_LOG_HIGH_SENS_ACTIONS)
-    deleted_high_sens_count, _ = high_sens_logs.filter(timestamp__lt=high_sens_cutoff).delete()
+    if audit_partitions.is_partitioned():
+        dropped_normal = audit_partitions.drop_partitions_before(normal_cutoff, high_sensitivity=False)
+        dropped_high_sens = audit_partitions.drop_partitions_before(high_sens_cutoff, high_sensitivity=True)
+        return (
+            f"[Cleanup AuditLogs] Completed at {now:%Y-%m-%d %H:%M}, "
+            f"dropped {len(dropped_normal)} normal partitions, "
+            f"{len(dropped_high_sens)} high-sensitivity partitions."
+        )
+
+    # Otherwise delete in primary-key batches; a run that hits the time budget resumes next time
+    fence = locks.current_lease().verify
+    normal = purge.purge("audit_logs", purge.expired_audit_logs(now, high_sensitivity=False), fence=fence)
+    high_sens = purge.purge(
+        "audit_logs_high_sensitivity", purge.expired_audit_logs(now, high_sensitivity=True), fence=fence
+    )
 
     return (
         f"[Cleanup AuditLogs] Completed at {now:%Y-%m-%d %H:%M}, "
-        f"deleted {deleted_normal_count} normal logs, "
-        f"{deleted_high_sens_count} high-sensitivity logs."
+        f"deleted {normal.deleted} normal logs, "
+        f"{high_sens.deleted} high-sensitivity logs."
     )
+
+
+@shared_task
+@locks.single_instance()
+def cleanup_revoked_tokens():
+    """
+    Periodic Celery task to compact the refresh-token revocation list:
+    a revoked token that has expired can no longer be presented.
+    """
+    now = timezone.now()
+    result = purge.run_job("revoked_tokens", now, fence=locks.current_lease().verify)
+    return f"[Cleanup RevokedTokens] Completed at {now:%Y-%m-%d %H:%M}, deleted {result.deleted} tokens."
+
+
+@shared_task
+@locks.single_instance()
+def purge_stale_accounts():
+    """
+    Periodic Celery task to delete accounts that never verified their email
+    (UNVERIFIED_ACCOUNT_RETENTION_DAYS) and unused invites that expired
+    (INVITE_RETENTION_DAYS ago). Runs daily, in batches.
+    """
+    now = timezone.now()
+    fence = locks.current_lease().verify
+    last_login.flush(now)  # buffered logins count as logins
+    accounts = purge.run_job("unverified_accounts", now, fence=fence)
+    invites = purge.run_job("expired_invites", now, fence=fence)
+    return (
+        f"[Purge Stale Accounts] Completed at {now:%Y-%m-%d %H:%M}, "
+        f"deleted {accounts.deleted} unverified accounts, {invites.deleted} expired invites."
+    )
+
+
+@shared_task
+@locks.single_instance()
+def create_audit_log_partitions():
+    """
+    Periodic Celery task to pre-create upcoming monthly AuditLog partitions.
+    Runs daily so inserts never fall through to the default partition.
+    """
+    created = audit_partitions.ensure_partitions()
+    now = timezone.now()
+    return f"[AuditLog Partitions] Completed at {now:%Y-%m-%d %H:%M}, created {len(created)} partitions."
@@ -1,3 +1,1168 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+import threading
+import time
+import warnings
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from unittest import mock, skipIf, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.signals import user_logged_in
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core.authentication import RevocableRefreshToken
+from core.checks import check_shared_cache
+from core.db_routers import AUDIT_DB_ALIAS, AuditLogRouter, audit_db_enabled, defer_audit_write
+from core.models import (
+    AuditLog, AuditUserAgent, DomainRoleMapping, EmailOutbox, Invite, Location, Permission, RevokedToken, Role, SLAPolicy,
+    Ticket, TicketAssignment, TicketEvent, UserProfile,
+)
+from core.serializers import EmailTokenObtainPairSerializer
+from core import tasks
+from core.utils import (
+    audit_archive, audit_partitions, auth_cache, domain_roles, escalation, invites, last_login, locks, login_anomaly, otp,
+    outbox, purge, rbac, revocation, roster, sla,
+)
+from core.utils.audit import create_audit
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    try:
+        import asyncore
+        import smtpd
+    except ImportError:  # removed in Python 3.12
+        smtpd = None
+
+User = get_user_model()
+
+
+# =====================================================
+# 🗄️ Audit database routing (core/db_routers.py)
+# =====================================================
+# The split-database tests run when an "audit" alias is configured, e.g.
+#   DB_NAME=fixit_db AUDIT_DB_NAME=fixit_audit python manage.py test core
+class AuditRouterTests(SimpleTestCase):
+    router = AuditLogRouter()
+
+    def test_noop_without_audit_alias(self):
+        with mock.patch("core.db_routers.audit_db_enabled", return_value=False):
+            self.assertIsNone(self.router.db_for_read(AuditLog))
+            self.assertIsNone(self.router.db_for_write(AuditUserAgent))
+            self.assertIsNone(self.router.allow_migrate("default", "core", model_name="auditlog"))
+            self.assertIsNone(self.router.allow_migrate(AUDIT_DB_ALIAS, "core", model_name="ticket"))
+
+    def test_routes_audit_models_to_audit_alias(self):
+        with mock.patch("core.db_routers.audit_db_enabled", return_value=True):
+            self.assertEqual(self.router.db_for_read(AuditLog), AUDIT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_write(AuditLog), AUDIT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_write(AuditUserAgent), AUDIT_DB_ALIAS)
+            self.assertEqual(self.router.db_for_read(Ticket), "default")
+            self.assertEqual(self.router.db_for_write(User), "default")
+
+    def test_allow_migrate_with_audit_alias(self):
+        with mock.patch("core.db_routers.audit_db_enabled", return_value=True):
+            allow = self.router.allow_migrate
+            self.assertTrue(allow(AUDIT_DB_ALIAS, "core", model_name="auditlog"))
+            self.assertTrue(allow(AUDIT_DB_ALIAS, "core", model_name="audituseragent"))
+            self.assertFalse(allow(AUDIT_DB_ALIAS, "core", model_name="ticket"))
+            self.assertFalse(allow(AUDIT_DB_ALIAS, "core"))  # data migrations without hints
+            self.assertFalse(allow(AUDIT_DB_ALIAS, "auth", model_name="group"))
+            # "default" keeps the full schema, so the historical migrations apply there unchanged
+            self.assertIsNone(allow("default", "core", model_name="auditlog"))
+            self.assertIsNone(allow("default", "core", model_name="ticket"))
+
+    def test_defer_audit_write_runs_inline_without_alias(self):
+        with mock.patch("core.db_routers.audit_db_enabled", return_value=False):
+            self.assertEqual(defer_audit_write(lambda: "written"), "written")
+
+
+@skipUnless(audit_db_enabled(), "no 'audit' database configured (set AUDIT_DB_NAME)")
+class AuditDatabaseTests(TestCase):
+    databases = "__all__"  # "default" and "audit"; a set naming "audit" breaks runs without the alias
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="auditor", email="auditor@uni.edu", password="x")
+
+    def test_audit_rows_are_read_and_written_on_audit_alias(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_audit("Login", self.user, self.user, details="routed")
+        self.assertEqual(AuditLog.objects.all().db, AUDIT_DB_ALIAS)
+        self.assertTrue(AuditLog.objects.using(AUDIT_DB_ALIAS).filter(details="routed").exists())
+        self.assertFalse(AuditLog.objects.using("default").filter(details="routed").exists())
+
+    def test_write_runs_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.assertIsNone(create_audit("Login", self.user, self.user, details="deferred"))
+        self.assertFalse(AuditLog.objects.filter(details="deferred").exists())
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertTrue(AuditLog.objects.filter(details="deferred").exists())
+
+    def test_write_is_dropped_on_rollback(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with transaction.atomic():
+                create_audit("Login", self.user, self.user, details="rolled back")
+                transaction.set_rollback(True)
+        self.assertEqual(callbacks, [])
+        self.assertFalse(AuditLog.objects.filter(details="rolled back").exists())
+
+    def test_migrate_audit_database(self):
+        # The test databases were built by migrate; the audit one must be up to date with audit tables only
+        call_command("migrate", database=AUDIT_DB_ALIAS, check_unapplied=True, verbosity=0)
+        audit_tables = set(connections[AUDIT_DB_ALIAS].introspection.table_names())
+        self.assertTrue({"core_auditlog", "core_audituseragent"} <= audit_tables)
+        self.assertFalse({"core_customuser", "core_ticket", "core_invite"} & audit_tables)
+        self.assertIn("core_customuser", connections["default"].introspection.table_names())
+
+        connection = connections[AUDIT_DB_ALIAS]
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, "core_auditlog")
+        self.assertFalse([name for name, c in constraints.items() if c["foreign_key"]])
+
+    def test_deleting_user_keeps_audit_reference(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_audit("Login", self.user, self.user, details="kept")
+        user_id = self.user.pk
+        self.user.delete()
+        self.assertEqual(AuditLog.objects.get(details="kept").performed_by_id, user_id)
+
+
+@skipIf(audit_db_enabled(), "audit rows live in their own database")
+class SingleDatabaseAuditTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="auditor", email="auditor@uni.edu", password="x")
+
+    def test_write_is_immediate(self):
+        log = create_audit("Login", self.user, self.user, details="inline")
+        self.assertIsNotNone(log)
+        self.assertEqual(AuditLog.objects.all().db, "default")
+
+    def test_deleting_user_nulls_audit_reference(self):
+        create_audit("Login", self.user, self.user, details="nulled")
+        self.user.delete()
+        log = AuditLog.objects.get(details="nulled")
+        self.assertIsNone(log.performed_by_id)
+        self.assertIsNone(log.target_user_id)
+
+
+# =====================================================
+# 🔎 Structured audit metadata
+# =====================================================
+class AuditMetadataTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        AuditUserAgent.objects._cache.clear()
+        self.addCleanup(AuditUserAgent.objects._cache.clear)
+
+    def test_user_agent_cached_only_after_commit(self):
+        ua_hash = AuditUserAgent.objects.hash_user_agent("Mozilla/5.0 (rolled back)")
+        with transaction.atomic(using=router.db_for_write(AuditUserAgent)):
+            AuditUserAgent.objects.intern("Mozilla/5.0 (rolled back)")
+            transaction.set_rollback(True, using=router.db_for_write(AuditUserAgent))
+        self.assertNotIn(ua_hash, AuditUserAgent.objects._cache)
+        self.assertFalse(AuditUserAgent.objects.filter(ua_hash=ua_hash).exists())
+
+        with self.captureOnCommitCallbacks(using=router.db_for_write(AuditUserAgent), execute=True):
+            ua_id = AuditUserAgent.objects.intern("Mozilla/5.0 (committed)")
+        self.assertEqual(AuditUserAgent.objects.intern("Mozilla/5.0 (committed)"), ua_id)
+        self.assertEqual(list(AuditUserAgent.objects._cache.values()), [ua_id])
+
+    def test_callers_store_values_in_extra(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.create_user(username="ana", email="ana@uni.edu", password="x")
+        log = AuditLog.objects.filter(action=AuditLog.Action.USER_PROFILE_CREATED).latest("timestamp")
+        self.assertEqual(log.extra, {"email": "ana@uni.edu", "role": "Student"})
+        self.assertTrue(AuditLog.objects.filter(extra__email="ana@uni.edu").exists())
+
+    def test_details_are_templates_filled_on_read(self):
+        admin = User.objects.create_superuser(username="admin", email="admin@uni.edu", password="x")
+        with self.captureOnCommitCallbacks(execute=True):
+            create_audit("Login Failed", details="Failed login attempt for {email}", extra={"email": "ana@uni.edu"})
+            create_audit("Login", admin, admin, details="Legacy text with {braces} and {email}")
+        log = AuditLog.objects.get(action="Login Failed", extra__email="ana@uni.edu")
+        self.assertEqual(log.details, "Failed login attempt for {email}")  # the email is stored once
+
+        client = APIClient()
+        client.force_authenticate(admin)
+        rendered = {row["action"]: row["details"] for row in client.get("/api/audit-logs/", {"action": "Login Failed,Login"}).json()["results"]}
+        self.assertEqual(rendered["Login Failed"], "Failed login attempt for ana@uni.edu")
+        self.assertEqual(rendered["Login"], "Legacy text with {braces} and {email}")  # unknown names are kept
+        exported = client.get("/api/audit-logs/export/", {"action": "Login Failed"})
+        self.assertIn(b'"details":"Failed login attempt for ana@uni.edu"', b"".join(exported.streaming_content))
+
+
+# =====================================================
+# 🎫 Ticket audit trail (core/signals.py)
+# =====================================================
+@mock.patch("core.utils.outbox.kick")
+class TicketAuditTests(TestCase):
+    databases = "__all__"
+
+    def test_ticket_audit_rows_reference_the_ticket(self, kick):
+        reporter = User.objects.create_user(username="ana", email="ana@uni.edu", password="x")
+        fixer = User.objects.create_user(username="jan", email="jan@uni.edu", password="x")
+        fixer.profile.role = Role.objects.get(name="Janitorial Staff")
+        fixer.profile.save()
+        location = Location.objects.create(building_name="Main", floor_number="1", room_identifier="101")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = Ticket.objects.create(
+                reporter=reporter, location=location, title="Spill", description="Hallway", category=Ticket.Category.CLEANING,
+            )
+            assignment = TicketAssignment.objects.create(ticket=ticket, user=fixer)
+            ticket.status = Ticket.Status.IN_PROGRESS
+            ticket.save()
+            assignment.delete()
+
+        actions = [
+            AuditLog.Action.TICKET_CREATED, AuditLog.Action.TICKET_ASSIGNED,
+            AuditLog.Action.TICKET_UPDATED, AuditLog.Action.TICKET_UNASSIGNED,
+        ]
+        self.assertEqual(set(AuditLog.objects.filter(target_ticket=ticket).values_list("action", flat=True)), set(actions))
+        self.assertFalse(AuditLog.objects.filter(action__in=actions, target_ticket__isnull=True).exists())
+        self.assertFalse(AuditLog.objects.filter(extra__has_key="ticket").exists())  # the id is in target_ticket
+
+
+# =====================================================
+# 🗂️ Audit partitions (core/utils/audit_partitions.py)
+# =====================================================
+def _utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+@skipUnless(connections[router.db_for_write(AuditLog)].vendor == "postgresql", "core_auditlog is partitioned on PostgreSQL only")
+class AuditPartitionTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.connection = connections[router.db_for_write(AuditLog)]
+        self.assertTrue(audit_partitions.is_partitioned(self.connection))
+
+    def _log(self, timestamp, action="Login"):
+        return AuditLog.objects.create(action=action, details="partition test", timestamp=timestamp)
+
+    def _table_of(self, log) -> str:
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT tableoid::regclass::text FROM core_auditlog WHERE id = %s', [log.pk])
+            return cursor.fetchone()[0]
+
+    def test_create_month_partition_moves_rows_out_of_default(self):
+        early, late, next_month = self._log(_utc(2100, 1, 1)), self._log(_utc(2100, 1, 31, 23, 59)), self._log(_utc(2100, 2, 1))
+        self.assertEqual(self._table_of(early), "core_auditlog_std_default")
+
+        self.assertTrue(audit_partitions.create_month_partition(False, _utc(2100, 1, 15), self.connection))
+        self.assertEqual(self._table_of(early), "core_auditlog_std_p210001")
+        self.assertEqual(self._table_of(late), "core_auditlog_std_p210001")
+        self.assertEqual(self._table_of(next_month), "core_auditlog_std_default")
+        self.assertFalse(audit_partitions.create_month_partition(False, _utc(2100, 1, 1), self.connection))
+        self.assertIn(
+            audit_partitions.MonthPartition("core_auditlog_std_p210001", _utc(2100, 1, 1), _utc(2100, 2, 1)),
+            audit_partitions.list_partitions(False, self.connection),
+        )
+
+    def test_drop_partitions_before(self):
+        for start in (_utc(2001, 1, 1), _utc(2001, 2, 1)):
+            audit_partitions.create_month_partition(False, start, self.connection)
+        january, february = self._log(_utc(2001, 1, 10)), self._log(_utc(2001, 2, 10))
+        straggler = self._log(_utc(2000, 6, 1))  # no partition for that month: default
+        high_sensitivity = self._log(_utc(2000, 6, 1), action="Ticket Closed")
+        self.assertTrue(high_sensitivity.high_sensitivity)
+        with self.connection.cursor() as cursor:
+            # Run the deferred FK checks of the rows above now: the test transaction is still open
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        dropped = audit_partitions.drop_partitions_before(_utc(2001, 2, 20), high_sensitivity=False)
+        self.assertEqual(dropped, ["core_auditlog_std_p200101"])  # February is not wholly past the cutoff
+        self.assertEqual(
+            set(AuditLog.objects.filter(pk__in=[january.pk, february.pk, straggler.pk, high_sensitivity.pk]).values_list("pk", flat=True)),
+            {february.pk, high_sensitivity.pk},
+        )
+        self.assertNotIn("core_auditlog_std_p200101", [p.name for p in audit_partitions.list_partitions(False, self.connection)])
+
+
+# =====================================================
+# 📦 Audit archive (core/utils/audit_archive.py)
+# =====================================================
+@override_settings(AUDIT_LOG_ARCHIVE_COMPRESSION="gzip")
+class AuditArchiveTests(TestCase):
+    databases = "__all__"
+    cutoff = _utc(2020, 3, 3)
+
+    def setUp(self):
+        archive = tempfile.TemporaryDirectory()
+        self.addCleanup(archive.cleanup)
+        self.root = Path(archive.name)
+
+    def _log(self, timestamp, action="Login", **fields):
+        return AuditLog.objects.create(action=action, details="User {email} logged in.", timestamp=timestamp, **fields)
+
+    def test_round_trip_and_watermark(self):
+        ua_id = AuditUserAgent.objects.intern("Mozilla/5.0 (archive)")
+        first = self._log(_utc(2020, 3, 1, 10), extra={"email": "ana@uni.edu"}, ip_address="10.0.0.1", user_agent_id=ua_id)
+        second = self._log(_utc(2020, 3, 1, 11), action="Logout")
+        third = self._log(_utc(2020, 3, 2, 9))
+        self._log(self.cutoff)  # not older than the cutoff
+
+        summary = audit_archive.archive_audit_logs(self.cutoff, directory=self.root)
+        self.assertEqual(summary["rows"], 3)
+        self.assertEqual([Path(f).parent.as_posix() for f in summary["files"]], ["2020/03", "2020/03"])
+        self.assertTrue(Path(summary["files"][0]).name.startswith("auditlog-2020-03-01-"))
+        self.assertTrue(Path(summary["files"][1]).name.startswith("auditlog-2020-03-02-"))
+        watermark = {"timestamp": third.timestamp.isoformat(), "id": third.pk}
+        self.assertEqual(summary["watermark"], watermark)
+        self.assertEqual(audit_archive.read_manifest(self.root), {"watermark": watermark})
+
+        index = json.loads((self.root / (summary["files"][0] + ".idx.json")).read_text())
+        self.assertEqual((index["count"], index["actions"]), (2, {"Login": 1, "Logout": 1}))
+        self.assertEqual(index["first"], first.timestamp.isoformat())
+
+        rows = list(audit_archive.iter_archived_logs(directory=self.root))
+        self.assertEqual([row["id"] for row in rows], [first.pk, second.pk, third.pk])
+        self.assertEqual(
+            {k: rows[0][k] for k in ("details", "extra", "ip_address", "ua", "high_sensitivity")},
+            {"details": "User {email} logged in.", "extra": {"email": "ana@uni.edu"}, "ip_address": "10.0.0.1",
+             "ua": "Mozilla/5.0 (archive)", "high_sensitivity": False},
+        )
+        logouts = audit_archive.iter_archived_logs(_utc(2020, 3, 1), _utc(2020, 3, 2), actions=["Logout"], directory=self.root)
+        self.assertEqual([row["id"] for row in logouts], [second.pk])
+        day_two = list(audit_archive.iter_archive_indexes(start=_utc(2020, 3, 2), directory=self.root))
+        self.assertEqual([index["count"] for _, index in day_two], [1])  # the March 1 file is skipped on its index
+
+        # Incremental: nothing new, then only the row past the watermark
+        self.assertEqual(audit_archive.archive_audit_logs(self.cutoff, directory=self.root)["rows"], 0)
+        late = self._log(_utc(2020, 3, 2, 12))
+        summary = audit_archive.archive_audit_logs(self.cutoff, directory=self.root)
+        self.assertEqual(summary["rows"], 1)
+        self.assertEqual(summary["watermark"], {"timestamp": late.timestamp.isoformat(), "id": late.pk})
+        rows = list(audit_archive.iter_archived_logs(directory=self.root))
+        self.assertEqual(sorted(row["id"] for row in rows), [first.pk, second.pk, third.pk, late.pk])
+
+
+# =====================================================
+# 🗃️ Audit retention (tasks.cleanup_audit_logs)
+# =====================================================
+@override_settings(PURGE_BATCH_SLEEP_SECONDS=0, AUDIT_LOG_ARCHIVE_ENABLED=True)
+class AuditRetentionTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        archive = tempfile.TemporaryDirectory()
+        self.addCleanup(archive.cleanup)
+        self.archive_dir = archive.name
+        self.user = User.objects.create_user(username="auditor", email="auditor@uni.edu", password="x")
+
+    def test_purge_command_leaves_audit_logs_to_the_archiving_task(self):
+        self.assertFalse({"audit_logs", "audit_logs_high_sensitivity"} & set(purge.JOBS))
+        with self.assertRaisesMessage(CommandError, "cleanup_audit_logs"):
+            call_command("purge", "audit_logs", stdout=io.StringIO())
+
+    def test_cleanup_archives_before_deleting(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            create_audit("Login", self.user, self.user, details="expired")
+            create_audit("Login", self.user, self.user, details="recent")
+        expired_at = timezone.now() - timedelta(days=settings.AUDIT_LOG_RETENTION_DAYS + 40)
+        AuditLog.objects.filter(details="expired").update(timestamp=expired_at)
+
+        with override_settings(AUDIT_LOG_ARCHIVE_DIR=self.archive_dir):
+            tasks.cleanup_audit_logs()
+        self.assertFalse(AuditLog.objects.filter(details="expired").exists())
+        self.assertTrue(AuditLog.objects.filter(details="recent").exists())
+        archived = list(audit_archive.iter_archived_logs(directory=self.archive_dir))
+        self.assertEqual([row["details"] for row in archived], ["expired"])
+
+
+# =====================================================
+# 🎓 Roster sync (core/utils/roster.py)
+# =====================================================
+@override_settings(PURGE_BATCH_SLEEP_SECONDS=0)
+class RosterSyncTests(TestCase):
+    def test_roster_accounts_survive_unverified_account_purge(self):
+        csv_file = io.StringIO("student_id,email,first_name\n21-0001-000001,ana@uni.edu,Ana\n")
+        self.assertEqual(roster.sync(csv_file).created, 1)
+        self_registered = User.objects.create_user(username="walkin", email="walkin@uni.edu", password="x")
+
+        later = timezone.now() + timedelta(days=settings.UNVERIFIED_ACCOUNT_RETENTION_DAYS + 1)
+        purge.run_job("unverified_accounts", now=later)
+
+        student = User.objects.get(email="ana@uni.edu")  # never logged in, but provisioned by the registrar
+        self.assertTrue(student.profile.is_email_verified)
+        self.assertFalse(User.objects.filter(pk=self_registered.pk).exists())
+
+
+# =====================================================
+# 📧 Email outbox (core/utils/outbox.py)
+# =====================================================
+@mock.patch("core.utils.outbox.kick")
+class EmailOutboxTests(TestCase):
+    def test_duplicate_messages_are_stored_once(self, kick):
+        outbox.enqueue("ana@uni.edu", "Code", "123456", kind="otp")
+        outbox.enqueue("ana@uni.edu", "Code", "123456", kind="otp")  # retried request
+        outbox.enqueue("ana@uni.edu", "Code", "654321", kind="otp")
+        self.assertEqual(EmailOutbox.objects.count(), 2)
+
+    def test_one_drain_per_transaction(self, kick):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                for i in range(3):
+                    outbox.enqueue(f"user{i}@uni.edu", "Invite", "Join us")
+        kick.assert_called_once()
+
+    def test_rollback_sends_nothing(self, kick):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                outbox.enqueue("ana@uni.edu", "Code", "123456")
+                transaction.set_rollback(True)
+        kick.assert_not_called()
+        self.assertFalse(EmailOutbox.objects.exists())
+        outbox.drain()
+        self.assertEqual(mail.outbox, [])
+
+    def test_drain_sends_and_marks_sent(self, kick):
+        outbox.enqueue("ana@uni.edu", "Code", "123456")
+        stats = outbox.drain()
+        self.assertEqual((stats.sent, stats.batches), (1, 1))
+        self.assertEqual([m.to for m in mail.outbox], [["ana@uni.edu"]])
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts), (EmailOutbox.Status.SENT, 1))
+        self.assertEqual(outbox.drain().sent, 0)  # not sent twice
+
+
+if smtpd is not None:
+    class _SMTPServer(smtpd.SMTPServer):
+        """Local SMTP server: counts sessions, answers `replies[recipient]` to DATA."""
+
+        def __init__(self):
+            super().__init__(("127.0.0.1", 0), None, decode_data=True)
+            self.port = self.socket.getsockname()[1]
+            self.sessions, self.received, self.replies = 0, [], {}
+
+        def handle_accepted(self, conn, addr):
+            self.sessions += 1
+            super().handle_accepted(conn, addr)
+
+        def process_message(self, peer, mailfrom, rcpttos, data, **kwargs):
+            for rcpt in rcpttos:
+                if rcpt in self.replies:
+                    return self.replies[rcpt]
+            self.received.extend(rcpttos)
+
+
+@skipUnless(smtpd is not None, "needs the stdlib smtpd module (Python < 3.12)")
+@mock.patch("core.utils.outbox.kick")
+class EmailOutboxSMTPTests(TestCase):
+    def setUp(self):
+        self.server = _SMTPServer()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+        smtp = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1",
+            EMAIL_PORT=self.server.port,
+            EMAIL_HOST_USER="",
+            EMAIL_HOST_PASSWORD="",
+            EMAIL_USE_TLS=False,
+            EMAIL_USE_SSL=False,
+        )
+        smtp.enable()
+        self.addCleanup(smtp.disable)
+        self.addCleanup(self._stop)
+
+    def _serve(self):
+        while not self.stopped.is_set():
+            asyncore.loop(timeout=0.01, count=1)
+
+    def _stop(self):
+        self.stopped.set()
+        self.thread.join()
+        asyncore.close_all()
+
+    def _enqueue(self, *recipients):
+        outbox.enqueue_many([outbox.message(to, "Invite", "Join us") for to in recipients])
+
+    def test_batch_uses_one_session(self, kick):
+        recipients = [f"user{i}@uni.edu" for i in range(5)]
+        self._enqueue(*recipients)
+        stats = outbox.drain(batch_size=5)
+        self.assertEqual((stats.sent, stats.batches), (5, 1))
+        self.assertEqual(self.server.sessions, 1)
+        self.assertEqual(sorted(self.server.received), recipients)
+
+    def test_permanent_error_fails_at_once(self, kick):
+        self.server.replies["gone@uni.edu"] = "550 No such mailbox"
+        self._enqueue("gone@uni.edu", "ana@uni.edu")
+        stats = outbox.drain()
+        self.assertEqual((stats.sent, stats.failed, stats.retried), (1, 1, 0))
+        row = EmailOutbox.objects.get(to_email="gone@uni.edu")
+        self.assertEqual((row.status, row.attempts), (EmailOutbox.Status.FAILED, 1))
+        self.assertIn("550", row.last_error)
+
+    def test_transient_error_backs_off(self, kick):
+        self.server.replies["busy@uni.edu"] = "451 Try again later"
+        self._enqueue("busy@uni.edu")
+        before = timezone.now()
+        stats = outbox.drain()
+        self.assertEqual((stats.sent, stats.retried), (0, 1))
+        row = EmailOutbox.objects.get()
+        self.assertEqual((row.status, row.attempts), (EmailOutbox.Status.PENDING, 1))
+        self.assertGreaterEqual(row.next_attempt_at, before + timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS))
+        self.assertEqual(outbox.drain().batches, 0)  # not due yet
+
+    def test_server_down_uses_no_attempt(self, kick):
+        self._enqueue("ana@uni.edu", "ben@uni.edu")
+        self._stop()
+        self.server.close()  # port refuses connections now
+        stats = outbox.drain()
+        self.assertEqual((stats.sent, stats.failed, stats.retried, stats.batches), (0, 0, 2, 1))
+        for row in EmailOutbox.objects.all():
+            self.assertEqual((row.status, row.attempts), (EmailOutbox.Status.PENDING, 0))
+            self.assertGreater(row.next_attempt_at, timezone.now())
+
+
+# =====================================================
+# 🌐 Domain → role resolution (core/utils/domain_roles.py)
+# =====================================================
+class DomainTableTests(SimpleTestCase):
+    ROLES = {role_id: {"id": role_id, "name": f"role-{role_id}"} for role_id in range(1, 8)}
+    MAPPINGS = [
+        ("uni.edu", 1),
+        ("*.uni.edu", 2),
+        ("student.uni.edu", 3),
+        ("*.student.uni.edu", 4),
+        ("Lab.Uni.EDU.", 5),
+        ("*.only.org", 6),
+    ]
+    FALLBACK = 7
+
+    def test_deepest_match_wins_and_exact_beats_wildcard(self):
+        table = domain_roles.DomainTable(self.MAPPINGS, self.ROLES, self.FALLBACK)
+        cases = [
+            ("uni.edu", 1),  # a wildcard never matches its own domain
+            ("cs.uni.edu", 2),  # deeper wildcard beats the exact parent
+            ("a.cs.uni.edu", 2),
+            ("student.uni.edu", 3),  # same depth: exact beats wildcard
+            ("a.student.uni.edu", 4),
+            ("a.b.student.uni.edu", 4),
+            ("lab.uni.edu", 5),  # mappings are normalized
+            ("x.lab.uni.edu", 5),  # exact entries cover their subdomains
+            ("ana@Student.Uni.Edu.", 3),  # so are lookups, full addresses included
+            ("only.org", 7),
+            ("a.only.org", 6),
+            ("xuni.edu", 7),  # suffixes match whole labels
+            ("edu", 7),
+            ("other.org", 7),
+        ]
+        for domain, expected in cases:
+            with self.subTest(domain=domain):
+                self.assertEqual(table.role_id_for(domain), expected)
+        self.assertEqual(table.role_for("cs.uni.edu").name, "role-2")
+
+
+class DomainRoleTests(TestCase):
+    def setUp(self):
+        domain_roles._bump()  # no trie left over from another test's rolled-back mappings
+        self.addCleanup(domain_roles._bump)
+
+    @override_settings(DOMAIN_ROLES_CHECK_SECONDS=0)  # the stamp is read on every lookup
+    def test_trie_follows_the_version_stamp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            role = Role.objects.create(name="Lab Technician")
+            mapping = DomainRoleMapping.objects.create(domain="*.uni.edu", role=role)
+        self.assertEqual(domain_roles.resolve("ana@cs.uni.edu").name, "Lab Technician")
+
+        # Writes that skip the signals leave the stamp, and so the loaded trie, alone
+        DomainRoleMapping.objects.filter(pk=mapping.pk).update(domain="*.other.edu")
+        with self.assertNumQueries(0):
+            self.assertEqual(domain_roles.resolve("ana@cs.uni.edu").name, "Lab Technician")
+        DomainRoleMapping.objects.filter(pk=mapping.pk).update(domain="*.uni.edu")
+
+        changes = [
+            (lambda: setattr(mapping, "domain", "cs.uni.edu") or mapping.save(),
+             {"ana@x.cs.uni.edu": "Lab Technician", "ana@math.uni.edu": domain_roles.FALLBACK_ROLE}),
+            (lambda: setattr(role, "name", "Lab Tech") or role.save(), {"ana@cs.uni.edu": "Lab Tech"}),
+            (mapping.delete, {"ana@cs.uni.edu": domain_roles.FALLBACK_ROLE}),
+        ]
+        for change, expected in changes:
+            version = cache.get(domain_roles.VERSION_KEY)
+            with self.captureOnCommitCallbacks(execute=True):
+                change()
+            self.assertNotEqual(cache.get(domain_roles.VERSION_KEY), version, expected)
+            self.assertEqual({email: domain_roles.resolve(email).name for email in expected}, expected)
+
+    def test_mapping_change_reloads_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            role = Role.objects.create(name="Lab Technician")
+        self.assertNotEqual(domain_roles.resolve("ana@faculty.uni.edu").name, "Lab Technician")
+        version = cache.get(domain_roles.VERSION_KEY)
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            DomainRoleMapping.objects.create(domain="faculty.uni.edu", role=role)
+            self.assertEqual(cache.get(domain_roles.VERSION_KEY), version)  # not before commit
+        self.assertTrue(callbacks)
+        self.assertNotEqual(cache.get(domain_roles.VERSION_KEY), version)
+        self.assertEqual(domain_roles.resolve("ana@faculty.uni.edu").name, "Lab Technician")
+
+
+# =====================================================
+# ⏱️ SLA (core/utils/sla.py)
+# =====================================================
+WEEKDAYS_9_TO_5 = {str(day): [["09:00", "17:00"]] for day in range(5)}
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=dt_timezone.utc)
+
+
+class CompiledCalendarTests(SimpleTestCase):
+    def calendar(self, holidays=(), hours=WEEKDAYS_9_TO_5):
+        # Compiled over one week only: Mon 2026-01-05 .. Fri 2026-01-09
+        return sla.CompiledCalendar("UTC", hours, holidays, date(2026, 1, 5), date(2026, 1, 9))
+
+    def test_add_within_range(self):
+        self.assertEqual(self.calendar().add(_utc(2026, 1, 5, 16), timedelta(hours=3)), _utc(2026, 1, 6, 11))
+
+    def test_add_past_compiled_range(self):
+        calendar = self.calendar()
+        self.assertEqual(calendar.add(_utc(2026, 1, 9, 16), timedelta(hours=3)), _utc(2026, 1, 12, 11))
+        self.assertEqual(calendar.add(_utc(2026, 1, 5, 9), timedelta(hours=60)), _utc(2026, 1, 14, 13))
+        self.assertEqual(calendar.add(_utc(2026, 2, 2, 10, 30), timedelta(hours=2)), _utc(2026, 2, 2, 12, 30))
+
+    def test_add_past_compiled_range_skips_holidays(self):
+        calendar = self.calendar(holidays=[date(2026, 1, 12)])
+        self.assertEqual(calendar.add(_utc(2026, 1, 9, 16), timedelta(hours=3)), _utc(2026, 1, 13, 11))
+
+    def test_add_on_calendar_that_never_opens(self):
+        self.assertIsNone(self.calendar(hours={}).add(_utc(2026, 1, 5, 9), timedelta(hours=1)))
+
+
+class SLATests(TestCase):
+    def test_rules_version_moves_on_commit(self):
+        version = sla.rules_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            sla.invalidate()
+            self.assertEqual(sla.rules_version(), version)
+        self.assertNotEqual(sla.rules_version(), version)
+
+    def test_sla_report_validates_due_within_hours(self):
+        admin = User.objects.create_superuser(username="admin", email="admin@uni.edu", password="x")
+        client = APIClient()
+        client.force_authenticate(admin)
+        for value in ("inf", "nan", "-1", "1e9", "soon"):
+            response = client.get("/api/tickets/sla_report/", {"due_within_hours": value})
+            self.assertEqual(response.status_code, 400, value)
+        self.assertEqual(client.get("/api/tickets/sla_report/", {"due_within_hours": "2.5"}).status_code, 200)
+
+    def test_sla_simulate_rejects_non_object_body(self):
+        admin = User.objects.create_superuser(username="admin", email="admin@uni.edu", password="x")
+        client = APIClient()
+        client.force_authenticate(admin)
+        for body in ([{"name": "x"}], "scenarios", 42):
+            response = client.post("/api/tickets/sla_simulate/", body, format="json")
+            self.assertEqual(response.status_code, 400, body)
+        self.assertEqual(client.post("/api/tickets/sla_simulate/", {}, format="json").status_code, 200)
+
+    def test_sla_simulate_scenarios(self):
+        admin = User.objects.create_superuser(username="admin", email="admin@uni.edu", password="x")
+        location = Location.objects.create(building_name="Main", floor_number="1", room_identifier="101")
+        now = timezone.now()
+        Ticket.objects.create(
+            reporter=admin, location=location, title="Leak", description="Sink", category=Ticket.Category.PLUMBING,
+            urgency=Ticket.Urgency.URGENT, created_at=now - timedelta(hours=10),
+        )
+        client = APIClient()
+        client.force_authenticate(admin)
+        scenarios = [
+            {"name": "strict", "policies": [{"urgency": "Urgent", "secondary_after_hours": 1, "admin_after_hours": 5}]},
+            {"name": "lenient", "policies": [{"urgency": "Urgent", "secondary_after_hours": 8, "admin_after_hours": 48}]},
+            {"name": "other", "policies": [{"urgency": "Standard", "secondary_after_hours": 1}]},
+        ]
+        response = client.post(
+            "/api/tickets/sla_simulate/",
+            {"since": (now - timedelta(days=1)).isoformat(), "until": now.isoformat(), "scenarios": scenarios},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        self.assertEqual(result["tickets"], 1)
+        totals = {scenario["name"]: scenario["totals"] for scenario in result["scenarios"]}
+        self.assertEqual(totals["strict"], {"Secondary": 0, "Admin": 1})
+        self.assertEqual(totals["lenient"], {"Secondary": 1, "Admin": 0})
+        self.assertEqual(totals["other"], {"Secondary": 1, "Admin": 0})  # no match: built-in Urgent thresholds (4 h / 48 h)
+
+
+# =====================================================
+# 🪪 Cached JWT authentication (core/utils/auth_cache.py)
+# =====================================================
+class AuthCacheTests(TestCase):
+    def setUp(self):
+        auth_cache._local.clear()
+        self.addCleanup(auth_cache._local.clear)
+        # Permission changes made here are rolled back: don't leave their compiled table behind
+        table = mock.patch.object(rbac, "_table", rbac._table)
+        table.start()
+        self.addCleanup(table.stop)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username="ana", email="ana@uni.edu", password="x")
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def _change(self, instance, **fields):
+        for name, value in fields.items():
+            setattr(instance, name, value)
+        with self.captureOnCommitCallbacks(execute=True):  # stamps move on commit
+            instance.save()
+
+    def test_snapshot_is_reused_until_its_stamps_move(self):
+        self.assertEqual(auth_cache.get_user(self.user.pk).profile.role.name, "Student")
+        stamps = auth_cache.versions(self.user)
+        with self.assertNumQueries(0):
+            cached = auth_cache.get_user(self.user.pk)
+            self.assertFalse(cached.profile.can_fix)  # profile, role and permissions come with it
+
+        checks = [
+            (self.user, {"is_active": False}, lambda user: self.assertFalse(user.is_active)),
+            (self.user, {"email": "ana@faculty.pirmaed.com"}, lambda user: self.assertEqual(user.email, "ana@faculty.pirmaed.com")),
+            (self.user.profile, {"role": Role.objects.get(name="Janitorial Staff")}, lambda user: self.assertTrue(user.profile.can_fix)),
+        ]
+        for instance, fields, check in checks:
+            self._change(instance, **fields)
+            self.assertNotEqual(auth_cache.versions(self.user), stamps, fields)
+            stamps = auth_cache.versions(self.user)
+            with self.assertNumQueries(1):  # one select_related load for the new stamps
+                check(auth_cache.get_user(self.user.pk))
+
+        # Permission changes move the global roles stamp instead
+        self._change(Role.objects.get(name="Janitorial Staff").permissions, can_fix=False)
+        self.assertEqual(auth_cache.versions(self.user)[0], stamps[0])
+        self.assertNotEqual(auth_cache.versions(self.user)[1], stamps[1])
+        self.assertFalse(auth_cache.get_user(self.user.pk).profile.can_fix)
+
+    def test_deactivated_user_is_rejected_on_the_next_request(self):
+        self.assertEqual(self.client.get("/api/tickets/").status_code, 200)
+        self._change(self.user, is_active=False)
+        response = self.client.get("/api/tickets/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["code"], "user_inactive")
+
+    def test_profile_payload_follows_role_changes(self):
+        first = self.client.get("/api/auth/profile/")
+        self.assertEqual(first.json()["role"]["name"], "Student")
+        with self.assertNumQueries(0):  # auth from the snapshot, 304 from the stamps
+            self.assertEqual(self.client.get("/api/auth/profile/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        self._change(self.user.profile, role=Role.objects.get(name="Janitorial Staff"))
+        changed = self.client.get("/api/auth/profile/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], first["ETag"])
+        self.assertEqual((changed.json()["role"]["name"], changed.json()["can_fix"]), ("Janitorial Staff", True))
+
+        self._change(Role.objects.get(name="Janitorial Staff").permissions, allowed_categories=["Cleaning", "Plumbing"])
+        self.assertEqual(self.client.get("/api/auth/profile/").json()["allowed_categories"], ["Cleaning", "Plumbing"])
+
+
+# =====================================================
+# 🛡️ Compiled role permissions (core/utils/rbac.py)
+# =====================================================
+class RoleTableTests(TestCase):
+    def setUp(self):
+        Role.objects.create(name="Lab Technician")  # no Permission row
+        admin = Role.objects.create(name="Super Admin")
+        Permission.objects.create(role=admin, can_report=True, is_admin_level=True)
+        self.table = rbac.load_table()
+
+    def test_flags_match_the_permission_rows(self):
+        flags = ["can_report", "can_fix", "can_assign", "can_manage_users", "is_admin_level"]
+        roles = list(Role.objects.select_related("permissions"))
+        self.assertEqual(set(self.table.roles), {role.id for role in roles})
+        for role in roles:
+            try:
+                permissions = role.permissions
+            except Permission.DoesNotExist:
+                permissions = None
+            # The row-by-row logic UserProfile used before the table
+            expected = {flag: bool(permissions and getattr(permissions, flag)) for flag in flags}
+            expected["allowed_categories"] = list(permissions.allowed_categories) if permissions else []
+
+            with mock.patch("core.utils.rbac.get_table", return_value=self.table):
+                profile = UserProfile(role=role)
+                compiled = {flag: getattr(profile, flag) for flag in flags}
+                compiled["allowed_categories"] = profile.allowed_categories()
+            self.assertEqual(compiled, expected, role.name)
+            self.assertEqual(self.table.roles[role.id].has(rbac.Perm.SYSTEM), role.name in ("Super Admin", "University Admin"))
+
+        for category in Ticket.Category.values:
+            fixers = {r.id for r in roles if category in getattr(getattr(r, "permissions", None), "allowed_categories", [])}
+            self.assertEqual(set(self.table.role_ids_with_category(category)), fixers, category)
+
+    def test_access_token_carries_the_mask(self):
+        user = User.objects.create_user(username="jan", email="jan@uni.edu", password="x")
+        user.profile.role = Role.objects.get(name="Janitorial Staff")
+        user.profile.save()
+        token = EmailTokenObtainPairSerializer.get_token(User.objects.get(pk=user.pk))
+        self.assertEqual(token["perm"], rbac.Perm.REPORT | rbac.Perm.FIX)
+
+
+# =====================================================
+# 🚫 Refresh-token revocation (core/utils/revocation.py)
+# =====================================================
+class RevocationTests(TestCase):
+    def setUp(self):
+        index = mock.patch.object(revocation, "_index", None)  # a fresh local filter per test
+        index.start()
+        self.addCleanup(index.stop)
+        self.user = User.objects.create_user(username="ana", email="ana@uni.edu", password="x")
+
+    def test_bloom_filter(self):
+        bloom = revocation.BloomFilter(1000, 0.01)
+        keys = [f"jti-{i}" for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))  # no false negatives
+        false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)  # ~1% expected
+
+    def test_logout_revokes_the_refresh_token(self):
+        refresh = RevocableRefreshToken.for_user(self.user)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        client.cookies["refresh_token"] = str(refresh)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(client.post("/api/auth/logout/").status_code, 200)
+
+        self.assertEqual(RevokedToken.objects.get(jti=refresh["jti"]).reason, RevokedToken.Reason.LOGOUT)
+        with self.assertRaisesMessage(TokenError, "blacklisted"):
+            RevocableRefreshToken(str(refresh))
+        client.cookies["refresh_token"] = str(refresh)
+        self.assertEqual(client.post("/api/auth/refresh/").status_code, 401)
+
+    def test_revocations_by_other_processes_sync_through_the_stamp(self):
+        self.assertFalse(revocation.is_revoked("elsewhere"))  # builds this process's filter
+        RevokedToken.objects.create(jti="elsewhere", expires_at=timezone.now() + timedelta(days=1))
+        with self.assertNumQueries(0):  # stamp unchanged: the filter's "no" is final, no DB lookup
+            self.assertFalse(revocation.is_revoked("elsewhere"))
+
+        revocation._bump()  # what the other process does on commit
+        self.assertTrue(revocation.is_revoked("elsewhere"))
+        self.assertFalse(revocation.is_revoked("never-revoked"))
+
+
+# =====================================================
+# 🔐 Login (core/serializers.py)
+# =====================================================
+class EmailLoginTests(TestCase):
+    def login(self, email, password):
+        serializer = EmailTokenObtainPairSerializer(data={"email": email, "password": password}, context={"request": None})
+        with mock.patch.object(PBKDF2PasswordHasher, "encode", autospec=True, side_effect=PBKDF2PasswordHasher.encode) as encode:
+            valid = serializer.is_valid()
+        return valid, encode.call_count
+
+    def test_every_failed_login_hashes_once(self):
+        User.objects.create_user(username="ana", email="ana@uni.edu", password="correct horse")
+        self.assertEqual(self.login("ana@uni.edu", "wrong"), (False, 1))
+        self.assertEqual(self.login("nobody@uni.edu", "wrong"), (False, 1))  # no timing oracle for unknown emails
+        self.assertEqual(self.login("ana@uni.edu", "correct horse"), (True, 1))
+
+    def test_blocked_email_is_throttled_on_both_login_endpoints(self):
+        cache.set(login_anomaly.block_key("email", "ana@uni.edu"), time.time() + 60, 60)
+        self.addCleanup(cache.delete, login_anomaly.block_key("email", "ana@uni.edu"))
+        client = APIClient()
+        for url in ("/api/auth/login/", "/api/users/email_login/"):
+            response = client.post(url, {"email": "ana@uni.edu", "password": "x"}, format="json")
+            self.assertEqual(response.status_code, 429, url)
+
+
+# =====================================================
+# 🕒 last_login write-behind (core/utils/last_login.py)
+# =====================================================
+class LastLoginBufferTests(TestCase):
+    databases = "__all__"  # the login receiver also writes an audit row
+
+    def setUp(self):
+        cache.clear()  # no buffered logins left over from other tests
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username="ana", email="ana@uni.edu", password="x")
+
+    def _login(self, user):
+        with CaptureQueriesContext(connections["default"]) as queries:
+            user_logged_in.send(sender=User, request=None, user=user)
+        return [q["sql"] for q in queries if q["sql"].lstrip().startswith("UPDATE")]
+
+    def test_logins_reach_the_database_on_flush(self):
+        # django.contrib.auth's update_last_login receiver is gone: a login writes nothing to the user row
+        self.assertNotIn("update_last_login", [lookup_key[0] for lookup_key, *_ in user_logged_in.receivers])
+        stamps = auth_cache.versions(self.user)
+        self.assertEqual(self._login(self.user), [])
+        when = self.user.last_login
+        self.assertIsNotNone(when)  # set on the instance right away
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+        self.assertEqual(last_login.flush(when), 0)  # the bucket is still open
+        closed = when + timedelta(seconds=2 * settings.LAST_LOGIN_FLUSH_SECONDS + last_login.FLUSH_GRACE_SECONDS)
+        with CaptureQueriesContext(connections["default"]) as queries:
+            self.assertEqual(last_login.flush(closed), 1)
+        if connections["default"].vendor == "postgresql":
+            updates = [q["sql"] for q in queries if q["sql"].lstrip().startswith("UPDATE")]
+            self.assertEqual(len(updates), 1)
+            self.assertIn("FROM unnest(", updates[0])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, when)
+        self.assertEqual(auth_cache.versions(self.user), stamps)  # cached auth snapshots stay valid
+        self.assertEqual(last_login.flush(closed), 0)  # buffer emptied
+
+    def test_flush_never_moves_last_login_backwards(self):
+        self._login(self.user)
+        later = self.user.last_login + timedelta(hours=1)
+        User.objects.filter(pk=self.user.pk).update(last_login=later)  # written through by another path
+        last_login.flush(later)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.last_login, later)
+
+
+# =====================================================
+# 🚨 Escalation (core/utils/escalation.py)
+# =====================================================
+class EscalationTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        sla._bump()  # no compiled table left over from another test's rolled-back policies
+        self.addCleanup(sla._bump)
+        self.now = timezone.now()
+        self.reporter = User.objects.create_user(username="ana", email="ana@uni.edu", password="x")
+        self.location = Location.objects.create(building_name="Main", floor_number="1", room_identifier="101")
+
+    def _ticket(self, hours_ago, urgency=Ticket.Urgency.STANDARD, **fields):
+        return Ticket.objects.create(
+            reporter=self.reporter, location=self.location, title="Leak", description="Sink",
+            category=Ticket.Category.PLUMBING, urgency=urgency, created_at=self.now - timedelta(hours=hours_ago), **fields,
+        )
+
+    def test_escalates_due_tickets_in_bulk(self):
+        # Built-in thresholds: Secondary after 4 h (Urgent) / 24 h (Standard), Admin after 48 h
+        urgent = self._ticket(5, Ticket.Urgency.URGENT)
+        standard = self._ticket(50)
+        reopened = self._ticket(30, status=Ticket.Status.REOPENED)
+        not_due = self._ticket(1)
+        closed = self._ticket(50, Ticket.Urgency.URGENT, status=Ticket.Status.CLOSED)
+        self.assertIsNone(closed.next_escalation_at)  # never scanned
+        last_seq = dict(TicketEvent.objects.values("ticket_id").annotate(last=Max("seq")).values_list("ticket_id", "last"))
+
+        with self.captureOnCommitCallbacks(execute=True), CaptureQueriesContext(connections["default"]) as queries:
+            summary = escalation.escalate_due_tickets(self.now)
+        self.assertEqual(summary, {"secondary": 2, "admin": 1, "rescheduled": 0, "total": 3})
+        if connections["default"].vendor == "postgresql":
+            updates = [q["sql"] for q in queries if q["sql"].lstrip().startswith("UPDATE")]
+            self.assertEqual(len(updates), 1)  # one set-based UPDATE for every due ticket
+            self.assertIn("FROM unnest(", updates[0])
+
+        expected = {
+            urgent: (Ticket.Escalation.SECONDARY, urgent.created_at + Ticket.ADMIN_ESCALATION_AFTER),
+            standard: (Ticket.Escalation.ADMIN, None),
+            reopened: (Ticket.Escalation.SECONDARY, reopened.created_at + Ticket.ADMIN_ESCALATION_AFTER),
+            not_due: (Ticket.Escalation.NONE, not_due.created_at + timedelta(hours=24)),
+        }
+        for ticket, (level, next_at) in expected.items():
+            ticket.refresh_from_db()
+            self.assertEqual((ticket.escalation_level, ticket.next_escalation_at), (level, next_at), ticket.pk)
+
+        escalated = [urgent, standard, reopened]
+        for ticket in escalated:
+            event = TicketEvent.objects.filter(ticket=ticket).latest("seq")
+            self.assertEqual(event.seq, last_seq[ticket.pk] + 1)
+            self.assertEqual(event.type, TicketEvent.Type.ESCALATED)
+            self.assertEqual(event.payload, {"from": "None", "to": ticket.escalation_level, "automatic": True})
+        self.assertFalse(TicketEvent.objects.filter(ticket__in=[not_due, closed], type=TicketEvent.Type.ESCALATED).exists())
+
+        audits = AuditLog.objects.filter(action=AuditLog.Action.TICKET_ESCALATED)
+        self.assertEqual(sorted(audits.values_list("target_ticket_id", flat=True)), sorted(t.pk for t in escalated))
+        self.assertTrue(all(log.high_sensitivity for log in audits))  # set explicitly: bulk inserts skip save()
+        log = audits.get(target_ticket_id=standard.pk)
+        self.assertEqual((log.target_user_id, log.extra), (self.reporter.pk, {"from": "None", "to": "Admin"}))
+        self.assertEqual(log.rendered_details, f"Ticket #{standard.pk} escalated automatically from None to Admin.")
+
+        self.assertEqual(escalation.escalate_due_tickets(self.now)["total"], 0)  # nothing is due again yet
+
+    def test_policy_change_reschedules_open_tickets_once(self):
+        ticket = self._ticket(1, Ticket.Urgency.URGENT)
+        self.assertEqual(ticket.next_escalation_at, ticket.created_at + timedelta(hours=4))
+        escalation.reschedule_if_rules_changed()  # catch up with the version setUp moved
+        self.assertIsNone(escalation.reschedule_if_rules_changed())  # unchanged rules: no O(backlog) pass
+
+        with self.captureOnCommitCallbacks(execute=True):  # the rules version moves on commit
+            SLAPolicy.objects.create(
+                name="Urgent fast track", urgency=Ticket.Urgency.URGENT,
+                secondary_after=timedelta(minutes=30), admin_after=timedelta(hours=2),
+            )
+        self.assertEqual(escalation.reschedule_if_rules_changed(), Ticket.objects.exclude(status__in=Ticket.INACTIVE_STATUSES).count())
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.next_escalation_at, ticket.created_at + timedelta(minutes=30))
+        self.assertIsNone(escalation.reschedule_if_rules_changed())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            summary = escalation.escalate_due_tickets(self.now)
+        self.assertEqual((summary["secondary"], summary["total"]), (1, 1))
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.next_escalation_at, ticket.created_at + timedelta(hours=2))
+
+
+# =====================================================
+# 📜 Audit log API (core/views.py)
+# =====================================================
+class AuditLogFilterTests(TestCase):
+    databases = "__all__"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser(username="admin", email="admin@uni.edu", password="x"))
+
+    def test_malformed_filters_are_rejected(self):
+        for params in (
+            {"performed_by": "abc"},
+            {"target_ticket": "1.5"},
+            {"target_user": "²"},
+            {"target_invite": str(2**63)},
+            {"since": "yesterday"},
+            {"until": "2026-13-01T00:00:00Z"},
+        ):
+            response = self.client.get("/api/audit-logs/", params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertIn(next(iter(params)), response.json())
+
+    def test_valid_filters(self):
+        params = {"performed_by": "1", "since": "2026-01-01T00:00:00Z", "until": "2026-02-01T00:00:00Z"}
+        self.assertEqual(self.client.get("/api/audit-logs/", params).status_code, 200)
+        self.assertEqual(self.client.get("/api/audit-logs/export/", params).status_code, 200)
+
+
+# =====================================================
+# ✉️ Invites (core/utils/invites.py)
+# =====================================================
+@mock.patch("core.utils.outbox.kick")
+class InviteTests(TestCase):
+    def setUp(self):
+        self.role = Role.objects.create(name="Lab Technician")
+        self.admin = User.objects.create_superuser(username="admin", email="admin@uni.edu", password="x")
+
+    def test_existing_invite_matches_case_insensitively(self, kick):
+        Invite.objects.create(email="Ana@Uni.edu", role=self.role, created_by=self.admin)
+        created, skipped = invites.create_invites(["ana@uni.edu"], self.role, self.admin)
+        self.assertEqual(created, [])
+        self.assertEqual(skipped, [{"email": "ana@uni.edu", "reason": "active invite already exists"}])
+
+    def test_concurrent_invite_is_reported_not_raised(self, kick):
+        emails = {"ana@uni.edu": "ana@uni.edu", "ben@uni.edu": "ben@uni.edu"}
+        stale = invites._diff(emails, self.role, self.admin)  # checks done, then another request invites ana
+        Invite.objects.create(email="ana@uni.edu", role=self.role, created_by=self.admin)
+        rounds = [stale]
+        real_diff = invites._diff
+
+        def diff_once_stale(*args):
+            return rounds.pop() if rounds else real_diff(*args)
+
+        with mock.patch("core.utils.invites._diff", side_effect=diff_once_stale) as diff:
+            created, skipped = invites.create_invites(list(emails), self.role, self.admin)
+        self.assertEqual(diff.call_count, 2)
+        self.assertEqual([invite.email for invite in created], ["ben@uni.edu"])
+        self.assertEqual(skipped, [{"email": "ana@uni.edu", "reason": "active invite already exists"}])
+        self.assertEqual(EmailOutbox.objects.count(), 1)
+
+
+# =====================================================
+# 🔢 One-time codes (core/utils/otp.py)
+# =====================================================
+class CodeStoreTests(SimpleTestCase):
+    store = otp.CodeStore("test", ttl=60)
+
+    def tearDown(self):
+        cache.delete_many([self.store._key(1), f"{self.store._key(1)}:attempts"])
+
+    def test_code_works_once(self):
+        code = self.store.issue(1)
+        self.assertIs(self.store.verify(1, "x" + code), otp.Verdict.INVALID)
+        self.assertIs(self.store.verify(1, code), otp.Verdict.OK)
+        self.assertIs(self.store.verify(1, code), otp.Verdict.EXPIRED)
+
+    @override_settings(SHARED_CACHE_REQUIRED=True)
+    def test_refused_on_per_process_cache_when_shared_cache_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.store.issue(1)
+        with self.assertRaises(ImproperlyConfigured):
+            self.store.verify(1, "123456")
+
+
+# =====================================================
+# 🔒 Task leases (core/utils/locks.py)
+# =====================================================
+class LeaseTests(SimpleTestCase):
+    def test_single_holder_on_locmem(self):
+        self.assertIsNone(locks._redis_client("task_lease:test"))  # plain get/touch/delete path
+        with locks.Lease("test_single_holder", ttl=30) as first:
+            self.assertTrue(first.held)
+            with locks.Lease("test_single_holder", ttl=30) as second:
+                self.assertFalse(second.held)
+            first.verify()
+        self.assertIsNone(cache.get(locks._key("test_single_holder")))
+
+    def test_release_keeps_a_newer_holder(self):
+        lease = locks.Lease("test_newer_holder", ttl=30)
+        lease.acquire()
+        cache.set(locks._key("test_newer_holder"), lease.token + 1, 30)  # expired and taken over
+        lease.release()
+        self.assertEqual(cache.get(locks._key("test_newer_holder")), lease.token + 1)
+        cache.delete(locks._key("test_newer_holder"))
+
+    @override_settings(SHARED_CACHE_REQUIRED=True)
+    def test_refused_on_per_process_cache_when_shared_cache_required(self):
+        with self.assertLogs("core.utils.locks", "ERROR"):
+            with locks.Lease("test_refused", ttl=30) as lease:
+                self.assertFalse(lease.held)
+        self.assertIsNone(cache.get(locks._key("test_refused")))
+
+    @override_settings(SHARED_CACHE_REQUIRED=False)
+    def test_per_process_cache_warns_once(self):
+        with mock.patch.object(locks, "_local_cache_warned", False):
+            with self.assertLogs("core.utils.locks", "WARNING") as logs:
+                for _ in range(2):
+                    with locks.Lease("test_warns", ttl=30) as lease:
+                        self.assertTrue(lease.held)
+        self.assertEqual(sum("per process" in line for line in logs.output), 1)
+
+    @override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": "redis://127.0.0.1:6379/15",  # never contacted: redis-py connects lazily
+    }})
+    def test_redis_client_adapter(self):
+        client, raw_key = locks._redis_client("task_lease:test")
+        self.assertEqual(raw_key, caches["default"].make_key("task_lease:test"))
+        self.assertTrue(callable(client.eval))
+
+        with mock.patch.object(caches["default"], "_cache", None):  # internals moved: fall back
+            self.assertIsNone(locks._redis_client("task_lease:test"))
+
+
+# =====================================================
+# 🩺 System checks (core/checks.py)
+# =====================================================
+class SharedCacheCheckTests(SimpleTestCase):
+    def test_per_process_cache_is_an_error_when_shared_cache_required(self):
+        with override_settings(SHARED_CACHE_REQUIRED=True):  # tests run on locmem
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["core.E001"])
+        with override_settings(SHARED_CACHE_REQUIRED=False):
+            self.assertEqual(check_shared_cache(None), [])
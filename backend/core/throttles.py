@@ -1,12 +1,22 @@
 # core/throttles.py
-from rest_framework.throttling import SimpleRateThrottle
+import time
+
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+from core.utils.login_anomaly import blocked_until
+
+
+def _email(request):
+    """The "email" field of the body; None when there is none (JSON lists and scalars included)."""
+    data = getattr(request, "data", None)
+    return data.get("email") if isinstance(data, dict) else None
 
 
 class OTPThrottle(SimpleRateThrottle):
     scope = "otp"
 
     def get_cache_key(self, request, view):
-        email = request.data.get("email")
+        email = _email(request)
         if not email:
             return None
         return self.cache_format % {"scope": self.scope, "ident": email}
@@ -16,7 +26,25 @@ class PasswordResetThrottle(SimpleRateThrottle):
     scope = "reset"
 
     def get_cache_key(self, request, view):
-        email = request.data.get("email")
+        email = _email(request)
         if not email:
             return None
         return self.cache_format % {"scope": self.scope, "ident": email}
+
+
+class LoginAnomalyThrottle(BaseThrottle):
+    """
+    Rejects logins from an IP / for an email that the failed-login detector
+    has blocked (LOGIN_ANOMALY_AUTO_THROTTLE, see core/utils/login_anomaly.py).
+    """
+
+    def allow_request(self, request, view):
+        until = blocked_until(
+            ip=request.META.get("REMOTE_ADDR"),
+            email=_email(request),
+        )
+        self._wait = max(0, until - time.time()) if until else None
+        return not self._wait
+
+    def wait(self):
+        return self._wait
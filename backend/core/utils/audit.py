@@ -1,7 +1,8 @@
 # core/utils/audit.py
 import logging
 from django.contrib.auth import get_user_model
-from core.models import AuditLog
+from core.db_routers import defer_audit_write
+from core.models import AuditLog, AuditUserAgent
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
@@ -17,11 +18,15 @@ def create_audit(
     target_invite=None,
     target_ticket=None,
     details: str = "",
+    request=None,
+    extra=None,
 ):
     """
     Safely create an AuditLog entry only if action is valid.
     - Validates that action is allowed
     - Ensures performed_by is always a CustomUser (or None)
+    - Stores request IP / User-Agent in structured columns
+    - Written after commit when AuditLog has its own database (core/db_routers.py)
     - Never raises exceptions (fails silently, logs error)
     """
 
@@ -34,15 +39,23 @@ def create_audit(
     if performed_by and not isinstance(performed_by, User):
         performed_by = None
 
-    try:
-        return AuditLog.objects.create(
-            action=action,
-            performed_by=performed_by,
-            target_user=target_user,
-            target_invite=target_invite,
-            target_ticket=target_ticket,
-            details=details.strip() if details else "",
-        )
-    except Exception as e:
-        logger.error(f"[AuditLog] Failed to create log ({action}): {e}")
-        return None
+    ip, user_agent = AuditLog.request_metadata(request)
+
+    def write():
+        try:
+            return AuditLog.objects.create(
+                action=action,
+                performed_by=performed_by,
+                target_user=target_user,
+                target_invite=target_invite,
+                target_ticket=target_ticket,
+                details=details.strip() if details else "",
+                ip_address=ip,
+                user_agent_id=AuditUserAgent.objects.intern(user_agent),
+                extra=extra,
+            )
+        except Exception as e:
+            logger.error(f"[AuditLog] Failed to create log ({action}): {e}")
+            return None
+
+    return defer_audit_write(write)
@@ -0,0 +1,258 @@
+# core/utils/audit_archive.py
+"""
+Cold archive for aged AuditLog rows.
+
+Rows are streamed out of the database with `.iterator()` and written as
+compressed NDJSON, one file per day per run:
+
+    <AUDIT_LOG_ARCHIVE_DIR>/2026/10/auditlog-2026-10-19-20261020T030000.ndjson.gz
+    <AUDIT_LOG_ARCHIVE_DIR>/2026/10/auditlog-2026-10-19-20261020T030000.ndjson.gz.idx.json
+    <AUDIT_LOG_ARCHIVE_DIR>/manifest.json
+
+Each file has a small JSON index (time range + per-action counts) so reads
+can skip files without opening them. manifest.json holds the
+(timestamp, id) watermark of the last archived row, which makes repeated
+runs incremental instead of re-exporting the same rows.
+
+gzip is the supported format. AUDIT_LOG_ARCHIVE_COMPRESSION = "zstd" is
+opt-in: it needs the `zstandard` package, which requirements.txt does not
+install, and falls back to gzip (with a warning) without it. Reading .zst
+files needs zstandard too.
+"""
+import gzip
+import io
+import json
+import logging
+import os
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from core.models import AuditLog
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = [
+    "id", "action", "performed_by_id", "target_user_id", "target_invite_id",
+    "target_ticket_id", "details", "extra", "ip_address", "timestamp", "high_sensitivity",
+]
+# Archives are self-contained: the interned User-Agent string is inlined
+ARCHIVE_EXPRESSIONS = {"ua": F("user_agent__user_agent")}
+_EXTENSIONS = {"gzip": ".ndjson.gz", "zstd": ".ndjson.zst"}
+_INDEX_SUFFIX = ".idx.json"
+_MANIFEST = "manifest.json"
+
+
+# =====================================================
+# 🛠 Helpers
+# =====================================================
+def archive_dir(directory=None) -> Path:
+    return Path(directory or settings.AUDIT_LOG_ARCHIVE_DIR)
+
+
+def _compression() -> str:
+    wanted = getattr(settings, "AUDIT_LOG_ARCHIVE_COMPRESSION", "gzip")
+    if wanted == "zstd" and zstandard is None:
+        logger.warning("[AuditArchive] zstandard not installed, falling back to gzip")
+        return "gzip"
+    return wanted
+
+
+def _open_write(path: Path, compression: str):
+    if compression == "zstd":
+        stream = zstandard.ZstdCompressor(level=10).stream_writer(open(path, "wb"), closefd=True)
+    else:
+        stream = gzip.open(path, "wb", compresslevel=6)
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def _open_read(path: Path):
+    if path.name.endswith(_EXTENSIONS["zstd"]):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        raw = open(path, "rb")
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True)
+    else:
+        stream = gzip.open(path, "rb")
+    return io.TextIOWrapper(stream, encoding="utf-8")
+
+
+def _write_json_atomic(path: Path, payload: dict):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def read_manifest(directory=None) -> dict:
+    path = archive_dir(directory) / _MANIFEST
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _serialize(row: dict) -> str:
+    row = dict(row)
+    row["timestamp"] = row["timestamp"].isoformat()
+    return json.dumps(row, separators=(",", ":"), ensure_ascii=False)
+
+
+# =====================================================
+# 📦 Writer
+# =====================================================
+class _DayFile:
+    """One compressed NDJSON file plus its running index."""
+
+    def __init__(self, root: Path, day, run_stamp: str, compression: str):
+        folder = root / f"{day:%Y}" / f"{day:%m}"
+        folder.mkdir(parents=True, exist_ok=True)
+        stem, extension = f"auditlog-{day:%Y-%m-%d}-{run_stamp}", _EXTENSIONS[compression]
+        self.path = folder / f"{stem}{extension}"
+        run = 1
+        while self.path.exists():  # an earlier run in the same second wrote this day
+            run += 1
+            self.path = folder / f"{stem}-{run}{extension}"
+        self.tmp_path = self.path.with_name(self.path.name + ".tmp")
+        self.compression = compression
+        self.handle = _open_write(self.tmp_path, compression)
+        self.count = 0
+        self.first = None
+        self.last = None
+        self.last_id = None
+        self.actions = {}
+
+    def write(self, row: dict):
+        self.handle.write(_serialize(row))
+        self.handle.write("\n")
+        self.count += 1
+        self.first = self.first or row["timestamp"]
+        self.last = row["timestamp"]
+        self.last_id = row["id"]
+        self.actions[row["action"]] = self.actions.get(row["action"], 0) + 1
+
+    def close(self) -> dict:
+        self.handle.close()
+        os.replace(self.tmp_path, self.path)
+        index = {
+            "file": self.path.name,
+            "compression": self.compression,
+            "count": self.count,
+            "first": self.first.isoformat(),
+            "last": self.last.isoformat(),
+            "actions": self.actions,
+        }
+        _write_json_atomic(self.path.with_name(self.path.name + _INDEX_SUFFIX), index)
+        return index
+
+
+def archive_audit_logs(cutoff: datetime, directory=None, chunk_size: int = 2000) -> dict:
+    """
+    Stream every AuditLog row older than `cutoff` (and newer than the last
+    archived row) into day-sharded compressed NDJSON files.
+    Nothing is deleted here; retention runs afterwards.
+    Returns a summary: {"rows": n, "files": [...], "watermark": {...}}.
+    """
+    root = archive_dir(directory)
+    root.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(root)
+    compression = _compression()
+    run_stamp = timezone.now().strftime("%Y%m%dT%H%M%S")
+
+    qs = AuditLog.objects.filter(timestamp__lt=cutoff)
+    watermark = manifest.get("watermark")
+    if watermark:
+        ts = datetime.fromisoformat(watermark["timestamp"])
+        qs = qs.filter(Q(timestamp__gt=ts) | Q(timestamp=ts, id__gt=watermark["id"]))
+
+    rows = 0
+    files = []
+    current = None
+    current_day = None
+    try:
+        rows_iter = (
+            qs.order_by("timestamp", "id")
+            .values(*ARCHIVE_FIELDS, **ARCHIVE_EXPRESSIONS)
+            .iterator(chunk_size=chunk_size)
+        )
+        for row in rows_iter:
+            day = row["timestamp"].astimezone(dt_timezone.utc).date()
+            if day != current_day:
+                if current:
+                    files.append(_close_and_advance(root, manifest, current))
+                current = _DayFile(root, day, run_stamp, compression)
+                current_day = day
+            current.write(row)
+            rows += 1
+        if current:
+            files.append(_close_and_advance(root, manifest, current))
+            current = None
+    finally:
+        if current:
+            current.handle.close()
+            current.tmp_path.unlink(missing_ok=True)
+
+    logger.info(f"[AuditArchive] Archived {rows} rows into {len(files)} files under {root}")
+    return {"rows": rows, "files": files, "watermark": manifest.get("watermark")}
+
+
+def _close_and_advance(root: Path, manifest: dict, day_file: _DayFile) -> str:
+    """Finish a file and move the watermark past it, so a crash never re-exports it."""
+    day_file.close()
+    manifest["watermark"] = {"timestamp": day_file.last.isoformat(), "id": day_file.last_id}
+    _write_json_atomic(root / _MANIFEST, manifest)
+    return str(day_file.path.relative_to(root))
+
+
+# =====================================================
+# 🔎 Reader
+# =====================================================
+def iter_archive_indexes(start=None, end=None, actions=None, directory=None):
+    """Yield (data_path, index) for archive files that may contain matching rows."""
+    root = archive_dir(directory)
+    if not root.exists():
+        return
+    actions = set(actions or [])
+    start = start.astimezone(dt_timezone.utc) if start else None
+    end = end.astimezone(dt_timezone.utc) if end else None
+
+    for index_path in sorted(root.glob(f"*/*/*{_INDEX_SUFFIX}")):
+        year, month = index_path.parent.parent.name, index_path.parent.name
+        if start and f"{year}{month}" < f"{start:%Y%m}":
+            continue
+        if end and f"{year}{month}" > f"{end:%Y%m}":
+            continue
+
+        index = json.loads(index_path.read_text(encoding="utf-8"))
+        if start and datetime.fromisoformat(index["last"]) < start:
+            continue
+        if end and datetime.fromisoformat(index["first"]) >= end:
+            continue
+        if actions and not actions.intersection(index["actions"]):
+            continue
+        yield index_path.with_name(index["file"]), index
+
+
+def iter_archived_logs(start=None, end=None, actions=None, directory=None):
+    """
+    Stream archived rows (as dicts) in [start, end), optionally limited to
+    some actions. Files are read line by line; nothing is loaded whole.
+    """
+    actions = set(actions or [])
+    for path, _ in iter_archive_indexes(start, end, actions, directory):
+        with _open_read(path) as handle:
+            for line in handle:
+                row = json.loads(line)
+                if actions and row["action"] not in actions:
+                    continue
+                if start or end:
+                    ts = datetime.fromisoformat(row["timestamp"])
+                    if (start and ts < start) or (end and ts >= end):
+                        continue
+                yield row
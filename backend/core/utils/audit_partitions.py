@@ -0,0 +1,209 @@
+# core/utils/audit_partitions.py
+"""
+Monthly range partitions for core_auditlog (PostgreSQL only).
+
+Layout (created by migration 0004_partition_auditlog):
+
+    core_auditlog                      PARTITION BY LIST (high_sensitivity)
+    ├── core_auditlog_std              FOR VALUES IN (false), PARTITION BY RANGE (timestamp)
+    │   ├── core_auditlog_std_p202610  one table per calendar month (UTC)
+    │   └── core_auditlog_std_default  catch-all for months not created yet
+    └── core_auditlog_high             FOR VALUES IN (true), PARTITION BY RANGE (timestamp)
+        ├── core_auditlog_high_p202610
+        └── core_auditlog_high_default
+
+Retention detaches and drops whole monthly tables instead of running a
+DELETE over the parent, so a month is only dropped once *all* of it is
+older than the cutoff.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "core_auditlog"
+PARTITION_SETS = {
+    False: "core_auditlog_std",
+    True: "core_auditlog_high",
+}
+_MONTH_SUFFIX = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+@dataclass(frozen=True)
+class MonthPartition:
+    name: str
+    start: datetime
+    end: datetime
+
+
+# =====================================================
+# 🗓️ Month arithmetic (UTC boundaries)
+# =====================================================
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(dt_timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(value: datetime, months: int) -> datetime:
+    index = value.year * 12 + (value.month - 1) + months
+    return value.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def partition_name(high_sensitivity: bool, start: datetime) -> str:
+    return f"{PARTITION_SETS[high_sensitivity]}_p{start:%Y%m}"
+
+
+# =====================================================
+# 🔎 Introspection
+# =====================================================
+def _connection():
+    from core.models import AuditLog
+
+    return connections[router.db_for_write(AuditLog)]
+
+
+def is_partitioned(connection=None) -> bool:
+    """True if core_auditlog is a partitioned table on this connection."""
+    connection = connection or _connection()
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT 1
+            FROM pg_partitioned_table pt
+            JOIN pg_class c ON c.oid = pt.partrelid
+            WHERE c.relname = %s AND c.relnamespace = current_schema()::regnamespace
+            """,
+            [PARENT_TABLE],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(high_sensitivity: bool, connection=None) -> list[MonthPartition]:
+    """Monthly partitions of one partition set, oldest first (default partition excluded)."""
+    connection = connection or _connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits i
+            JOIN pg_class parent ON parent.oid = i.inhparent
+            JOIN pg_class child ON child.oid = i.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [PARTITION_SETS[high_sensitivity]],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = _MONTH_SUFFIX.search(name)
+        if not match:
+            continue
+        start = datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)
+        partitions.append(MonthPartition(name=name, start=start, end=add_months(start, 1)))
+    return sorted(partitions, key=lambda p: p.start)
+
+
+# =====================================================
+# 🏗️ Pre-creating partitions
+# =====================================================
+def create_month_partition(high_sensitivity: bool, start: datetime, connection=None) -> bool:
+    """
+    Create the partition for the month starting at `start`.
+    Rows that already landed in the default partition for that month are
+    moved into the new table before it is attached. Returns False if the
+    partition already existed.
+    """
+    connection = connection or _connection()
+    start = month_start(start)
+    end = add_months(start, 1)
+    name = partition_name(high_sensitivity, start)
+    parent = PARTITION_SETS[high_sensitivity]
+    default = f"{parent}_default"
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is not None:
+            return False
+
+        cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(parent)} INCLUDING DEFAULTS)")
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {qn(default)}
+                WHERE "timestamp" >= %s AND "timestamp" < %s
+                RETURNING *
+            )
+            INSERT INTO {qn(name)} SELECT * FROM moved
+            """,
+            [start, end],
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(parent)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)",
+            [start, end],
+        )
+    logger.info(f"[AuditPartitions] Created {name} ({start:%Y-%m} → {end:%Y-%m})")
+    return True
+
+
+def ensure_partitions(months_ahead: int | None = None, now: datetime | None = None) -> list[str]:
+    """
+    Make sure both partition sets have a table for the current month and
+    the next `months_ahead` months. Returns the names of tables created.
+    """
+    connection = _connection()
+    if not is_partitioned(connection):
+        return []
+
+    if months_ahead is None:
+        months_ahead = getattr(settings, "AUDIT_LOG_PARTITION_PREMAKE_MONTHS", 3)
+    current = month_start(now or timezone.now())
+
+    created = []
+    for offset in range(months_ahead + 1):
+        start = add_months(current, offset)
+        for high_sensitivity in PARTITION_SETS:
+            if create_month_partition(high_sensitivity, start, connection):
+                created.append(partition_name(high_sensitivity, start))
+    return created
+
+
+# =====================================================
+# 🧹 Retention
+# =====================================================
+def drop_partitions_before(cutoff: datetime, high_sensitivity: bool) -> list[str]:
+    """
+    Detach and drop every monthly partition whose whole range is older than
+    `cutoff`. Rows that fell into the default partition are deleted by
+    timestamp (that table only ever holds stragglers).
+    """
+    connection = _connection()
+    if not is_partitioned(connection):
+        return []
+
+    parent = PARTITION_SETS[high_sensitivity]
+    qn = connection.ops.quote_name
+    dropped = []
+
+    for partition in list_partitions(high_sensitivity, connection):
+        if partition.end > cutoff:
+            break
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(parent)} DETACH PARTITION {qn(partition.name)}")
+            cursor.execute(f"DROP TABLE {qn(partition.name)}")
+        logger.info(f"[AuditPartitions] Dropped {partition.name}")
+        dropped.append(partition.name)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {qn(parent + "_default")} WHERE "timestamp" < %s', [cutoff])
+
+    return dropped
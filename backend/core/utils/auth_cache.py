@@ -0,0 +1,194 @@
+# core/utils/auth_cache.py
+"""
+Cached user → profile → role → permissions for JWT authentication.
+
+simplejwt loads the user on every request, and nearly every view then
+walks request.user.profile.role.permissions: 3-4 queries before any work.
+Here the whole chain is one snapshot (plain field values, no password
+hash, no last_login), kept in two tiers:
+
+- an in-process LRU (AUTH_CACHE_LOCAL_SIZE entries, AUTH_CACHE_LOCAL_TTL_SECONDS);
+- the shared cache (AUTH_CACHE_TTL_SECONDS), so a warm worker is not required.
+
+Each snapshot carries two version stamps: the user's (bumped when the user,
+their profile or student profile is saved/deleted) and a global roles
+version (bumped when any Role/Permission changes). Every request reads both
+stamps in one cache round trip and reuses a snapshot only if they match, so
+role, permission and is_active changes take effect on the next request. A
+miss is one query (select_related over the whole chain). Other per-user
+caches (the /auth/profile/ payload) key on the same stamps: versions().
+
+Rebuilt objects are real model instances loaded from "the database":
+password and last_login are deferred (loaded on access), and save() only
+writes the fields that were loaded.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from core.models import CustomUser, Permission, Role, UserProfile
+
+_KEY_PREFIX = "auth"
+ROLES_VERSION_KEY = f"{_KEY_PREFIX}:roles:version"
+USER_DEFERRED_FIELDS = {"password", "last_login"}
+
+_local = OrderedDict()  # user_id → (user_version, roles_version, stored_at, snapshot)
+_local_lock = threading.Lock()
+
+
+def _user_version_key(user_id) -> str:
+    return f"{_KEY_PREFIX}:user:{user_id}:version"
+
+
+def _snapshot_key(user_id, user_version, roles_version) -> str:
+    return f"{_KEY_PREFIX}:user:{user_id}:{user_version}:{roles_version}"
+
+
+def _bump(key: str):
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted in between: a fresh stamp never matches an old snapshot
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_user(user_id):
+    """
+    Call after changing a user or their profile outside save()/delete() (e.g. queryset.update()).
+    The stamp moves on commit: a request that reads it earlier still sees the old rows.
+    """
+    transaction.on_commit(lambda: _bump(_user_version_key(user_id)))
+
+
+def invalidate_roles():
+    """Call after changing roles/permissions outside save()/delete()."""
+    transaction.on_commit(lambda: _bump(ROLES_VERSION_KEY))
+
+
+def _stamps(*keys) -> tuple:
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # Start unknown stamps from the clock, never from a value an old snapshot could carry
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        found.update(cache.get_many(missing))
+    return tuple(found.get(key) for key in keys)
+
+
+def roles_version():
+    return _stamps(ROLES_VERSION_KEY)[0]
+
+
+def versions(user) -> tuple:
+    """(user version, roles version) for `user`: as read by get_user() for this request, else from the cache."""
+    stamps = getattr(user, "_auth_versions", None)
+    return stamps if stamps is not None else _stamps(_user_version_key(user.pk), ROLES_VERSION_KEY)
+
+
+# =====================================================
+# 📸 Snapshot ↔ model instances
+# =====================================================
+def _fields(instance, exclude=()) -> dict | None:
+    if instance is None:
+        return None
+    return {
+        f.attname: getattr(instance, f.attname)
+        for f in instance._meta.concrete_fields
+        if f.attname not in exclude
+    }
+
+
+def _snapshot(user) -> dict:
+    profile = user.profile if _has_profile(user) else None
+    role = profile.role if profile is not None else None
+    permissions = None
+    if role is not None:
+        try:
+            permissions = role.permissions
+        except Permission.DoesNotExist:
+            pass
+    return {
+        "user": _fields(user, USER_DEFERRED_FIELDS),
+        "profile": _fields(profile),
+        "role": _fields(role),
+        "permissions": _fields(permissions),
+    }
+
+
+def _has_profile(user) -> bool:
+    try:
+        user.profile
+    except UserProfile.DoesNotExist:
+        return False
+    return True
+
+
+def _instance(model, values: dict | None):
+    if values is None:
+        return None
+    return model.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+
+def _rebuild(snapshot: dict, stamps: tuple) -> CustomUser:
+    """Fresh instances per request (never shared between threads), wired like select_related."""
+    snapshot = copy.deepcopy(snapshot)  # JSON fields are mutable
+    user = _instance(CustomUser, snapshot["user"])
+    user._auth_versions = stamps  # see versions()
+    profile = _instance(UserProfile, snapshot["profile"])
+    CustomUser.profile.related.set_cached_value(user, profile)
+    if profile is not None:
+        UserProfile.user.field.set_cached_value(profile, user)
+        role = _instance(Role, snapshot["role"])
+        UserProfile.role.field.set_cached_value(profile, role)
+        if role is not None:
+            Role.permissions.related.set_cached_value(role, _instance(Permission, snapshot["permissions"]))
+    return user
+
+
+def _load(user_id) -> dict | None:
+    user = (
+        CustomUser.objects.select_related("profile__role__permissions")
+        .defer(*USER_DEFERRED_FIELDS)
+        .filter(pk=user_id)
+        .first()
+    )
+    return _snapshot(user) if user is not None else None
+
+
+# =====================================================
+# 🔑 Lookup
+# =====================================================
+def get_user(user_id) -> CustomUser | None:
+    """The user with profile/role/permissions attached, or None if it does not exist."""
+    from core.utils import rbac  # imports this module
+
+    user_version, roles_version = _stamps(_user_version_key(user_id), ROLES_VERSION_KEY)
+    rbac.get_table(roles_version)  # keep the compiled roles in step, for free
+    now = time.monotonic()
+
+    with _local_lock:
+        entry = _local.get(user_id)
+        if entry and entry[:2] == (user_version, roles_version) and now - entry[2] < settings.AUTH_CACHE_LOCAL_TTL_SECONDS:
+            _local.move_to_end(user_id)
+            return _rebuild(entry[3], (user_version, roles_version))
+
+    key = _snapshot_key(user_id, user_version, roles_version)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _load(user_id)
+        if snapshot is None:
+            return None
+        cache.set(key, snapshot, settings.AUTH_CACHE_TTL_SECONDS)
+
+    with _local_lock:
+        _local[user_id] = (user_version, roles_version, now, snapshot)
+        _local.move_to_end(user_id)
+        while len(_local) > settings.AUTH_CACHE_LOCAL_SIZE:
+            _local.popitem(last=False)
+    return _rebuild(snapshot, (user_version, roles_version))
@@ -0,0 +1,144 @@
+# core/utils/domain_roles.py
+"""
+Email domain → default role, resolved in memory.
+
+Every DomainRoleMapping is loaded into a trie keyed by domain labels from
+the right ("edu" → "university" → "student"), so a lookup walks the
+labels of the email domain once and keeps the deepest match:
+
+- "student.university.edu" matches that domain and its subdomains
+  (cs.student.university.edu);
+- "*.university.edu" matches subdomains only, not university.edu itself;
+- deeper entries win; at the same depth an exact entry beats a wildcard.
+
+Unmapped domains get the "Visitor" role. Roles are held as field values
+and handed out as fresh instances, so a lookup never queries the
+database. Like the SLA rule table, the trie follows a version stamp in the
+shared cache, moved whenever a mapping or role changes; each process
+checks it every DOMAIN_ROLES_CHECK_SECONDS.
+"""
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from core.models import DomainRoleMapping, Role
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "domain_roles:version"
+FALLBACK_ROLE = "Visitor"
+WILDCARD = "*"
+
+
+def normalize(domain: str) -> str:
+    """Lower-case domain without a trailing dot; accepts a full email address."""
+    return domain.rsplit("@", 1)[-1].strip().lower().rstrip(".")
+
+
+class _Node:
+    __slots__ = ("children", "role_id", "wildcard_role_id")
+
+    def __init__(self):
+        self.children = {}
+        self.role_id = None  # this domain and below
+        self.wildcard_role_id = None  # strictly below
+
+
+# =====================================================
+# 🌲 Suffix trie
+# =====================================================
+class DomainTable:
+    def __init__(self, mappings, roles: dict, fallback_id: int, version=None):
+        self.root = _Node()
+        self.roles = roles  # role_id → field values
+        self.fallback_id = fallback_id
+        self.version = version
+        for domain, role_id in mappings:
+            self.add(domain, role_id)
+
+    def add(self, domain: str, role_id: int):
+        labels = normalize(domain).split(".")
+        wildcard = labels[0] == WILDCARD
+        if wildcard:
+            labels = labels[1:]
+        node = self.root
+        for label in reversed(labels):
+            node = node.children.setdefault(label, _Node())
+        if wildcard:
+            node.wildcard_role_id = role_id
+        else:
+            node.role_id = role_id
+
+    def role_id_for(self, domain: str) -> int:
+        node, match = self.root, None
+        for label in reversed(normalize(domain).split(".")):
+            if node.wildcard_role_id is not None:  # covers any label below
+                match = node.wildcard_role_id
+            node = node.children.get(label)
+            if node is None:
+                break
+            if node.role_id is not None:
+                match = node.role_id
+        return match if match is not None else self.fallback_id
+
+    def role_for(self, domain: str) -> Role:
+        values = self.roles[self.role_id_for(domain)]
+        return Role.from_db(DEFAULT_DB_ALIAS, list(values), list(values.values()))
+
+
+def load_table(version=None) -> DomainTable:
+    fallback, _ = Role.objects.get_or_create(name=FALLBACK_ROLE, defaults={"description": "Unmapped domain"})
+    roles = {values["id"]: values for values in Role.objects.values(*(f.attname for f in Role._meta.concrete_fields))}
+    mappings = [
+        (domain, role_id)
+        for domain, role_id in DomainRoleMapping.objects.values_list("domain", "role_id")
+        if role_id in roles  # role deleted in between
+    ]
+    return DomainTable(mappings, roles, fallback.id, version)
+
+
+_table: DomainTable | None = None
+_checked_at = 0.0
+_table_lock = threading.Lock()
+
+
+def get_table() -> DomainTable:
+    """The trie, rebuilt when the shared version stamp moved (checked every DOMAIN_ROLES_CHECK_SECONDS)."""
+    global _table, _checked_at
+    now = time.monotonic()
+    table = _table
+    if table is not None and now - _checked_at < settings.DOMAIN_ROLES_CHECK_SECONDS:
+        return table
+
+    with _table_lock:
+        version = cache.get(VERSION_KEY)
+        if _table is None or _table.version != version:
+            started = time.perf_counter()
+            _table = load_table(version)
+            logger.info(f"[DomainRoles] Loaded mappings in {(time.perf_counter() - started) * 1000:.1f} ms")
+        _checked_at = now
+        return _table
+
+
+def invalidate():
+    """
+    Make every worker reload on its next lookup (called when mappings/roles change).
+    The stamp moves on commit: a worker that reloads earlier still sees the old rows.
+    """
+    transaction.on_commit(_bump)
+
+
+def _bump():
+    global _table
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    _table = None
+
+
+def resolve(domain: str) -> Role:
+    """Default role for an email domain (or address); the Visitor role if none is mapped."""
+    return get_table().role_for(domain)
@@ -1,11 +1,12 @@
 # core/utils/email_utils.py
 from django.conf import settings
-from django.core.mail import send_mail
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
 import logging
 
+from core.utils import outbox
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,26 +14,17 @@ def deliver_code(email: str, subject: str, body: str, code_type: str):
     """
     Deliver a code to the user via email.
     - In DEBUG mode → print to console instead of sending.
-    - In production → use Django's configured EMAIL_BACKEND.
+    - In production → queue it in the email outbox (core/utils/outbox.py);
+      it is sent after the current transaction commits.
     """
     if settings.DEBUG:
         # ✅ Print to console for local testing
         print(f"📧 DEBUG [{code_type}] for {email}: {body}")
         return True
 
-    try:
-        send_mail(
-            subject=subject,
-            message=body,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
-            fail_silently=False,
-        )
-        logger.info(f"📨 Sent {code_type} email to {email}")
-        return True
-    except Exception as e:
-        logger.error(f"❌ Failed to send {code_type} email to {email}: {e}")
-        return False
+    outbox.enqueue(email, subject, body, kind=code_type)
+    logger.info(f"📨 Queued {code_type} email to {email}")
+    return True
 
 
 def send_verification_email(user):
@@ -58,3 +50,24 @@ def send_verification_email(user):
 
     # Send or print based on DEBUG mode
     return deliver_code(user.email, subject, body, code_type="Email Verification")
+
+
+def invite_link(invite) -> str:
+    return f"http://127.0.0.1:8000/api/users/{invite.token}/accept_invite/"
+
+
+def invite_message(invite):
+    """Outbox row for an invite (invite.role must be loaded)."""
+    return outbox.message(
+        invite.email,
+        "You're invited to FixItWeb",
+        (
+            f"Hi,\n\n"
+            f"You have been invited to join FixItWeb as {invite.role.name}.\n"
+            f"Set your password here:\n\n"
+            f"{invite_link(invite)}\n\n"
+            f"The link expires on {invite.expires_at:%Y-%m-%d %H:%M}."
+        ),
+        kind="invite",
+        key=f"invite:{invite.token}",
+    )
@@ -0,0 +1,289 @@
+# core/utils/escalation.py
+"""
+Set-based ticket escalation.
+
+Instead of loading every open ticket and calling Ticket.auto_escalate()
+(one UPDATE + several audit inserts per ticket), a run:
+
+    1. locks the tickets whose indexed `next_escalation_at` has passed,
+       so its cost is O(due tickets), not O(backlog);
+    2. decides each one's new level and next deadline from the compiled
+       SLA table (core/utils/sla.py; an O(log n) calendar lookup each);
+    3. writes every change with one UPDATE, then one TicketEvent insert
+       and one AuditLog insert for the tickets that moved up a level.
+
+On PostgreSQL the writes are `... FROM unnest(...)` statements; elsewhere
+bulk_update / batched bulk_create. Ticket post_save signals are not sent.
+Due tickets whose level does not change (their policy was relaxed) are
+only rescheduled.
+"""
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import connection, connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from core.db_routers import defer_audit_write
+from core.models import AuditLog, Ticket, TicketEvent
+from core.utils import sla
+
+logger = logging.getLogger(__name__)
+
+BULK_BATCH_SIZE = 2000
+RESCHEDULED_VERSION_KEY = "sla:rules:rescheduled_version"
+
+
+@dataclass(frozen=True)
+class Escalated:
+    ticket_id: int
+    reporter_id: int | None
+    old_level: str
+    new_level: str
+
+
+# =====================================================
+# 🔁 Due tickets → one UPDATE
+# =====================================================
+def _lock_due(now: datetime) -> list[tuple]:
+    """Due tickets through the partial index, locked; rows another run already holds are skipped."""
+    return list(
+        Ticket.objects.filter(next_escalation_at__lte=now)
+        .exclude(status__in=Ticket.INACTIVE_STATUSES)
+        .select_for_update(skip_locked=True, of=("self",))
+        .values_list(
+            "id", "reporter_id", "escalation_level",
+            "category", "location__building_name", "urgency", "created_at",
+        )
+    )
+
+
+def _plan(rows: list[tuple], now: datetime) -> tuple[list[tuple], list[Escalated]]:
+    """(ticket_id, level, next_escalation_at) for every row, plus the ones that escalate."""
+    table = sla.get_rule_table()
+    updates, escalated = [], []
+    for ticket_id, reporter_id, level, category, building, urgency, created_at in rows:
+        deadlines = table.deadlines(category, building, urgency, created_at)
+        new_level = deadlines.target_level(level, now)
+        if new_level is not None:
+            escalated.append(Escalated(ticket_id, reporter_id, level, new_level))
+            level = new_level
+        updates.append((ticket_id, level, deadlines.next_for(level)))
+    return updates, escalated
+
+
+def _update_tickets_unnest(updates: list[tuple], now: datetime):
+    """PostgreSQL: every level/deadline change in one UPDATE."""
+    ids, levels, next_ats = zip(*updates)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {Ticket._meta.db_table} AS t
+            SET escalation_level = u.level, next_escalation_at = u.next_at, updated_at = %s
+            FROM unnest(%s::bigint[], %s::text[], %s::timestamptz[]) AS u(id, level, next_at)
+            WHERE t.id = u.id
+            """,
+            [now, list(ids), list(levels), list(next_ats)],
+        )
+
+
+def _update_tickets_portable(updates: list[tuple], now: datetime):
+    Ticket.objects.bulk_update(
+        [
+            Ticket(id=ticket_id, escalation_level=level, next_escalation_at=next_at, updated_at=now)
+            for ticket_id, level, next_at in updates
+        ],
+        ["escalation_level", "next_escalation_at", "updated_at"],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+
+# =====================================================
+# 🧾 Bulk side effects
+# =====================================================
+# Values come from target_ticket_id and extra on read (AuditLog.format_details)
+AUDIT_DETAILS = "Ticket #{ticket} escalated automatically from {from} to {to}."
+
+
+def _write_events_unnest(escalated: list[Escalated], now: datetime):
+    """PostgreSQL: one INSERT ... SELECT over unnest(); the next seq per ticket comes from one grouped join."""
+    table = TicketEvent._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH u AS (
+                SELECT * FROM unnest(%s::bigint[], %s::text[], %s::text[]) AS u(ticket_id, old_level, new_level)
+            ), last AS (
+                SELECT ev.ticket_id, MAX(ev.seq) AS seq
+                FROM {table} ev JOIN u ON u.ticket_id = ev.ticket_id
+                GROUP BY ev.ticket_id
+            )
+            INSERT INTO {table} (ticket_id, seq, type, actor_id, payload, created_at)
+            SELECT u.ticket_id, COALESCE(last.seq, 0) + 1, %s, NULL,
+                   jsonb_build_object('from', u.old_level, 'to', u.new_level, 'automatic', true),
+                   %s
+            FROM u LEFT JOIN last ON last.ticket_id = u.ticket_id
+            """,
+            [
+                [e.ticket_id for e in escalated],
+                [e.old_level for e in escalated],
+                [e.new_level for e in escalated],
+                TicketEvent.Type.ESCALATED,
+                now,
+            ],
+        )
+
+
+def _write_events_portable(escalated: list[Escalated], now: datetime):
+    """Append one `escalated` event per ticket (rows are still locked by the UPDATE)."""
+    ids = [e.ticket_id for e in escalated]
+    last_seq = {}
+    for start in range(0, len(ids), BULK_BATCH_SIZE):
+        chunk = ids[start:start + BULK_BATCH_SIZE]
+        last_seq.update(
+            TicketEvent.objects.filter(ticket_id__in=chunk)
+            .values("ticket_id")
+            .annotate(last=Max("seq"))
+            .values_list("ticket_id", "last")
+        )
+    TicketEvent.objects.bulk_create(
+        [
+            TicketEvent(
+                ticket_id=e.ticket_id,
+                seq=last_seq.get(e.ticket_id, 0) + 1,
+                type=TicketEvent.Type.ESCALATED,
+                payload={"from": e.old_level, "to": e.new_level, "automatic": True},
+                created_at=now,
+            )
+            for e in escalated
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+
+def _insert_audits(escalated: list[Escalated], now: datetime):
+    action = AuditLog.Action.TICKET_ESCALATED
+    high_sensitivity = AuditLog.is_high_sensitivity_action(action)  # neither path goes through save()
+    audit_connection = connections[router.db_for_write(AuditLog)]
+
+    if audit_connection.vendor == "postgresql":
+        qn = audit_connection.ops.quote_name
+        with audit_connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {qn(AuditLog._meta.db_table)}
+                    (action, performed_by_id, target_user_id, target_ticket_id,
+                     details, extra, {qn("timestamp")}, high_sensitivity)
+                SELECT %s, NULL, u.reporter_id, u.ticket_id,
+                       %s, jsonb_build_object('from', u.old_level, 'to', u.new_level),
+                       %s, %s
+                FROM unnest(%s::bigint[], %s::bigint[], %s::text[], %s::text[])
+                    AS u(ticket_id, reporter_id, old_level, new_level)
+                """,
+                [
+                    action,
+                    AUDIT_DETAILS,
+                    now,
+                    high_sensitivity,
+                    [e.ticket_id for e in escalated],
+                    [e.reporter_id for e in escalated],
+                    [e.old_level for e in escalated],
+                    [e.new_level for e in escalated],
+                ],
+            )
+        return
+
+    AuditLog.objects.bulk_create(
+        [
+            AuditLog(
+                action=action,
+                performed_by=None,  # system
+                target_user_id=e.reporter_id,
+                target_ticket_id=e.ticket_id,
+                details=AUDIT_DETAILS,
+                extra={"from": e.old_level, "to": e.new_level},
+                timestamp=now,
+                high_sensitivity=high_sensitivity,
+            )
+            for e in escalated
+        ],
+        batch_size=BULK_BATCH_SIZE,
+    )
+
+
+# =====================================================
+# 🚨 Entry points
+# =====================================================
+def escalate_due_tickets(now: datetime | None = None, fence=None) -> dict:
+    """
+    Escalate every due ticket in one transaction.
+    `fence` (e.g. Lease.verify) is called just before commit; raising rolls the run back.
+    Returns {"secondary": n, "admin": n, "rescheduled": n, "total": n}; total counts escalations.
+    """
+    now = now or timezone.now()
+    if connection.vendor == "postgresql":
+        update_tickets, write_events = _update_tickets_unnest, _write_events_unnest
+    else:
+        update_tickets, write_events = _update_tickets_portable, _write_events_portable
+
+    with transaction.atomic():
+        updates, escalated = _plan(_lock_due(now), now)
+        if updates:
+            update_tickets(updates, now)
+        if escalated:
+            write_events(escalated, now)
+            defer_audit_write(lambda: _insert_audits(escalated, now))
+        if fence is not None:
+            fence()
+
+    summary = {
+        "secondary": sum(e.new_level == Ticket.Escalation.SECONDARY for e in escalated),
+        "admin": sum(e.new_level == Ticket.Escalation.ADMIN for e in escalated),
+        "rescheduled": len(updates) - len(escalated),
+        "total": len(escalated),
+    }
+    logger.info(f"[Escalation] {summary}")
+    return summary
+
+
+def reschedule_open_tickets() -> int:
+    """
+    Recompute next_escalation_at for every open ticket (after SLA policies change).
+    O(backlog), in chunks of BULK_BATCH_SIZE; returns the number of tickets updated.
+    """
+    table = sla.get_rule_table()
+    update_tickets = _update_tickets_unnest if connection.vendor == "postgresql" else _update_tickets_portable
+    open_tickets = (
+        Ticket.objects.exclude(status__in=Ticket.INACTIVE_STATUSES)
+        .values_list("id", "escalation_level", "category", "location__building_name", "urgency", "created_at")
+        .order_by("id")
+    )
+    now = timezone.now()
+    count = 0
+    last_id = 0
+    while True:
+        chunk = list(open_tickets.filter(id__gt=last_id)[:BULK_BATCH_SIZE])
+        if not chunk:
+            break
+        updates = [
+            (ticket_id, level, table.deadlines(category, building, urgency, created_at).next_for(level))
+            for ticket_id, level, category, building, urgency, created_at in chunk
+        ]
+        with transaction.atomic():
+            update_tickets(updates, now)
+        count += len(updates)
+        last_id = chunk[-1][0]
+    return count
+
+
+def reschedule_if_rules_changed() -> int | None:
+    """Run reschedule_open_tickets() once per SLA rules version; None when nothing changed."""
+    version = sla.rules_version()
+    if version is None or cache.get(RESCHEDULED_VERSION_KEY) == version:
+        return None
+    count = reschedule_open_tickets()
+    cache.set(RESCHEDULED_VERSION_KEY, version, None)
+    logger.info(f"[Escalation] SLA rules changed, rescheduled {count} open tickets")
+    return count
@@ -0,0 +1,123 @@
+# core/utils/invites.py
+"""
+Invite creation for one email or a whole crew.
+
+create_invites() validates the list with two set queries — existing
+accounts and unused invites, both case-insensitive and served by UPPER(email)
+indexes — then inserts the new invites with one bulk_create. Expired
+unused invites for the same emails are deleted first, since only one
+unused invite per email may exist. Checks and insert run in one
+transaction; if a concurrent request invited one of the emails meanwhile,
+the unique constraint stops the insert and the whole round is re-run.
+
+The invite emails are written to the email outbox in the same
+transaction and go out in batches over one SMTP session
+(core/utils/outbox.py).
+"""
+import logging
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models.functions import Upper
+from django.utils import timezone
+
+from core.db_routers import defer_audit_write
+from core.models import AuditLog, Invite
+from core.utils import email_utils, outbox
+
+logger = logging.getLogger(__name__)
+User = get_user_model()
+
+SELF_SERVICE_ROLES = {"student"}  # these register themselves; no invites
+INSERT_ATTEMPTS = 3  # check + insert rounds when concurrent requests invite the same email
+
+
+def is_invitable(role) -> bool:
+    return role.name.lower() not in SELF_SERVICE_ROLES
+
+
+def create_invites(emails, role, created_by) -> tuple[list[Invite], list[dict]]:
+    """
+    Invite every new email in `emails` as `role`.
+    Returns (created invites, skipped emails as {"email", "reason"}).
+    """
+    skipped, wanted = [], {}
+    for raw in emails:
+        email = (raw or "").strip().lower()
+        try:
+            validate_email(email)
+        except ValidationError:
+            skipped.append({"email": raw, "reason": "invalid email"})
+            continue
+        if email in wanted:
+            skipped.append({"email": raw, "reason": "duplicate in request"})
+            continue
+        wanted[email] = raw
+
+    for attempt in range(1, INSERT_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                new, expired_ids, taken = _diff(wanted, role, created_by)
+                if expired_ids:
+                    Invite.objects.filter(id__in=expired_ids, is_used=False).delete()
+                invites = Invite.objects.bulk_create(new)
+                outbox.enqueue_many([email_utils.invite_message(invite) for invite in invites])
+            break
+        except IntegrityError:
+            # A concurrent request invited one of these emails after our checks: diff again
+            if attempt == INSERT_ATTEMPTS:
+                raise
+            logger.info(f"[Invites] Concurrent invite for the same email, retrying ({attempt}/{INSERT_ATTEMPTS})")
+    skipped += taken
+
+    if invites:
+        action = AuditLog.Action.INVITE_CREATED
+        audits = [
+            AuditLog(
+                action=action,
+                performed_by=created_by,
+                target_invite_id=invite.id,
+                details="Invite for {email} ({role})",
+                extra={"email": invite.email, "role": role.name},
+                high_sensitivity=AuditLog.is_high_sensitivity_action(action),  # bulk_create skips save()
+            )
+            for invite in invites
+        ]
+        defer_audit_write(lambda: AuditLog.objects.bulk_create(audits))
+        logger.info(f"[Invites] {len(invites)} {role.name} invites created, {len(skipped)} skipped")
+    return invites, skipped
+
+
+def _diff(wanted: dict, role, created_by) -> tuple[list[Invite], list[int], list[dict]]:
+    """(unsaved new invites, expired unused invite ids to delete, skipped emails) for `wanted` email → raw."""
+    now = timezone.now()
+    upper = [email.upper() for email in wanted]
+    registered = set(
+        User.objects.annotate(email_upper=Upper("email"))
+        .filter(email_upper__in=upper)
+        .values_list("email_upper", flat=True)
+    )
+    active, expired_ids = set(), []
+    for invite_id, email_upper, expires_at in (
+        Invite.objects.annotate(email_upper=Upper("email"))
+        .filter(email_upper__in=upper, is_used=False)
+        .values_list("id", "email_upper", "expires_at")
+    ):
+        if expires_at and expires_at <= now:
+            expired_ids.append(invite_id)
+        else:
+            active.add(email_upper)
+
+    new, skipped = [], []
+    for email, raw in wanted.items():
+        if email.upper() in registered:
+            skipped.append({"email": raw, "reason": "user already exists"})
+        elif email.upper() in active:
+            skipped.append({"email": raw, "reason": "active invite already exists"})
+        else:
+            invite = Invite(email=email, role=role, created_by=created_by)
+            invite.apply_defaults()  # bulk_create skips save()
+            new.append(invite)
+    return new, expired_ids, skipped
@@ -0,0 +1,162 @@
+# core/utils/last_login.py
+"""
+Write-behind buffer for CustomUser.last_login.
+
+Every login used to UPDATE its user row on the spot, for a value nobody
+reads in real time; at the morning rush that is a write per login on the
+hottest rows of the table. Now a login only touches the shared cache:
+
+- logins fall into time buckets of LAST_LOGIN_FLUSH_SECONDS;
+- per bucket, each user has one slot holding their latest login. A
+  user's first login in a bucket also appends their id to the bucket's
+  list (an incr'd counter + one key per entry), so nothing is
+  read-modify-written;
+- flush() (the `flush_last_logins` task, every minute under a lease)
+  takes every closed bucket, keeps the latest login per user and writes
+  them in one UPDATE ... FROM unnest(...) per WRITE_BATCH_SIZE users,
+  never moving last_login backwards.
+
+Staleness is bounded: a login reaches the database at most
+LAST_LOGIN_FLUSH_SECONDS + FLUSH_GRACE_SECONDS + the beat interval after it
+happened (about two minutes with the defaults). Buffered entries expire
+after BUFFER_TTL_SECONDS, so a flusher that is down for longer loses that
+history instead of filling the cache.
+
+With LAST_LOGIN_WRITE_BEHIND = False, record() writes through.
+"""
+import logging
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "last_login"
+FLUSHED_KEY = f"{_KEY_PREFIX}:flushed"  # last bucket written to the database
+FLUSH_GRACE_SECONDS = 5  # a bucket is flushed this long after it closes (in-flight record() calls)
+BUFFER_TTL_SECONDS = 24 * 3600
+WRITE_BATCH_SIZE = 5000
+
+
+def _bucket(when: datetime) -> int:
+    return int(when.timestamp() // settings.LAST_LOGIN_FLUSH_SECONDS)
+
+
+def _count_key(bucket: int) -> str:
+    return f"{_KEY_PREFIX}:{bucket}:count"
+
+
+def _entry_key(bucket: int, n: int) -> str:
+    return f"{_KEY_PREFIX}:{bucket}:entry:{n}"
+
+
+def _user_key(bucket: int, user_id) -> str:
+    return f"{_KEY_PREFIX}:{bucket}:user:{user_id}"
+
+
+def _append(bucket: int, user_id):
+    key = _count_key(bucket)
+    cache.add(key, 0, BUFFER_TTL_SECONDS)
+    try:
+        n = cache.incr(key)
+    except ValueError:  # evicted in between
+        cache.add(key, 0, BUFFER_TTL_SECONDS)
+        n = cache.incr(key)
+    cache.set(_entry_key(bucket, n), user_id, BUFFER_TTL_SECONDS)
+
+
+# =====================================================
+# ✍️ Record
+# =====================================================
+def record(user):
+    """Note a login now (instead of update_last_login); `user.last_login` is set right away."""
+    when = timezone.now()
+    user.last_login = when
+    if not settings.LAST_LOGIN_WRITE_BEHIND:
+        CustomUser.objects.filter(pk=user.pk).update(last_login=when)
+        return
+
+    bucket = _bucket(when)
+    if cache.add(_user_key(bucket, user.pk), when, BUFFER_TTL_SECONDS):
+        _append(bucket, user.pk)
+    else:  # already listed in this bucket: only the time moves
+        cache.set(_user_key(bucket, user.pk), when, BUFFER_TTL_SECONDS)
+
+
+# =====================================================
+# 💾 Flush
+# =====================================================
+def _write_unnest(rows: list[tuple]):
+    """PostgreSQL: every user of the batch in one UPDATE."""
+    user_ids, logins = zip(*rows)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            UPDATE {CustomUser._meta.db_table} AS u
+            SET last_login = v.last_login
+            FROM unnest(%s::bigint[], %s::timestamptz[]) AS v(id, last_login)
+            WHERE u.id = v.id AND (u.last_login IS NULL OR u.last_login < v.last_login)
+            """,
+            [list(user_ids), list(logins)],
+        )
+
+
+def _write_portable(rows: list[tuple]):
+    with transaction.atomic():
+        for user_id, when in rows:
+            CustomUser.objects.filter(Q(last_login__isnull=True) | Q(last_login__lt=when), pk=user_id).update(
+                last_login=when
+            )
+
+
+def _collect(buckets: range) -> tuple[dict, list]:
+    """Latest login per user over `buckets`, and the cache keys that held them."""
+    latest, keys = {}, []
+    counts = cache.get_many([_count_key(b) for b in buckets])
+    for bucket in buckets:
+        count = counts.get(_count_key(bucket), 0)
+        if not count:
+            continue
+        entry_keys = [_entry_key(bucket, n) for n in range(1, count + 1)]
+        user_keys = {_user_key(bucket, user_id): user_id for user_id in cache.get_many(entry_keys).values()}
+        for key, when in cache.get_many(list(user_keys)).items():
+            user_id = user_keys[key]
+            if user_id not in latest or when > latest[user_id]:
+                latest[user_id] = when
+        keys += [_count_key(bucket), *entry_keys, *user_keys]
+    return latest, keys
+
+
+def flush(now: datetime | None = None, fence=None) -> int:
+    """
+    Write the buffered logins of every closed bucket; returns the number of users updated.
+    `fence` (e.g. Lease.verify) runs before writing.
+    """
+    now = now or timezone.now()
+    last_closed = int((now.timestamp() - FLUSH_GRACE_SECONDS) // settings.LAST_LOGIN_FLUSH_SECONDS) - 1
+    flushed = cache.get(FLUSHED_KEY)
+    if flushed is None:  # first run: anything still buffered
+        flushed = last_closed - BUFFER_TTL_SECONDS // settings.LAST_LOGIN_FLUSH_SECONDS - 1
+    buckets = range(flushed + 1, last_closed + 1)
+    if not buckets:
+        return 0
+
+    latest, keys = _collect(buckets)
+    if latest:
+        if fence is not None:
+            fence()
+        write = _write_unnest if connection.vendor == "postgresql" else _write_portable
+        rows = sorted(latest.items())  # id order: concurrent flushes lock rows in the same order
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            write(rows[start:start + WRITE_BATCH_SIZE])
+    cache.set(FLUSHED_KEY, last_closed, None)
+    cache.delete_many(keys)
+    if latest:
+        logger.info(f"[LastLogin] Flushed {len(latest)} users from {len(buckets)} buckets")
+    return len(latest)
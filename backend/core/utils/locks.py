@@ -0,0 +1,287 @@
+# core/utils/locks.py
+"""
+Lease locks for periodic Celery tasks, kept in the shared cache.
+
+With several beat schedulers or overlapping workers, the same periodic task
+can start twice. A task wrapped in @single_instance first takes a lease:
+
+- acquire: `cache.add(lease key, token)` succeeds for exactly one caller.
+  The token is a fencing token from a per-task `incr` counter, so it grows
+  with every acquisition, and a later holder always has a larger token;
+- renewal: while the task runs, a daemon thread extends the lease every
+  ttl / 3 seconds, but only while the key still holds our token. A run can
+  therefore last longer than the ttl, and a crashed worker's lease expires
+  after at most `ttl` seconds;
+- release: the key is deleted only if it still holds our token;
+- fencing: if a renewal finds another token (the lease expired, e.g. after
+  a long GC pause, and someone else took it), the lease is marked lost.
+  `Lease.verify()` then raises LeaseLost, so a caller can abort before it
+  commits (see escalation.escalate_due_tickets(fence=...)).
+
+A lease only excludes other processes when the cache is shared
+(core.checks.cache_is_shared). On a per-process cache it is refused when
+settings.SHARED_CACHE_REQUIRED is on; in DEBUG and tests it is granted with
+a warning, logged once, that it only guards this process.
+
+On Django's RedisCache, compare-and-extend and compare-and-delete are
+single Lua scripts (the client comes from _redis_client()). Other backends
+(locmem in development) fall back to get + touch/delete.
+
+Per-task counters (acquired / skipped / lost) and the last holder are kept
+in the cache for `manage.py task_leases`.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.redis import RedisCache
+from django.utils import timezone
+
+from core.checks import cache_is_shared
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "task_lease"
+STATS = ("acquired", "skipped", "lost")
+
+# Task lease name → ttl override, for every @single_instance task (see task_leases)
+registry: dict[str, int | None] = {}
+
+_local = threading.local()
+_adapter_warned = False  # _redis_client() fallback logged once
+_local_cache_warned = False  # per-process cache warning logged once
+
+_EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaseLost(RuntimeError):
+    """The lease expired and may be held by another run."""
+
+
+def _key(name: str, part: str = "") -> str:
+    return f"{_KEY_PREFIX}:{name}{':' + part if part else ''}"
+
+
+def _count(name: str, stat: str):
+    key = _key(name, stat)
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:  # evicted between add() and incr()
+        cache.set(key, 1, None)
+
+
+def _next_token(name: str) -> int:
+    key = _key(name, "token")
+    cache.add(key, 0, None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Counter evicted: restart from the clock so tokens still grow
+        token = time.time_ns()
+        cache.set(key, token, None)
+        return token
+
+
+def _redis_client(key: str):
+    """
+    (redis-py client, raw key) for the server holding `key` in the default
+    cache, or None when that cache is not Django's RedisCache.
+
+    RedisCache has no public accessor for its client, so this reaches
+    through `RedisCache._cache.get_client()`. The backend type and that
+    attribute are both checked: on any other backend, or if a Django
+    upgrade moves the attribute, callers get None and use plain cache
+    operations instead (not atomic, like in development).
+    """
+    global _adapter_warned
+    backend = caches[DEFAULT_CACHE_ALIAS]  # `cache` is a proxy: isinstance() needs the backend itself
+    if not isinstance(backend, RedisCache):
+        return None
+    get_client = getattr(getattr(backend, "_cache", None), "get_client", None)
+    if get_client is None:
+        if not _adapter_warned:
+            _adapter_warned = True
+            logger.warning("[Lease] RedisCache client not reachable, leases fall back to non-atomic get/touch/delete")
+        return None
+    raw_key = backend.make_and_validate_key(key)
+    return get_client(raw_key, write=True), raw_key
+
+
+def _redis_call(script: str, key: str, *args):
+    """Run a Lua script on the raw key; None when the cache is not Redis (see _redis_client)."""
+    found = _redis_client(key)
+    if found is None:
+        return None
+    client, raw_key = found
+    return client.eval(script, 1, raw_key, *args)
+
+
+# =====================================================
+# 🔒 Lease
+# =====================================================
+class Lease:
+    """One attempt at holding `name` for up to `ttl` seconds, renewed while held."""
+
+    def __init__(self, name: str, ttl: int | None = None):
+        self.name = name
+        self.ttl = ttl or settings.TASK_LEASE_TTL_SECONDS
+        self.token: int | None = None
+        self.acquired_at: float | None = None
+        self._renewed_at: float | None = None
+        self._lost = threading.Event()
+        self._stop = threading.Event()
+        self._renewer: threading.Thread | None = None
+
+    # ---------- state ----------
+    @property
+    def held(self) -> bool:
+        return self.token is not None and not self._lost.is_set()
+
+    @property
+    def lost(self) -> bool:
+        return self._lost.is_set()
+
+    def verify(self):
+        """Raise LeaseLost unless this run still holds the lease (call before committing)."""
+        if not self.held:
+            raise LeaseLost(f"Lease {self.name!r} (token {self.token}) is no longer held.")
+
+    # ---------- acquire / release ----------
+    def acquire(self) -> bool:
+        if not self._cache_usable():
+            return False
+        token = _next_token(self.name)
+        if not cache.add(_key(self.name), token, self.ttl):
+            _count(self.name, "skipped")
+            logger.info(f"[Lease] {self.name} is held by another run (token {cache.get(_key(self.name))}), skipping")
+            return False
+
+        self.token = token
+        self.acquired_at = self._renewed_at = time.monotonic()
+        _count(self.name, "acquired")
+        cache.set(
+            _key(self.name, "last"),
+            {"token": token, "host": socket.gethostname(), "pid": os.getpid(), "acquired_at": timezone.now()},
+            None,
+        )
+        self._renewer = threading.Thread(target=self._renew_loop, name=f"lease-{self.name}", daemon=True)
+        self._renewer.start()
+        return True
+
+    def _cache_usable(self) -> bool:
+        """False when the cache cannot exclude other processes and a shared one is required."""
+        global _local_cache_warned
+        if cache_is_shared():
+            return True
+        if settings.SHARED_CACHE_REQUIRED:
+            logger.error(f"[Lease] {self.name}: the cache is per process, refusing the lease (system check core.E001)")
+            return False
+        if not _local_cache_warned:
+            _local_cache_warned = True
+            logger.warning("[Lease] The cache is per process: leases only keep runs apart within one process")
+        return True
+
+    def release(self):
+        if self.token is None:
+            return
+        self._stop.set()
+        if self._renewer is not None:
+            self._renewer.join(timeout=5)
+        if not self._lost.is_set():
+            released = _redis_call(_RELEASE_SCRIPT, _key(self.name), self.token)
+            if released is None and cache.get(_key(self.name)) == self.token:
+                cache.delete(_key(self.name))
+        duration = time.monotonic() - self.acquired_at
+        last = cache.get(_key(self.name, "last"))
+        if last and last.get("token") == self.token:
+            cache.set(_key(self.name, "last"), {**last, "duration": round(duration, 3), "lost": self.lost}, None)
+        logger.info(f"[Lease] {self.name} released (token {self.token}, held {duration:.1f}s)")
+
+    # ---------- renewal ----------
+    def _extend(self) -> bool:
+        extended = _redis_call(_EXTEND_SCRIPT, _key(self.name), self.token, self.ttl * 1000)
+        if extended is not None:
+            return bool(extended)
+        if cache.get(_key(self.name)) != self.token:
+            return False
+        return cache.touch(_key(self.name), self.ttl)
+
+    def _renew_loop(self):
+        interval = max(1.0, self.ttl / 3)
+        while not self._stop.wait(interval):
+            try:
+                ok = self._extend()
+                if ok:
+                    self._renewed_at = time.monotonic()
+            except Exception as e:  # cache unreachable: keep trying until the lease would have expired
+                logger.warning(f"[Lease] {self.name} renewal failed: {e}")
+                ok = time.monotonic() - self._renewed_at < self.ttl
+            if not ok:
+                self._lost.set()
+                _count(self.name, "lost")
+                logger.warning(f"[Lease] {self.name} lost (token {self.token}); another run may have taken over")
+                return
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+def current_lease() -> Lease | None:
+    """The lease of the @single_instance task running in this thread."""
+    return getattr(_local, "lease", None)
+
+
+def single_instance(name: str | None = None, ttl: int | None = None):
+    """
+    Run the wrapped task only while holding its lease; otherwise return a
+    "skipped" message without running it. Put it under @shared_task.
+    """
+    def decorator(func):
+        lease_name = name or func.__name__
+        registry[lease_name] = ttl
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with Lease(lease_name, ttl) as lease:
+                if not lease.held:
+                    return f"[{lease_name}] Skipped at {timezone.now():%Y-%m-%d %H:%M}, another run holds the lease."
+                previous, _local.lease = current_lease(), lease
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    _local.lease = previous
+        return wrapper
+    return decorator
+
+
+def stats(name: str) -> dict:
+    """Counters and the last holder of one lease."""
+    keys = {stat: _key(name, stat) for stat in STATS}
+    values = cache.get_many([*keys.values(), _key(name), _key(name, "last")])
+    return {
+        **{stat: values.get(key, 0) for stat, key in keys.items()},
+        "held_by": values.get(_key(name)),
+        "last": values.get(_key(name, "last")),
+    }
@@ -0,0 +1,338 @@
+# core/utils/login_anomaly.py
+"""
+Streaming detector for failed-login bursts (credential stuffing, password
+spraying). It never reads AuditLog: every failure is counted in memory.
+
+Per dimension ("ip", "email") the detector keeps:
+- a sliding window of count-min sketches, one per time bucket
+  (LOGIN_ANOMALY_BUCKET_SECONDS), summed over LOGIN_ANOMALY_WINDOW_SECONDS;
+- a Space-Saving top-k summary per bucket, for "who is hammering us".
+
+Each worker counts locally and, every LOGIN_ANOMALY_FLUSH_SECONDS, adds its
+delta into the shared copy in the cache (sketches merge by cell-wise
+addition) and pulls back the merged view. Estimates are shared view +
+local delta, so every worker sees the whole fleet with at most one flush
+interval of lag.
+
+When an estimate crosses its threshold the detector logs a warning, sends
+`login_anomaly_detected`, and with LOGIN_ANOMALY_AUTO_THROTTLE blocks the
+ip/email for LOGIN_ANOMALY_BLOCK_SECONDS (see core.throttles.LoginAnomalyThrottle).
+"""
+import hashlib
+import logging
+import threading
+import time
+from array import array
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+
+logger = logging.getLogger(__name__)
+
+# Sent with: dimension ("ip" / "email"), key, estimate, window_seconds
+login_anomaly_detected = Signal()
+
+DIMENSIONS = ("ip", "email")
+_KEY_PREFIX = "login_anomaly"
+
+
+def _setting(name, default):
+    return getattr(settings, f"LOGIN_ANOMALY_{name}", default)
+
+
+def _digest(value: str) -> str:
+    """Cache keys never carry raw emails/IPs."""
+    return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+# =====================================================
+# 📐 Sketches
+# =====================================================
+@lru_cache(maxsize=4096)
+def _cells(key: str, width: int, depth: int) -> tuple:
+    """Flat cell index of `key` in each row (double hashing on one blake2b digest)."""
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return tuple(row * width + (h1 + row * h2) % width for row in range(depth))
+
+
+class CountMinSketch:
+    """depth x width counters in one flat array; merging is cell-wise addition."""
+
+    def __init__(self, width: int, depth: int, table: array | None = None):
+        self.width = width
+        self.depth = depth
+        self.table = table if table is not None else array("I", bytes(4 * width * depth))
+
+    @classmethod
+    def from_bytes(cls, width: int, depth: int, blob: bytes | None):
+        sketch = cls(width, depth)
+        if blob and len(blob) == 4 * width * depth:
+            sketch.table = array("I", blob)
+        return sketch
+
+    def to_bytes(self) -> bytes:
+        return self.table.tobytes()
+
+    def add_cells(self, cells: dict):
+        """Add a sparse {cell: count} delta."""
+        for cell, count in cells.items():
+            self.table[cell] += count
+
+    def cells(self, key: str) -> tuple:
+        return _cells(key, self.width, self.depth)
+
+
+class SpaceSaving:
+    """Top-k heavy hitters in O(capacity) memory (Metwally et al.)."""
+
+    def __init__(self, capacity: int, counts: dict | None = None):
+        self.capacity = capacity
+        self.counts = dict(counts or {})
+
+    def offer(self, key: str, count: int = 1):
+        if key in self.counts:
+            self.counts[key] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = count
+        else:
+            # Replace the smallest entry; its count becomes the new key's error bound
+            victim = min(self.counts, key=self.counts.get)
+            floor = self.counts.pop(victim)
+            self.counts[key] = floor + count
+
+    def merge(self, other: dict):
+        for key, count in other.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        if len(self.counts) > self.capacity:
+            keep = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[: self.capacity]
+            self.counts = dict(keep)
+
+    def top(self, k: int) -> list:
+        return sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:k]
+
+
+# =====================================================
+# 🚨 Detector
+# =====================================================
+class LoginAnomalyDetector:
+    def __init__(self):
+        self.window = _setting("WINDOW_SECONDS", 600)
+        self.bucket_seconds = _setting("BUCKET_SECONDS", 60)
+        self.width = _setting("SKETCH_WIDTH", 2048)
+        self.depth = _setting("SKETCH_DEPTH", 4)
+        self.top_k = _setting("TOP_K", 20)
+        self.flush_seconds = _setting("FLUSH_SECONDS", 5)
+        self.thresholds = {
+            "ip": _setting("IP_THRESHOLD", 50),
+            "email": _setting("EMAIL_THRESHOLD", 20),
+        }
+
+        self._lock = threading.Lock()
+        self._delta = {}       # (dim, bucket) -> {cell: count}   not yet flushed
+        self._delta_top = {}   # (dim, bucket) -> SpaceSaving      not yet flushed
+        self._shared = {}      # (dim, bucket) -> CountMinSketch   merged view from the cache
+        self._tripped = {}     # (dim, key) -> monotonic time the alert expires
+        self._last_flush = time.monotonic()
+
+    # ---------- Buckets ----------
+    def _bucket(self, now: float) -> int:
+        return int(now // self.bucket_seconds)
+
+    def _window_buckets(self, now: float) -> range:
+        current = self._bucket(now)
+        count = max(1, self.window // self.bucket_seconds)
+        return range(current - count + 1, current + 1)
+
+    @staticmethod
+    def _sketch_key(dim, bucket):
+        return f"{_KEY_PREFIX}:cms:{dim}:{bucket}"
+
+    @staticmethod
+    def _top_key(dim, bucket):
+        return f"{_KEY_PREFIX}:top:{dim}:{bucket}"
+
+    # ---------- Recording ----------
+    def record_failure(self, ip=None, email=None, now=None):
+        """Count one failed login; returns the dimensions that tripped."""
+        now = now or time.time()
+        bucket = self._bucket(now)
+        tripped = []
+
+        with self._lock:
+            for dim, key in (("ip", ip), ("email", (email or "").strip().lower())):
+                if not key:
+                    continue
+                delta = self._delta.setdefault((dim, bucket), {})
+                for cell in _cells(key, self.width, self.depth):
+                    delta[cell] = delta.get(cell, 0) + 1
+                self._delta_top.setdefault((dim, bucket), SpaceSaving(self.top_k * 4)).offer(key)
+
+                estimate = self._estimate_locked(dim, key, now)
+                if estimate >= self.thresholds[dim] and self._should_alert_locked(dim, key):
+                    tripped.append((dim, key, estimate))
+
+        for dim, key, estimate in tripped:
+            self._trip(dim, key, estimate)
+
+        if time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush(now)
+        return [dim for dim, _, _ in tripped]
+
+    def estimate(self, dim, key, now=None) -> int:
+        with self._lock:
+            return self._estimate_locked(dim, key, now or time.time())
+
+    def _estimate_locked(self, dim, key, now) -> int:
+        cells = _cells(key, self.width, self.depth)
+        totals = [0] * self.depth
+        for bucket in self._window_buckets(now):
+            shared = self._shared.get((dim, bucket))
+            delta = self._delta.get((dim, bucket), {})
+            for row, cell in enumerate(cells):
+                totals[row] += (shared.table[cell] if shared else 0) + delta.get(cell, 0)
+        return min(totals)
+
+    # ---------- Alerts ----------
+    def _should_alert_locked(self, dim, key) -> bool:
+        expires = self._tripped.get((dim, key))
+        if expires and expires > time.monotonic():
+            return False
+        self._tripped[(dim, key)] = time.monotonic() + self.window
+        return True
+
+    def _trip(self, dim, key, estimate):
+        # One alert per key per window across all workers
+        if not cache.add(f"{_KEY_PREFIX}:alert:{dim}:{_digest(key)}", 1, timeout=self.window):
+            return
+
+        logger.warning(
+            f"[LoginAnomaly] {estimate} failed logins for {dim}={key} "
+            f"in the last {self.window}s (threshold {self.thresholds[dim]})"
+        )
+        login_anomaly_detected.send(
+            sender=self.__class__, dimension=dim, key=key, estimate=estimate, window_seconds=self.window
+        )
+        if _setting("AUTO_THROTTLE", False):
+            block_seconds = _setting("BLOCK_SECONDS", 900)
+            cache.set(block_key(dim, key), time.time() + block_seconds, timeout=block_seconds)
+
+    # ---------- Cross-worker merge ----------
+    def flush(self, now=None):
+        """Merge local deltas into the cache, then refresh the shared window view."""
+        now = now or time.time()
+        with self._lock:
+            delta, self._delta = self._delta, {}
+            delta_top, self._delta_top = self._delta_top, {}
+            self._last_flush = time.monotonic()
+
+        leftover, leftover_top = {}, {}
+        ttl = self.window + self.bucket_seconds
+        for (dim, bucket), cells in delta.items():
+            lock_key = f"{_KEY_PREFIX}:lock:{dim}:{bucket}"
+            if not cache.add(lock_key, 1, timeout=5):
+                # Another worker is merging this bucket; keep the delta for next time
+                leftover[(dim, bucket)] = cells
+                if (dim, bucket) in delta_top:
+                    leftover_top[(dim, bucket)] = delta_top[(dim, bucket)]
+                continue
+            try:
+                sketch = CountMinSketch.from_bytes(
+                    self.width, self.depth, cache.get(self._sketch_key(dim, bucket))
+                )
+                sketch.add_cells(cells)
+                top = SpaceSaving(self.top_k * 4, cache.get(self._top_key(dim, bucket)))
+                if (dim, bucket) in delta_top:
+                    top.merge(delta_top[(dim, bucket)].counts)
+                cache.set_many(
+                    {self._sketch_key(dim, bucket): sketch.to_bytes(), self._top_key(dim, bucket): top.counts},
+                    timeout=ttl,
+                )
+            finally:
+                cache.delete(lock_key)
+
+        shared = self._load_shared(now)
+        with self._lock:
+            for key, cells in leftover.items():
+                merged = self._delta.setdefault(key, {})
+                for cell, count in cells.items():
+                    merged[cell] = merged.get(cell, 0) + count
+            for key, top in leftover_top.items():
+                self._delta_top.setdefault(key, SpaceSaving(self.top_k * 4)).merge(top.counts)
+            self._shared = shared
+            expired = time.monotonic()
+            self._tripped = {k: v for k, v in self._tripped.items() if v > expired}
+
+    def _load_shared(self, now) -> dict:
+        keys = {
+            self._sketch_key(dim, bucket): (dim, bucket)
+            for dim in DIMENSIONS
+            for bucket in self._window_buckets(now)
+        }
+        blobs = cache.get_many(list(keys))
+        return {
+            keys[key]: CountMinSketch.from_bytes(self.width, self.depth, blob)
+            for key, blob in blobs.items()
+        }
+
+    # ---------- Reporting ----------
+    def top(self, dim, k=None, now=None) -> list:
+        """Heaviest keys for a dimension over the window: [(key, approx_count), ...]."""
+        now = now or time.time()
+        buckets = list(self._window_buckets(now))
+        summary = SpaceSaving(self.top_k * 4)
+        stored = cache.get_many([self._top_key(dim, bucket) for bucket in buckets])
+        for counts in stored.values():
+            summary.merge(counts)
+        with self._lock:
+            for bucket in buckets:
+                local = self._delta_top.get((dim, bucket))
+                if local:
+                    summary.merge(local.counts)
+        return summary.top(k or self.top_k)
+
+
+# =====================================================
+# 🔌 Module API
+# =====================================================
+_detector = None
+_detector_lock = threading.Lock()
+
+
+def get_detector() -> LoginAnomalyDetector:
+    global _detector
+    if _detector is None:
+        with _detector_lock:
+            if _detector is None:
+                _detector = LoginAnomalyDetector()
+    return _detector
+
+
+def record_failure(ip=None, email=None):
+    if not _setting("ENABLED", True):
+        return []
+    try:
+        return get_detector().record_failure(ip=ip, email=email)
+    except Exception as e:  # never break the login path
+        logger.error(f"[LoginAnomaly] Failed to record failure: {e}")
+        return []
+
+
+def block_key(dim, key) -> str:
+    return f"{_KEY_PREFIX}:block:{dim}:{_digest(key)}"
+
+
+def blocked_until(ip=None, email=None) -> float | None:
+    """Latest block expiry (epoch seconds) for this ip/email, or None."""
+    keys = []
+    if ip:
+        keys.append(block_key("ip", ip))
+    if email:
+        keys.append(block_key("email", email.strip().lower()))
+    if not keys:
+        return None
+    values = [v for v in cache.get_many(keys).values() if v]
+    return max(values) if values else None
@@ -0,0 +1,106 @@
+# core/utils/otp.py
+"""
+Short-lived one-time codes (email verification, password reset).
+
+A 6-digit code lives for minutes and has only 10^6 values, so a slow
+password hash (PBKDF2, ~100 ms of CPU per call) buys nothing over a keyed
+hash: what protects the code is the attempt limit. Codes are stored as
+HMAC-SHA256(SECRET_KEY, purpose, subject, code) — a leaked digest cannot be
+checked offline without the key, and the same code for another user or
+purpose gives another digest — and compared in constant time.
+
+- PasswordResetCode rows store `digest()` and count attempts in the row.
+- CodeStore keeps codes that have no table of their own (email
+  verification) in the shared cache: the digest and an attempt counter,
+  both expiring with the code. The cache is their only copy, so it must be
+  shared by every worker (Redis, see CACHE_REDIS_URL): on a per-process
+  cache a code issued by one worker is unknown to the next and each worker
+  counts attempts on its own. CodeStore raises ImproperlyConfigured on such
+  a cache when settings.SHARED_CACHE_REQUIRED is on (as system check
+  core.E001 does at startup).
+
+After OTP_MAX_ATTEMPTS wrong guesses a code is locked until a new one is
+issued.
+"""
+import enum
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from core.checks import cache_is_shared
+
+_KEY_PREFIX = "otp"
+
+
+class Verdict(enum.Enum):
+    OK = "ok"
+    INVALID = "invalid"
+    EXPIRED = "expired"  # or never issued
+    LOCKED = "locked"  # too many attempts
+
+
+def generate_code(digits: int = 6) -> str:
+    return f"{secrets.randbelow(10 ** digits):0{digits}d}"
+
+
+def digest(purpose: str, subject, code: str) -> str:
+    return salted_hmac(f"core.otp.{purpose}", f"{subject}:{code.strip()}", algorithm="sha256").hexdigest()
+
+
+def matches(stored: str, purpose: str, subject, code: str) -> bool:
+    return constant_time_compare(stored, digest(purpose, subject, code))
+
+
+# =====================================================
+# 🗄️ Cache-backed store
+# =====================================================
+class CodeStore:
+    """One active code per subject (e.g. user id) for `purpose`; issuing replaces it."""
+
+    def __init__(self, purpose: str, ttl: int):
+        self.purpose = purpose
+        self.ttl = ttl
+
+    def _key(self, subject) -> str:
+        self._require_shared_cache()
+        return f"{_KEY_PREFIX}:{self.purpose}:{subject}"
+
+    @staticmethod
+    def _require_shared_cache():
+        if settings.SHARED_CACHE_REQUIRED and not cache_is_shared():
+            raise ImproperlyConfigured("One-time codes need a cache shared by all workers (set CACHE_REDIS_URL).")
+
+    def issue(self, subject) -> str:
+        """New raw code for `subject` (to be sent), replacing any previous one."""
+        code = generate_code()
+        key = self._key(subject)
+        cache.set_many({key: digest(self.purpose, subject, code), f"{key}:attempts": 0}, self.ttl)
+        return code
+
+    def verify(self, subject, code: str) -> Verdict:
+        """Check `code`; a correct one is consumed, so it works once."""
+        key = self._key(subject)
+        stored = cache.get(key)
+        if stored is None:
+            return Verdict.EXPIRED
+        try:
+            attempts = cache.incr(f"{key}:attempts")
+        except ValueError:  # counter evicted: the code goes with it
+            self.discard(subject)
+            return Verdict.EXPIRED
+        if attempts > settings.OTP_MAX_ATTEMPTS:
+            return Verdict.LOCKED
+        if not matches(stored, self.purpose, subject, code):
+            return Verdict.INVALID
+        # Only one of two concurrent correct guesses gets the delete
+        return Verdict.OK if cache.delete(key) else Verdict.EXPIRED
+
+    def discard(self, subject):
+        key = self._key(subject)
+        cache.delete_many([key, f"{key}:attempts"])
+
+
+email_verification = CodeStore("email_verification", ttl=settings.EMAIL_OTP_TTL_SECONDS)
@@ -0,0 +1,215 @@
+# core/utils/outbox.py
+"""
+Transactional email outbox.
+
+Requests no longer talk to the mail server. enqueue() inserts an
+EmailOutbox row in the caller's transaction (so a rolled-back request
+sends nothing) and, once that commits, queues a `drain_email_outbox` job;
+the same task also runs every minute from beat to pick up anything left.
+
+drain():
+    1. claims up to EMAIL_OUTBOX_BATCH_SIZE due rows with
+       SELECT ... FOR UPDATE SKIP LOCKED and pushes their next_attempt_at
+       EMAIL_OUTBOX_CLAIM_SECONDS ahead, so concurrent drainers take
+       disjoint batches and a crashed one's rows come back later;
+    2. sends the batch over one connection (one SMTP session);
+    3. marks what went out as sent. A failed message is retried with
+       exponential backoff (EMAIL_OUTBOX_RETRY_BASE_SECONDS, doubling, at
+       most EMAIL_OUTBOX_RETRY_MAX_SECONDS) until EMAIL_OUTBOX_MAX_ATTEMPTS;
+       a permanent SMTP error (5xx) fails it at once. If the connection
+       itself drops, the rest of the batch is put back without using an
+       attempt.
+    Batches repeat until nothing is due or EMAIL_OUTBOX_DRAIN_SECONDS is spent.
+
+Dedup: every row has a unique dedup_key (by default a hash of kind,
+recipient, subject and body), so the same message enqueued twice — a
+retried request, a double click — is stored and sent once. Delivery is
+at least once (a crash between sending and marking replays the batch);
+each message carries a Message-ID derived from its row, so a replay is
+recognisable as the same message downstream. Sent and failed rows are
+purged after EMAIL_OUTBOX_RETENTION_DAYS (purge job "email_outbox").
+"""
+import hashlib
+import logging
+import smtplib
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.utils import DNS_NAME
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.models import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+
+def dedup_key(kind: str, to_email: str, subject: str, body: str) -> str:
+    return hashlib.sha256("\0".join([kind, to_email.lower(), subject, body]).encode("utf-8")).hexdigest()
+
+
+# =====================================================
+# 📥 Enqueue
+# =====================================================
+def message(to_email: str, subject: str, body: str, kind: str = "", key: str | None = None) -> EmailOutbox:
+    """An unsaved outbox row (for enqueue_many)."""
+    return EmailOutbox(
+        kind=kind,
+        to_email=to_email,
+        subject=subject,
+        body=body,
+        dedup_key=key or dedup_key(kind, to_email, subject, body),
+    )
+
+
+def enqueue_many(rows: list[EmailOutbox]) -> int:
+    """Insert outbox rows (duplicates by dedup_key are dropped); delivery starts after commit."""
+    if not rows:
+        return 0
+    EmailOutbox.objects.bulk_create(rows, ignore_conflicts=True)
+    connection = transaction.get_connection()
+    if not (connection.in_atomic_block and any(entry[1] is kick for entry in connection.run_on_commit)):
+        transaction.on_commit(kick)  # one drain per transaction, however many emails it adds
+    return len(rows)
+
+
+def enqueue(to_email: str, subject: str, body: str, kind: str = "", key: str | None = None) -> int:
+    return enqueue_many([message(to_email, subject, body, kind, key)])
+
+
+def kick():
+    """Queue a drain now instead of waiting for the beat run."""
+    from core.tasks import drain_email_outbox  # tasks import this module
+
+    try:
+        drain_email_outbox.delay()
+    except Exception as e:  # broker down: the beat run delivers it
+        logger.warning(f"[Outbox] Could not queue a drain: {e}")
+
+
+# =====================================================
+# 📤 Drain
+# =====================================================
+@dataclass
+class DrainStats:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    batches: int = 0
+
+
+def _backoff(attempts: int) -> timedelta:
+    seconds = settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0)
+    return timedelta(seconds=min(seconds, settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS))
+
+
+def _is_permanent(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return isinstance(error, smtplib.SMTPResponseException) and error.smtp_code >= 500
+
+
+def _is_connection_error(error: Exception) -> bool:
+    if isinstance(error, smtplib.SMTPServerDisconnected):
+        return True
+    return isinstance(error, OSError) and not isinstance(error, smtplib.SMTPException)
+
+
+def _email(row: EmailOutbox) -> EmailMessage:
+    return EmailMessage(
+        subject=row.subject,
+        body=row.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[row.to_email],
+        headers={"Message-ID": f"<outbox.{row.pk}.{row.dedup_key[:16]}@{DNS_NAME}>"},
+    )
+
+
+def _claim(now, batch_size: int) -> list[EmailOutbox]:
+    with transaction.atomic():
+        rows = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EmailOutbox.Status.PENDING, next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        if rows:
+            EmailOutbox.objects.filter(pk__in=[row.pk for row in rows]).update(
+                next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_CLAIM_SECONDS)
+            )
+    return rows
+
+
+def _send_batch(rows: list[EmailOutbox], stats: DrainStats) -> bool:
+    """Send one claimed batch; False if the mail server went away."""
+    sent, released = [], []
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+        for i, row in enumerate(rows):
+            try:
+                connection.send_messages([_email(row)])
+                sent.append(row.pk)
+            except Exception as e:
+                if _is_connection_error(e):
+                    released = rows[i + 1:]  # not tried: back in the queue, no attempt used
+                _failed(row, e, stats)
+                if released:
+                    break
+    except Exception as e:  # could not connect at all
+        released = [row for row in rows if row.pk not in sent]
+        logger.warning(f"[Outbox] Mail server unavailable: {e}")
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    now = timezone.now()
+    if sent:
+        EmailOutbox.objects.filter(pk__in=sent).update(
+            status=EmailOutbox.Status.SENT, sent_at=now, attempts=F("attempts") + 1, last_error=""
+        )
+        stats.sent += len(sent)
+    if released:
+        EmailOutbox.objects.filter(pk__in=[row.pk for row in released]).update(
+            next_attempt_at=now + _backoff(1)
+        )
+        stats.retried += len(released)
+    return not released
+
+
+def _failed(row: EmailOutbox, error: Exception, stats: DrainStats):
+    attempts = row.attempts + 1
+    update = {"attempts": attempts, "last_error": f"{type(error).__name__}: {error}"[:1000]}
+    if _is_permanent(error) or attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        update["status"] = EmailOutbox.Status.FAILED
+        stats.failed += 1
+        logger.error(f"[Outbox] Giving up on {row.kind or 'email'} to {row.to_email} after {attempts} attempts: {error}")
+    else:
+        update["next_attempt_at"] = timezone.now() + _backoff(attempts)
+        stats.retried += 1
+    EmailOutbox.objects.filter(pk=row.pk).update(**update)
+
+
+def drain(now=None, batch_size: int | None = None, time_budget: float | None = None) -> DrainStats:
+    """Send due outbox emails in batches until none is due or the time budget is spent."""
+    batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+    time_budget = settings.EMAIL_OUTBOX_DRAIN_SECONDS if time_budget is None else time_budget
+    stats = DrainStats()
+    started = time.monotonic()
+    while time.monotonic() - started < time_budget:
+        rows = _claim(now or timezone.now(), batch_size)
+        if not rows:
+            break
+        stats.batches += 1
+        if not _send_batch(rows, stats):  # server down: leave the rest for the next run
+            break
+    if stats.batches:
+        logger.info(
+            f"[Outbox] Sent {stats.sent}, retrying {stats.retried}, failed {stats.failed} in {stats.batches} batches"
+        )
+    return stats
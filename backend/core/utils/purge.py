@@ -0,0 +1,225 @@
+# core/utils/purge.py
+"""
+Chunked purge engine for retention jobs.
+
+Instead of `qs.count()` followed by one `qs.delete()` over every matching
+row (one long transaction, one huge lock set, replication lag), a purge:
+
+    1. walks the matching rows in primary-key order, PURGE_BATCH_SIZE ids
+       at a time (keyset: `pk > last` — no OFFSET);
+    2. deletes each batch in its own short transaction, re-applying the
+       filter, so rows that changed since they were read are left alone;
+       cascades and delete signals run as for any ORM delete;
+    3. sleeps PURGE_BATCH_SLEEP_SECONDS between batches to leave room for
+       live traffic;
+    4. stops once PURGE_TIME_BUDGET_SECONDS is spent and stores the last
+       pk as a checkpoint in the cache. The next run resumes there; a run
+       that reaches the end clears it.
+
+Every batch is reported (rows, deleted, cascaded, ms, last pk). The
+named retention jobs are in JOBS (see `manage.py purge --list`). Audit logs
+are not among them: tasks.cleanup_audit_logs archives them first and drops
+whole partitions where it can, and only falls back to expired_audit_logs()
+here on an unpartitioned table.
+"""
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "purge"
+CHECKPOINT_TIMEOUT = 7 * 24 * 3600  # a stale checkpoint only skips rows until the next full pass
+
+
+@dataclass(frozen=True)
+class BatchStats:
+    batch: int
+    rows: int  # matching rows in the batch
+    deleted: int  # rows of the purged model deleted
+    cascaded: int  # related rows deleted with them
+    elapsed_ms: float
+    last_pk: object
+
+
+@dataclass
+class PurgeResult:
+    name: str
+    deleted: int = 0
+    cascaded: int = 0
+    batches: list[BatchStats] = field(default_factory=list)
+    elapsed: float = 0.0
+    completed: bool = False  # False: stopped by the time budget, resumes from `checkpoint`
+    checkpoint: object = None
+    dry_run: bool = False
+
+    def summary(self) -> str:
+        state = "complete" if self.completed else f"paused at pk {self.checkpoint}"
+        verb = "would delete" if self.dry_run else "deleted"
+        cascaded = f" (+{self.cascaded} related)" if self.cascaded else ""
+        return f"{self.name}: {verb} {self.deleted} rows{cascaded} in {len(self.batches)} batches, {self.elapsed:.1f}s, {state}"
+
+
+def _checkpoint_key(name: str) -> str:
+    return f"{_KEY_PREFIX}:{name}:checkpoint"
+
+
+def reset_checkpoint(name: str):
+    cache.delete(_checkpoint_key(name))
+
+
+# =====================================================
+# 🧹 Engine
+# =====================================================
+def purge(
+    name: str,
+    queryset: models.QuerySet,
+    *,
+    batch_size: int | None = None,
+    sleep: float | None = None,
+    time_budget: float | None = None,
+    dry_run: bool = False,
+    fence: Callable | None = None,
+    on_batch: Callable[[BatchStats], None] | None = None,
+) -> PurgeResult:
+    """
+    Delete the rows of `queryset` in primary-key batches (see module docstring).
+    `fence` (e.g. Lease.verify) runs before every batch; raising stops the purge.
+    A dry run walks the same batches without deleting or moving the checkpoint.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    sleep = settings.PURGE_BATCH_SLEEP_SECONDS if sleep is None else sleep
+    time_budget = time_budget or settings.PURGE_TIME_BUDGET_SECONDS
+
+    result = PurgeResult(name, dry_run=dry_run)
+    started = time.monotonic()
+    last_pk = None if dry_run else cache.get(_checkpoint_key(name))
+    if last_pk is not None:
+        logger.info(f"[Purge] {name}: resuming after pk {last_pk}")
+
+    while True:
+        if fence is not None:
+            fence()
+        page = queryset.order_by("pk")
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        ids = list(page.values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            result.completed = True
+            break
+
+        batch_started = time.monotonic()
+        if dry_run:
+            deleted, cascaded = len(ids), 0
+        else:
+            total, per_model = queryset.filter(pk__in=ids).delete()
+            deleted = per_model.get(queryset.model._meta.label, 0)
+            cascaded = total - deleted
+        last_pk = ids[-1]
+        stats = BatchStats(
+            batch=len(result.batches) + 1,
+            rows=len(ids),
+            deleted=deleted,
+            cascaded=cascaded,
+            elapsed_ms=round((time.monotonic() - batch_started) * 1000, 1),
+            last_pk=last_pk,
+        )
+        result.batches.append(stats)
+        result.deleted += deleted
+        result.cascaded += cascaded
+        logger.debug(f"[Purge] {name} batch {stats.batch}: {stats.deleted} deleted in {stats.elapsed_ms} ms")
+        if on_batch is not None:
+            on_batch(stats)
+
+        if len(ids) < batch_size:
+            result.completed = True
+            break
+        if time.monotonic() - started >= time_budget:
+            break
+        if sleep:
+            time.sleep(sleep)
+
+    result.elapsed = time.monotonic() - started
+    if not dry_run:
+        if result.completed:
+            reset_checkpoint(name)
+        else:
+            result.checkpoint = last_pk
+            cache.set(_checkpoint_key(name), last_pk, CHECKPOINT_TIMEOUT)
+    logger.info(f"[Purge] {result.summary()}")
+    return result
+
+
+# =====================================================
+# 📋 Retention jobs
+# =====================================================
+def _password_reset_codes(now):
+    from core.models import PasswordResetCode
+    return PasswordResetCode.objects.filter(
+        models.Q(is_used=True) | models.Q(created_at__lt=now - PasswordResetCode.EXPIRY)
+    )
+
+
+def expired_audit_logs(now, *, high_sensitivity: bool):
+    """Audit logs past their retention; only for tasks.cleanup_audit_logs, after archiving."""
+    from core.models import AuditLog
+    days = settings.AUDIT_LOG_RETENTION_HIGH_SENSITIVITY_DAYS if high_sensitivity else settings.AUDIT_LOG_RETENTION_DAYS
+    return AuditLog.objects.filter(high_sensitivity=high_sensitivity, timestamp__lt=now - timedelta(days=days))
+
+
+def _unverified_accounts(now):
+    """Self-registered accounts that never verified their email nor logged in."""
+    from core.models import CustomUser
+    return CustomUser.objects.filter(
+        profile__is_email_verified=False,
+        profile__created_by_admin=False,  # admin- and roster-provisioned accounts wait for their owner
+        last_login__isnull=True,
+        is_staff=False,
+        is_superuser=False,
+        date_joined__lt=now - timedelta(days=settings.UNVERIFIED_ACCOUNT_RETENTION_DAYS),
+    )
+
+
+def _expired_invites(now):
+    """Unused invites that expired more than INVITE_RETENTION_DAYS ago (used ones are kept)."""
+    from core.models import Invite
+    return Invite.objects.filter(
+        is_used=False,
+        expires_at__lt=now - timedelta(days=settings.INVITE_RETENTION_DAYS),
+    )
+
+
+def _revoked_tokens(now):
+    """Revocations of tokens that have expired anyway."""
+    from core.models import RevokedToken
+    return RevokedToken.objects.filter(expires_at__lt=now)
+
+
+def _email_outbox(now):
+    """Sent and failed outbox emails older than EMAIL_OUTBOX_RETENTION_DAYS (pending ones are kept)."""
+    from core.models import EmailOutbox
+    return EmailOutbox.objects.exclude(status=EmailOutbox.Status.PENDING).filter(
+        created_at__lt=now - timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS),
+    )
+
+
+# name → now → queryset of rows to delete (audit logs: tasks.cleanup_audit_logs)
+JOBS: dict[str, Callable] = {
+    "password_reset_codes": _password_reset_codes,
+    "unverified_accounts": _unverified_accounts,
+    "expired_invites": _expired_invites,
+    "revoked_tokens": _revoked_tokens,
+    "email_outbox": _email_outbox,
+}
+
+
+def run_job(name: str, now=None, **options) -> PurgeResult:
+    """Run one of JOBS; options are passed to purge()."""
+    return purge(name, JOBS[name](now or timezone.now()), **options)
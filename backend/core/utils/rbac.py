@@ -0,0 +1,166 @@
+# core/utils/rbac.py
+"""
+Compiled role permissions.
+
+Every Role + Permission row is compiled once into an immutable CompiledRole:
+a bitmask of Perm flags, the frontend feature list, and the allowed ticket
+categories. UserProfile.can_fix / can_assign / ... are then a dict lookup
+by role_id and a bit test, instead of a query through role.permissions.
+
+The table is process-wide and follows the roles version stamp that
+core/utils/auth_cache.py bumps on every Role/Permission change: requests
+authenticated by CachedJWTAuthentication pass the stamp they already read,
+anything else (Celery, shell) re-checks it every RBAC_CHECK_SECONDS.
+
+The mask is also embedded in access tokens as the `perm` claim (see
+EmailTokenObtainPairSerializer.get_token), for clients and stateless
+consumers. It is as old as the token; server-side checks use the table.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+
+from core.models import Permission, Role
+from core.utils import auth_cache
+
+logger = logging.getLogger(__name__)
+
+# Roles that also get the system features
+SYSTEM_ROLE_NAMES = {"super admin", "university admin"}
+
+
+Perm = Permission.Bit
+
+# Permission model field → bit
+_FIELD_BITS = {
+    "can_report": Perm.REPORT,
+    "can_fix": Perm.FIX,
+    "can_assign": Perm.ASSIGN,
+    "can_manage_users": Perm.MANAGE_USERS,
+    "is_admin_level": Perm.ADMIN,
+}
+
+# Bit → frontend features, in display order
+_FEATURES = (
+    (Perm.REPORT, ("canReport", "myReports")),
+    (Perm.FIX, ("assignedTickets", "uploadProof", "updateStatus", "workHistory")),
+    (Perm.ASSIGN, ("overview", "assignTickets", "reviewProof", "escalate")),
+    (Perm.MANAGE_USERS, ("manageUsers",)),
+    (Perm.ADMIN, ("reportsView", "escalate", "closeTickets")),
+    (Perm.SYSTEM, ("systemSettings", "aiReports")),
+)
+
+
+def features_for(mask: int) -> tuple[str, ...]:
+    features = []
+    for bit, names in _FEATURES:
+        if mask & bit:
+            features.extend(names)
+    return tuple(dict.fromkeys(features))  # deduplicate
+
+
+@dataclass(frozen=True)
+class CompiledRole:
+    id: int
+    name: str
+    mask: int
+    features: tuple[str, ...]
+    allowed_categories: tuple[str, ...]  # in the stored order
+    category_set: frozenset
+
+    def has(self, perm: Perm) -> bool:
+        return bool(self.mask & perm)
+
+
+NO_ROLE = CompiledRole(id=0, name="", mask=0, features=(), allowed_categories=(), category_set=frozenset())
+
+
+def compile_role(role: Role) -> CompiledRole:
+    try:
+        permissions = role.permissions
+    except Permission.DoesNotExist:
+        permissions = None
+    mask = 0
+    categories = ()
+    if permissions is not None:
+        for field, bit in _FIELD_BITS.items():
+            if getattr(permissions, field):
+                mask |= bit
+        categories = tuple(permissions.allowed_categories or ())
+    if role.name.lower() in SYSTEM_ROLE_NAMES:
+        mask |= Perm.SYSTEM
+    return CompiledRole(
+        id=role.id,
+        name=role.name,
+        mask=mask,
+        features=features_for(mask),
+        allowed_categories=categories,
+        category_set=frozenset(categories),
+    )
+
+
+# =====================================================
+# 🗂️ Process-wide table
+# =====================================================
+class RoleTable:
+    def __init__(self, roles: dict, version=None):
+        self.roles = roles  # role_id → CompiledRole
+        self.version = version
+        self.checked_at = time.monotonic()
+
+    def role_ids_with_category(self, category: str) -> list[int]:
+        return [role.id for role in self.roles.values() if category in role.category_set]
+
+    def role_ids_with(self, perm: Perm) -> list[int]:
+        return [role.id for role in self.roles.values() if role.mask & perm]
+
+
+_table: RoleTable | None = None
+_table_lock = threading.Lock()
+
+
+def load_table(version=None) -> RoleTable:
+    started = time.perf_counter()
+    roles = {role.id: compile_role(role) for role in Role.objects.select_related("permissions")}
+    logger.info(f"[RBAC] Compiled {len(roles)} roles in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return RoleTable(roles, version)
+
+
+def get_table(version=None) -> RoleTable:
+    """
+    The compiled table, rebuilt when the roles version moved. Pass the stamp
+    when it is already at hand (authentication); otherwise it is re-read
+    every RBAC_CHECK_SECONDS.
+    """
+    global _table
+    table = _table
+    if table is not None:
+        if version is None:
+            if time.monotonic() - table.checked_at < settings.RBAC_CHECK_SECONDS:
+                return table
+            version = auth_cache.roles_version()
+            table.checked_at = time.monotonic()
+        if version == table.version:
+            return table
+
+    with _table_lock:
+        if version is None:  # first use in this process
+            version = auth_cache.roles_version()
+        if _table is None or _table.version != version:
+            _table = load_table(version)
+        return _table
+
+
+def get_role(role_id) -> CompiledRole:
+    """Compiled role by id (NO_ROLE for None). A role newer than the table is compiled directly."""
+    if role_id is None:
+        return NO_ROLE
+    role = get_table().roles.get(role_id)
+    if role is not None:
+        return role
+    # Created in this transaction, or the table has not seen its version yet
+    db_role = Role.objects.select_related("permissions").filter(pk=role_id).first()
+    return compile_role(db_role) if db_role is not None else NO_ROLE
@@ -0,0 +1,154 @@
+# core/utils/revocation.py
+"""
+Refresh-token revocation (logout, rotation) without a DB lookup per refresh.
+
+- Exact store: RevokedToken rows (jti, expires_at). Expired rows are
+  purged (purge job "revoked_tokens"), so the set only holds tokens that
+  could still be presented.
+- Fast path: each process keeps a Bloom filter of the revoked jtis. A
+  "no" (almost every refresh) is final; a "maybe" is confirmed against
+  the exact store.
+- Sync: revoking bumps a stamp in the shared cache on commit. Each check
+  reads the stamp (one cache get); when it moved, only rows revoked since
+  the previous sync (minus REVOCATION_SYNC_OVERLAP_SECONDS, for slow
+  commits) are added. Bloom filters cannot forget, so the filter is
+  rebuilt from the live rows every REVOCATION_REBUILD_SECONDS, or when it
+  outgrows its capacity.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+STAMP_KEY = "revocation:stamp"
+
+
+# =====================================================
+# 🌸 Bloom filter
+# =====================================================
+class BloomFilter:
+    """`capacity` keys at `fp_rate` false positives; k bit positions per key by double hashing."""
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(8, int(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class _Index:
+    def __init__(self, bloom: BloomFilter, stamp, synced_from: datetime):
+        self.bloom = bloom
+        self.stamp = stamp
+        self.synced_from = synced_from  # rows revoked since then are in the filter
+        self.built_at = time.monotonic()
+
+
+_index: _Index | None = None
+_lock = threading.Lock()
+
+
+def _stamp():
+    return cache.get(STAMP_KEY)
+
+
+def _bump():
+    cache.add(STAMP_KEY, 0, None)
+    try:
+        cache.incr(STAMP_KEY)
+    except ValueError:
+        cache.set(STAMP_KEY, time.time_ns(), None)
+
+
+def _live_jtis(since: datetime | None = None):
+    rows = RevokedToken.objects.filter(expires_at__gt=timezone.now())
+    if since is not None:
+        rows = rows.filter(revoked_at__gte=since)
+    return rows.values_list("jti", flat=True).iterator(chunk_size=10000)
+
+
+def _build(stamp) -> _Index:
+    started = timezone.now()
+    jtis = list(_live_jtis())
+    bloom = BloomFilter(max(settings.REVOCATION_BLOOM_MIN_CAPACITY, 2 * len(jtis)), settings.REVOCATION_BLOOM_FP_RATE)
+    for jti in jtis:
+        bloom.add(jti)
+    logger.info(f"[Revocation] Built Bloom filter over {len(jtis)} tokens ({len(bloom.bits) // 1024} KiB)")
+    return _Index(bloom, stamp, started)
+
+
+def _current() -> _Index:
+    """The local index, brought up to date with the shared stamp."""
+    global _index
+    stamp = _stamp()
+    index = _index
+    if (
+        index is not None
+        and index.stamp == stamp
+        and time.monotonic() - index.built_at < settings.REVOCATION_REBUILD_SECONDS
+    ):
+        return index
+
+    with _lock:
+        index = _index
+        if (
+            index is None
+            or time.monotonic() - index.built_at >= settings.REVOCATION_REBUILD_SECONDS
+            or index.bloom.count >= index.bloom.capacity
+        ):
+            _index = _build(stamp)
+        elif index.stamp != stamp:
+            started = timezone.now()
+            since = index.synced_from - timedelta(seconds=settings.REVOCATION_SYNC_OVERLAP_SECONDS)
+            for jti in _live_jtis(since):
+                index.bloom.add(jti)
+            index.synced_from, index.stamp = started, stamp
+        return _index
+
+
+# =====================================================
+# 🔑 API
+# =====================================================
+def revoke(jti: str, expires_at: datetime, user_id=None, reason=RevokedToken.Reason.LOGOUT) -> bool:
+    """Revoke a token by jti; False if it already was."""
+    _, created = RevokedToken.objects.get_or_create(
+        jti=jti, defaults={"expires_at": expires_at, "user_id": user_id, "reason": reason}
+    )
+    if created:
+        index = _index
+        if index is not None:
+            index.bloom.add(jti)  # this process knows right away
+        transaction.on_commit(_bump)
+    return created
+
+
+def is_revoked(jti: str) -> bool:
+    if jti not in _current().bloom:
+        return False
+    return RevokedToken.objects.filter(jti=jti, expires_at__gt=timezone.now()).exists()
@@ -0,0 +1,361 @@
+# core/utils/roster.py
+"""
+Registrar roster sync: provision and update student accounts from a CSV.
+
+The roster (~30k rows a term) is streamed in batches of ROSTER_BATCH_SIZE
+rows. Per batch:
+
+    1. two queries load the current state: StudentProfiles by student_id
+       (with profile + user) and users by email;
+    2. each row is hashed over the columns the file provides and compared
+       with the hash of the stored values; equal hashes are skipped;
+    3. only the differences are written, with bulk_create / bulk_update
+       (new accounts: user, profile, student profile), in one transaction
+       per batch. Per-row signals do not run: the profile is created here,
+       cached auth state is invalidated for updated users, and the audit
+       rows ("User Created" / "Roster Synced") are bulk inserted.
+
+Rows are matched by student_id, then by email (an existing account without
+a student profile is linked). New accounts get the Student role, a
+verified email (like admin-created accounts) and an unusable password
+(set through the password reset flow). Students missing
+from the roster are left alone.
+
+A dry run walks the same diff and writes nothing. Either way the result is
+a RosterReport: counts, the first MAX_REPORTED changes and errors (by line).
+"""
+import csv
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from core.db_routers import defer_audit_write
+from core.models import AuditLog, CustomUser, Role, StudentProfile, UserProfile
+from core.utils import auth_cache
+
+logger = logging.getLogger(__name__)
+
+USER_COLUMNS = ("email", "first_name", "last_name")
+STUDENT_COLUMNS = ("course_code", "course_name", "year_level", "section", "college", "enrollment_year")
+INTEGER_COLUMNS = {"year_level", "enrollment_year"}
+REQUIRED_COLUMNS = ("student_id", "email")
+ROLE_NAME = "Student"
+MAX_REPORTED = 100  # changes / errors listed in a report
+
+
+class RosterError(Exception):
+    """The file cannot be synced at all (e.g. missing columns)."""
+
+
+# =====================================================
+# 📋 Report
+# =====================================================
+@dataclass
+class RosterReport:
+    dry_run: bool = False
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    linked: int = 0  # existing accounts that got their student profile
+    unchanged: int = 0
+    failed: int = 0
+    changes: list = field(default_factory=list)  # first MAX_REPORTED: {"line", "student_id", "action", "fields"}
+    errors: list = field(default_factory=list)  # first MAX_REPORTED: {"line", "student_id", "error"}
+    elapsed: float = 0.0
+
+    def change(self, line, student_id, action, fields=()):
+        setattr(self, action, getattr(self, action) + 1)
+        if len(self.changes) < MAX_REPORTED:
+            self.changes.append({"line": line, "student_id": student_id, "action": action, "fields": list(fields)})
+
+    def error(self, line, student_id, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED:
+            self.errors.append({"line": line, "student_id": student_id, "error": message})
+
+    def summary(self) -> str:
+        verb = "would create" if self.dry_run else "created"
+        return (
+            f"{self.rows} rows: {verb} {self.created}, updated {self.updated}, linked {self.linked}, "
+            f"unchanged {self.unchanged}, failed {self.failed} in {self.elapsed:.1f}s"
+        )
+
+    def as_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "linked": self.linked,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "elapsed_seconds": round(self.elapsed, 2),
+            "changes": self.changes,
+            "errors": self.errors,
+        }
+
+
+# =====================================================
+# 🧾 Rows
+# =====================================================
+@dataclass
+class _Row:
+    line: int
+    student_id: str
+    values: dict  # column → cleaned value, only for columns the file provides
+
+    @property
+    def email(self) -> str:
+        return self.values["email"]
+
+
+def _clean(line: int, raw: dict, columns: tuple) -> _Row:
+    student_id = (raw.get("student_id") or "").strip()
+    StudentProfile._meta.get_field("student_id").clean(student_id, None)  # format NN-NNNN-NNNNNN
+    values = {}
+    for column in columns:
+        value = (raw.get(column) or "").strip()
+        if column == "email":
+            value = CustomUser.objects.normalize_email(value)
+            validate_email(value)
+        elif column in INTEGER_COLUMNS:
+            value = int(value) if value else None
+        else:
+            value = value or ("" if column in USER_COLUMNS else None)
+        values[column] = value
+    return _Row(line, student_id, values)
+
+
+def _digest(values: dict) -> str:
+    return hashlib.sha1(repr(sorted(values.items())).encode("utf-8")).hexdigest()
+
+
+def _stored(user, student, columns) -> dict:
+    return {
+        column: getattr(user if column in USER_COLUMNS else student, column) if (student or column in USER_COLUMNS) else None
+        for column in columns
+    }
+
+
+# =====================================================
+# 🔄 Sync
+# =====================================================
+class _Batch:
+    def __init__(self, role):
+        self.role = role
+        self.new = []  # rows
+        self.link = []  # (row, user)
+        self.user_updates = {}  # user_id → (user, fields)
+        self.student_updates = {}  # student profile id → (student, fields)
+        self.audits = []
+
+    def apply(self, performed_by):
+        password = make_password(None)  # unusable, no hashing cost
+        users = CustomUser.objects.bulk_create([
+            CustomUser(
+                email=row.email,
+                username=row.email.split("@")[0],
+                first_name=row.values.get("first_name", ""),
+                last_name=row.values.get("last_name", ""),
+                password=password,
+            )
+            for row in self.new
+        ])
+        profiles = UserProfile.objects.bulk_create(
+            [self._profile(user) for user in users]
+            + [self._profile(user) for _, user in self.link if not _has_profile(user)]
+        )
+        by_user = {profile.user_id: profile for profile in profiles}
+        StudentProfile.objects.bulk_create(
+            [self._student(row, by_user[user.pk]) for row, user in zip(self.new, users)]
+            + [self._student(row, by_user.get(user.pk) or user.profile) for row, user in self.link]
+        )
+
+        now = timezone.now()
+        for student, changed in self.student_updates.values():
+            student.updated_at = now  # bulk_update skips auto_now
+            changed.append("updated_at")
+        for model, updates in ((CustomUser, self.user_updates), (StudentProfile, self.student_updates)):
+            if updates:
+                fields = sorted({f for _, changed in updates.values() for f in changed})
+                model.objects.bulk_update([obj for obj, _ in updates.values()], fields)
+        for user_id in {*self.user_updates, *(user.pk for _, user in self.link)}:
+            auth_cache.invalidate_user(user_id)
+
+        self.audits += [
+            _audit(AuditLog.Action.USER_CREATED, performed_by, user, "Roster sync created {email}", {"email": user.email})
+            for user in users
+        ]
+        if self.audits:
+            audits = self.audits
+            defer_audit_write(lambda: AuditLog.objects.bulk_create(audits))
+
+    def _profile(self, user):
+        return UserProfile(
+            user=user,
+            role=self.role,
+            email_domain=user.email.split("@")[-1].lower(),
+            is_email_verified=True,  # the registrar vouches for the address
+            created_by_admin=True,
+        )
+
+    @staticmethod
+    def _student(row, profile):
+        return StudentProfile(
+            user_profile=profile,
+            student_id=row.student_id,
+            **{c: v for c, v in row.values.items() if c in STUDENT_COLUMNS},
+        )
+
+
+def _has_profile(user) -> bool:
+    try:
+        user.profile
+    except UserProfile.DoesNotExist:
+        return False
+    return True
+
+
+def _audit(action, performed_by, user, details, extra=None):
+    return AuditLog(
+        action=action,
+        performed_by=performed_by,
+        target_user_id=user.pk,
+        details=details,
+        extra=extra,
+        high_sensitivity=AuditLog.is_high_sensitivity_action(action),  # bulk_create skips save()
+    )
+
+
+def _diff(rows: list[_Row], columns: tuple, batch: _Batch, report: RosterReport, performed_by):
+    students = {
+        sp.student_id: sp
+        for sp in StudentProfile.objects.select_related("user_profile__user").filter(
+            student_id__in=[row.student_id for row in rows]
+        )
+    }
+    users = {
+        user.email: user
+        for user in CustomUser.objects.select_related("profile__student_profile").filter(
+            email__in=[row.email for row in rows]
+        )
+    }
+
+    for row in rows:
+        student = students.get(row.student_id)
+        owner = users.get(row.email)
+        if student is not None:
+            user = student.user_profile.user
+            if owner is not None and owner.pk != user.pk:
+                report.error(row.line, row.student_id, f"{row.email} belongs to another account")
+                continue
+        elif owner is not None:
+            user = owner
+            existing = getattr(owner.profile, "student_profile", None) if _has_profile(owner) else None
+            if existing is not None:
+                report.error(row.line, row.student_id, f"{row.email} already has student ID {existing.student_id}")
+                continue
+        else:
+            batch.new.append(row)
+            report.change(row.line, row.student_id, "created", columns)
+            continue
+
+        stored = _stored(user, student, columns)
+        if student is not None and _digest(stored) == _digest(row.values):
+            report.unchanged += 1
+            continue
+        changed = [c for c in columns if stored[c] != row.values[c]]
+        user_fields = [c for c in changed if c in USER_COLUMNS]
+        for column in user_fields:
+            setattr(user, column, row.values[column])
+        if user_fields:
+            batch.user_updates[user.pk] = (user, user_fields)
+
+        if student is None:
+            batch.link.append((row, user))
+            report.change(row.line, row.student_id, "linked", changed)
+            batch.audits.append(_audit(
+                AuditLog.Action.ROSTER_SYNCED, performed_by, user,
+                "Roster sync linked {email} to student ID {student_id}",
+                {"email": user.email, "student_id": row.student_id, "fields": changed},
+            ))
+            continue
+        student_fields = [c for c in changed if c in STUDENT_COLUMNS]
+        for column in student_fields:
+            setattr(student, column, row.values[column])
+        if student_fields:
+            batch.student_updates[student.pk] = (student, student_fields)
+        report.change(row.line, row.student_id, "updated", changed)
+        batch.audits.append(_audit(
+            AuditLog.Action.ROSTER_SYNCED, performed_by, user,
+            "Roster sync updated {email}", {"email": user.email, "fields": changed},
+        ))
+
+
+def sync(file, *, dry_run: bool = False, performed_by=None, batch_size: int | None = None) -> RosterReport:
+    """
+    Sync a roster CSV (a text file object, header row first; open it with
+    encoding="utf-8-sig" so an Excel BOM is dropped).
+    Columns: student_id, email (required), first_name, last_name, course_code,
+    course_name, year_level, section, college, enrollment_year (optional —
+    absent columns are not touched).
+    """
+    reader = csv.DictReader(file)
+    header = [name.strip().lower() for name in reader.fieldnames or []]
+    missing = [c for c in REQUIRED_COLUMNS if c not in header]
+    if missing:
+        raise RosterError(f"Missing column(s): {', '.join(missing)}")
+    reader.fieldnames = header
+    columns = tuple(c for c in (*USER_COLUMNS, *STUDENT_COLUMNS) if c in header)
+
+    batch_size = batch_size or settings.ROSTER_BATCH_SIZE
+    report = RosterReport(dry_run=dry_run)
+    started = time.monotonic()
+    role = None if dry_run else Role.objects.get_or_create(name=ROLE_NAME)[0]
+    seen_ids, seen_emails = set(), set()
+    rows = []
+
+    def flush():
+        if not rows:
+            return
+        batch = _Batch(role)
+        try:
+            with transaction.atomic():
+                _diff(rows, columns, batch, report, performed_by)
+                if not dry_run:
+                    batch.apply(performed_by)
+        except IntegrityError as e:  # e.g. an account created meanwhile: the whole batch is retried next run
+            logger.warning(f"[Roster] Batch at lines {rows[0].line}-{rows[-1].line} failed: {e}")
+            for row in rows:
+                report.error(row.line, row.student_id, "batch failed, not applied; run the sync again")
+        rows.clear()
+
+    for line, raw in enumerate(reader, start=2):
+        report.rows += 1
+        try:
+            row = _clean(line, raw, columns)
+        except (ValidationError, ValueError) as e:
+            messages = e.messages if isinstance(e, ValidationError) else [str(e)]
+            report.error(line, (raw.get("student_id") or "").strip(), "; ".join(messages))
+            continue
+        if row.student_id in seen_ids or row.email in seen_emails:
+            report.error(line, row.student_id, "duplicate student_id or email in the file")
+            continue
+        seen_ids.add(row.student_id)
+        seen_emails.add(row.email)
+        rows.append(row)
+        if len(rows) >= batch_size:
+            flush()
+    flush()
+
+    report.elapsed = time.monotonic() - started
+    logger.info(f"[Roster] {'Dry run: ' if dry_run else ''}{report.summary()}")
+    return report
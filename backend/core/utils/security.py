@@ -1,5 +1,6 @@
-import random
+from core.utils.otp import generate_code
+
 
 def generate_otp() -> str:
     """Return a 6-digit numeric OTP as a string."""
-    return str(random.randint(100000, 999999))
+    return generate_code()
@@ -0,0 +1,387 @@
+# core/utils/sla.py
+"""
+SLA deadlines from DB-backed policies and business-hours calendars.
+
+SLAPolicy / BusinessCalendar / Holiday rows are compiled once per process
+into a RuleTable:
+
+- policies are indexed by their (category, building, urgency) pattern,
+  blank meaning "any". Matching a ticket is at most 8 dict lookups and the
+  most specific active policy wins (ties: lowest id). Tickets no policy
+  matches fall back to the built-in Ticket thresholds on a 24/7 clock.
+- every calendar becomes a sorted array of open intervals (epoch seconds,
+  holidays already removed) over SLA_CALENDAR_PAST_DAYS ..
+  SLA_CALENDAR_FUTURE_DAYS around the build date, plus a prefix sum of
+  business seconds. "created_at + 4 business hours" and "business time
+  between a and b" are one bisect each: O(log n), never a walk over hours.
+  A deadline past the compiled range is found by walking the days after it.
+
+Any change to a policy, calendar or holiday bumps a version stamp in the
+cache (core/signals.py); each worker checks it at most every
+SLA_RULES_CHECK_SECONDS and recompiles when it moved.
+"""
+import logging
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from itertools import combinations
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import BusinessCalendar, SLAPolicy, Ticket
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "sla:rules:version"
+MATCH_FIELDS = ("category", "building_name", "urgency")
+
+
+def _setting(name, default):
+    return getattr(settings, f"SLA_{name}", default)
+
+
+# =====================================================
+# 🗓️ Calendars
+# =====================================================
+def parse_opening_hours(raw) -> dict[int, list[tuple[int, int]]]:
+    """
+    {"0": [["08:00", "17:00"]], ...} → {0: [(28800, 61200)], ...} (seconds of day, 0 = Monday).
+    "24:00" closes at midnight. Raises ValueError on malformed or overlapping ranges.
+    """
+    def seconds(value):
+        hours, minutes = (int(part) for part in str(value).split(":"))
+        if not (0 <= hours <= 24 and 0 <= minutes < 60) or (hours == 24 and minutes):
+            raise ValueError(f"invalid time {value!r}")
+        return hours * 3600 + minutes * 60
+
+    if not isinstance(raw, dict):
+        raise ValueError("opening hours must be an object keyed by weekday (0 = Monday)")
+    week = {}
+    for day, ranges in raw.items():
+        weekday = int(day)
+        if not 0 <= weekday <= 6:
+            raise ValueError(f"invalid weekday {day!r}")
+        parsed = sorted((seconds(start), seconds(end)) for start, end in ranges)
+        for (start, end), following in zip(parsed, parsed[1:] + [None]):
+            if start >= end:
+                raise ValueError(f"empty range on weekday {weekday}")
+            if following and following[0] < end:
+                raise ValueError(f"overlapping ranges on weekday {weekday}")
+        week[weekday] = parsed
+    return week
+
+
+class CompiledCalendar:
+    """Open intervals of one calendar with prefix sums of business seconds."""
+
+    def __init__(self, tz: str, opening_hours, holidays, first_day: date, last_day: date):
+        self.zone = ZoneInfo(tz)
+        self.week = parse_opening_hours(opening_hours)
+        self.holidays = set(holidays)
+        self.last_day = last_day
+
+        self.starts = array("d")
+        self.ends = array("d")
+        self.before = array("d")  # business seconds before interval i
+        self.through = array("d")  # business seconds up to the end of interval i
+        total = 0.0
+        day = first_day
+        while day <= last_day:
+            for s, e in self._intervals(day):
+                self.starts.append(s)
+                self.ends.append(e)
+                self.before.append(total)
+                total += e - s
+                self.through.append(total)
+            day += timedelta(days=1)
+
+    def _intervals(self, day: date):
+        """Open intervals of one day as epoch seconds."""
+        if day in self.holidays:
+            return
+        for start, end in self.week.get(day.weekday(), ()):
+            yield self._local_ts(day, start), self._local_ts(day, end)
+
+    def _local_ts(self, day: date, secs: int) -> float:
+        if secs == 86400:
+            day, secs = day + timedelta(days=1), 0
+        return datetime(day.year, day.month, day.day, secs // 3600, secs % 3600 // 60, tzinfo=self.zone).timestamp()
+
+    def _offset(self, ts: float) -> float:
+        """Business seconds between the start of the compiled range and ts (clamped to the range)."""
+        i = bisect_right(self.starts, ts) - 1
+        if i < 0:
+            return 0.0
+        return self.before[i] + min(ts - self.starts[i], self.ends[i] - self.starts[i])
+
+    def add(self, when: datetime, duration: timedelta) -> datetime | None:
+        """First instant at which `duration` of business time has passed since `when` (None: never open)."""
+        ts = when.timestamp()
+        target = self._offset(ts) + duration.total_seconds()
+        j = bisect_left(self.through, target)
+        if j < len(self.through):
+            return datetime.fromtimestamp(self.starts[j] + (target - self.before[j]), tz=dt_timezone.utc)
+        return self._add_beyond(ts, target - (self.through[-1] if self.through else 0.0))
+
+    def _add_beyond(self, ts: float, remaining: float) -> datetime | None:
+        """add() past the compiled range: walk the days after it (rare, e.g. a long SLA on a sparse calendar)."""
+        if not any(self.week.values()):
+            return None
+        day = max(self.last_day + timedelta(days=1), datetime.fromtimestamp(ts, tz=self.zone).date())
+        while True:
+            for s, e in self._intervals(day):
+                s = max(s, ts)
+                if s < e:
+                    if e - s >= remaining:
+                        return datetime.fromtimestamp(s + remaining, tz=dt_timezone.utc)
+                    remaining -= e - s
+            day += timedelta(days=1)
+
+    def between(self, start: datetime, end: datetime) -> timedelta:
+        return timedelta(seconds=max(0.0, self._offset(end.timestamp()) - self._offset(start.timestamp())))
+
+
+# =====================================================
+# 📋 Policies
+# =====================================================
+@dataclass(frozen=True)
+class CompiledPolicy:
+    id: int | None
+    name: str
+    secondary_after: timedelta | None
+    admin_after: timedelta | None
+    calendar: CompiledCalendar | None = None  # None = 24/7
+
+    def add(self, when: datetime, duration: timedelta | None) -> datetime | None:
+        if duration is None:
+            return None
+        return self.calendar.add(when, duration) if self.calendar else when + duration
+
+    def between(self, start: datetime, end: datetime) -> timedelta:
+        return self.calendar.between(start, end) if self.calendar else max(end - start, timedelta(0))
+
+
+@dataclass(frozen=True)
+class Deadlines:
+    policy: CompiledPolicy
+    secondary_at: datetime | None
+    admin_at: datetime | None
+
+    def next_for(self, level: str) -> datetime | None:
+        """When a ticket at `level` is due for its next escalation step."""
+        if level == Ticket.Escalation.NONE:
+            return min(filter(None, (self.secondary_at, self.admin_at)), default=None)
+        if level == Ticket.Escalation.SECONDARY:
+            return self.admin_at
+        return None
+
+    def target_level(self, level: str, now: datetime) -> str | None:
+        """Level a ticket at `level` should be escalated to at `now` (None: stays)."""
+        if self.admin_at and now >= self.admin_at and level != Ticket.Escalation.ADMIN:
+            return Ticket.Escalation.ADMIN
+        if self.secondary_at and now >= self.secondary_at and level == Ticket.Escalation.NONE:
+            return Ticket.Escalation.SECONDARY
+        return None
+
+
+def _builtin_policies() -> dict[tuple, CompiledPolicy]:
+    """The Ticket class thresholds, used when no SLAPolicy matches."""
+    index = {
+        ("", "", ""): CompiledPolicy(None, "Default", None, Ticket.ADMIN_ESCALATION_AFTER),
+    }
+    for urgency, after in Ticket.SECONDARY_ESCALATION_AFTER.items():
+        index[("", "", urgency)] = CompiledPolicy(
+            None, f"Default ({urgency})", after, Ticket.ADMIN_ESCALATION_AFTER
+        )
+    return index
+
+
+def _lookup_keys(values: tuple) -> list[list[tuple]]:
+    """Patterns that match `values`, grouped from most to least specific."""
+    groups = []
+    for kept in range(len(values), -1, -1):
+        groups.append([
+            tuple(value if i in positions else "" for i, value in enumerate(values))
+            for positions in combinations(range(len(values)), kept)
+        ])
+    return groups
+
+
+class RuleTable:
+    """`policies` is [(pattern, CompiledPolicy)] in precedence order (lowest id first)."""
+
+    def __init__(self, policies, version=None, built_on: date | None = None):
+        self.version = version
+        self.built_on = built_on
+        self._policies = {}
+        for key, policy in policies:
+            self._policies.setdefault(key, policy)
+        self._builtin = _builtin_policies()
+
+    def match(self, category: str, building: str, urgency: str) -> CompiledPolicy:
+        for index in (self._policies, self._builtin):
+            for group in _lookup_keys((category or "", building or "", urgency or "")):
+                found = [index[key] for key in group if key in index]
+                if found:
+                    return min(found, key=lambda policy: policy.id or 0)
+        raise LookupError("no SLA policy matched")  # unreachable: the built-in catch-all matches
+
+    def deadlines(self, category, building, urgency, created_at: datetime) -> Deadlines:
+        policy = self.match(category, building, urgency)
+        return Deadlines(
+            policy,
+            policy.add(created_at, policy.secondary_after),
+            policy.add(created_at, policy.admin_after),
+        )
+
+
+def compile_calendars(first_day: date, last_day: date) -> dict[int, CompiledCalendar]:
+    """Every BusinessCalendar, by id, compiled over first_day..last_day."""
+    return {
+        calendar.id: CompiledCalendar(
+            calendar.timezone,
+            calendar.opening_hours,
+            [holiday.date for holiday in calendar.holidays.all()],
+            first_day,
+            last_day,
+        )
+        for calendar in BusinessCalendar.objects.prefetch_related("holidays")
+    }
+
+
+def active_policies(calendars: dict[int, CompiledCalendar]) -> list[tuple[tuple, CompiledPolicy]]:
+    """The active SLAPolicy rows as (pattern, CompiledPolicy), in precedence order."""
+    return [
+        (
+            tuple(getattr(policy, field) for field in MATCH_FIELDS),
+            CompiledPolicy(
+                policy.id,
+                policy.name,
+                policy.secondary_after,
+                policy.admin_after,
+                calendars.get(policy.calendar_id),
+            ),
+        )
+        for policy in SLAPolicy.objects.filter(is_active=True).order_by("id")
+    ]
+
+
+def load_rule_table(version=None, built_on: date | None = None) -> RuleTable:
+    """Compile the active SLAPolicy rows (calendars around `built_on`)."""
+    built_on = built_on or timezone.localdate()
+    calendars = compile_calendars(
+        built_on - timedelta(days=_setting("CALENDAR_PAST_DAYS", 400)),
+        built_on + timedelta(days=_setting("CALENDAR_FUTURE_DAYS", 800)),
+    )
+    return RuleTable(active_policies(calendars), version, built_on)
+
+
+# =====================================================
+# 🔁 Per-process table
+# =====================================================
+_table = None
+_checked_at = 0.0
+_table_lock = threading.Lock()
+
+
+def get_rule_table() -> RuleTable:
+    """The compiled table, rebuilt when the shared version stamp moves or the day changes."""
+    global _table, _checked_at
+    now = time.monotonic()
+    today = timezone.localdate()
+    table = _table
+    if table is not None and table.built_on == today and now - _checked_at < _setting("RULES_CHECK_SECONDS", 30):
+        return table
+
+    with _table_lock:
+        version = cache.get(VERSION_KEY)
+        if _table is None or _table.version != version or _table.built_on != today:
+            started = time.perf_counter()
+            _table = load_rule_table(version, today)
+            logger.info(f"[SLA] Compiled rule table in {(time.perf_counter() - started) * 1000:.1f} ms")
+        _checked_at = now
+        return _table
+
+
+def invalidate():
+    """
+    Make every worker recompile on its next lookup (called when policies/calendars change).
+    The stamp moves on commit: a worker that recompiles earlier still sees the old rows.
+    """
+    transaction.on_commit(_bump)
+
+
+def _bump():
+    global _table
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    _table = None
+
+
+def rules_version():
+    return cache.get(VERSION_KEY)
+
+
+def ticket_deadlines(ticket) -> Deadlines:
+    building = ticket.location.building_name if ticket.location_id else ""
+    return get_rule_table().deadlines(
+        ticket.category, building, ticket.urgency, ticket.created_at or timezone.now()
+    )
+
+
+# =====================================================
+# 📊 Reporting
+# =====================================================
+def build_report(open_tickets, now: datetime, due_within: timedelta) -> dict:
+    """
+    Open tickets grouped by the SLA policy that governs them: breached (escalated or past
+    their next deadline), escalated per level, due within `due_within`, and the mean
+    business hours they have been open. One pass over the open tickets.
+    """
+    table = get_rule_table()
+    groups = {}
+    rows = open_tickets.values_list(
+        "category", "location__building_name", "urgency", "escalation_level", "created_at", "next_escalation_at"
+    )
+    for category, building, urgency, level, created_at, next_at in rows.iterator(chunk_size=2000):
+        policy = table.match(category, building, urgency)
+        group = groups.setdefault((policy.id, policy.name), {
+            "policy_id": policy.id,
+            "policy": policy.name,
+            "open": 0,
+            "breached": 0,
+            "secondary": 0,
+            "admin": 0,
+            "due_soon": 0,
+            "business_seconds_open": 0.0,
+        })
+        group["open"] += 1
+        if level == Ticket.Escalation.SECONDARY:
+            group["secondary"] += 1
+        elif level == Ticket.Escalation.ADMIN:
+            group["admin"] += 1
+        if level != Ticket.Escalation.NONE or (next_at and next_at <= now):
+            group["breached"] += 1
+        if next_at and now < next_at <= now + due_within:
+            group["due_soon"] += 1
+        group["business_seconds_open"] += policy.between(created_at, now).total_seconds()
+
+    policies = []
+    for group in groups.values():
+        seconds = group.pop("business_seconds_open")
+        group["avg_business_hours_open"] = round(seconds / 3600 / group["open"], 1)
+        policies.append(group)
+    policies.sort(key=lambda group: (-group["breached"], group["policy"]))
+
+    totals = {
+        field: sum(group[field] for group in policies)
+        for field in ("open", "breached", "secondary", "admin", "due_soon")
+    }
+    return {"generated_at": now, "due_within_hours": due_within.total_seconds() / 3600, "totals": totals, "policies": policies}
@@ -0,0 +1,252 @@
+# core/utils/sla_simulator.py
+"""
+What-if evaluation of SLA policies over historical tickets. Read-only.
+
+Tickets created in [since, until) are loaded once into NumPy arrays:
+created and end timestamps, plus codes for category and policy pattern.
+The end timestamp is the first resolution, else the last update of a
+closed ticket, else `until`. A scenario is a list of candidate policies
+in SLAPolicy's shape. For each scenario:
+
+- matching runs once per distinct (category, building, urgency) combination
+  (RuleTable.match) and is broadcast to the tickets through their combo code;
+- deadlines are vectorised per policy: created + duration on a 24/7 clock,
+  or np.searchsorted over a calendar's interval / prefix-sum arrays (the
+  same math as CompiledCalendar.add);
+- a ticket would have reached a level when that deadline falls before its
+  end timestamp.
+
+The active DB policies are always evaluated as the "current" scenario, next
+to the levels the tickets actually reached. NumPy is required (requirements.txt).
+"""
+import time
+from dataclasses import dataclass
+from datetime import datetime, time as dt_time, timedelta
+
+import numpy as np
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from core.models import BusinessCalendar, Ticket
+from core.utils import sla
+
+LEVELS = (Ticket.Escalation.SECONDARY.value, Ticket.Escalation.ADMIN.value)
+
+
+class SimulationError(ValueError):
+    """Invalid simulation input (bad dates or candidate policies)."""
+
+
+def parse_bound(value) -> datetime:
+    """ISO date (local midnight) or datetime → aware datetime."""
+    if isinstance(value, datetime):
+        return value if timezone.is_aware(value) else timezone.make_aware(value)
+    parsed = parse_datetime(str(value)) or parse_date(str(value))
+    if parsed is None:
+        raise SimulationError(f"Invalid date {value!r}.")
+    if not isinstance(parsed, datetime):
+        parsed = datetime.combine(parsed, dt_time.min)
+    return parsed if timezone.is_aware(parsed) else timezone.make_aware(parsed)
+
+
+# =====================================================
+# 📥 History
+# =====================================================
+@dataclass
+class History:
+    created: "np.ndarray"  # epoch seconds
+    end: "np.ndarray"  # epoch seconds the SLA clock stopped (resolution / close / until)
+    combo: "np.ndarray"  # index into combos
+    combos: list  # distinct (category, building, urgency)
+    category: "np.ndarray"  # index into categories
+    categories: list
+    actual_level: "np.ndarray"  # index into ("None", "Secondary", "Admin")
+
+
+def load_history(since: datetime, until: datetime) -> History:
+    rows = (
+        Ticket.objects.filter(created_at__gte=since, created_at__lt=until)
+        .annotate(resolved_at=Min("resolutions__timestamp"))
+        .values_list(
+            "category", "location__building_name", "urgency", "escalation_level",
+            "status", "created_at", "updated_at", "resolved_at",
+        )
+        .order_by()
+    )
+    level_codes = {Ticket.Escalation.NONE: 0, Ticket.Escalation.SECONDARY: 1, Ticket.Escalation.ADMIN: 2}
+    until_ts = until.timestamp()
+    combos, categories = {}, {}
+    created, end, combo, category, actual = [], [], [], [], []
+    for cat, building, urgency, level, status, created_at, updated_at, resolved_at in rows.iterator(chunk_size=5000):
+        if resolved_at is None and status in Ticket.INACTIVE_STATUSES:
+            resolved_at = updated_at
+        created.append(created_at.timestamp())
+        end.append(min(resolved_at.timestamp(), until_ts) if resolved_at else until_ts)
+        combo.append(combos.setdefault((cat, building or "", urgency), len(combos)))
+        category.append(categories.setdefault(cat, len(categories)))
+        actual.append(level_codes.get(level, 0))
+
+    return History(
+        created=np.array(created, dtype=np.float64),
+        end=np.array(end, dtype=np.float64),
+        combo=np.array(combo, dtype=np.int32),
+        combos=list(combos),
+        category=np.array(category, dtype=np.int32),
+        categories=list(categories),
+        actual_level=np.array(actual, dtype=np.int8),
+    )
+
+
+# =====================================================
+# 🧮 Vectorised deadlines
+# =====================================================
+def _add(calendar, created: "np.ndarray", seconds: float) -> "np.ndarray":
+    """Vectorised CompiledPolicy.add(); +inf where the deadline is outside the compiled range."""
+    if calendar is None:
+        return created + seconds
+    starts = np.frombuffer(calendar.starts, dtype=np.float64)
+    if not len(starts):
+        return np.full(created.shape, np.inf)
+    ends = np.frombuffer(calendar.ends, dtype=np.float64)
+    before = np.frombuffer(calendar.before, dtype=np.float64)
+    through = np.frombuffer(calendar.through, dtype=np.float64)
+
+    i = np.searchsorted(starts, created, side="right") - 1
+    ic = np.maximum(i, 0)
+    offset = np.where(i >= 0, before[ic] + np.minimum(created - starts[ic], ends[ic] - starts[ic]), 0.0)
+    target = offset + seconds
+    j = np.searchsorted(through, target, side="left")
+    jc = np.minimum(j, len(through) - 1)
+    return np.where(j < len(through), starts[jc] + (target - before[jc]), np.inf)
+
+
+def _counts(history: History, level: "np.ndarray", groups: "np.ndarray", names: list) -> dict:
+    """{name: {"tickets", "Secondary", "Admin"}} for level codes 0/1/2."""
+    size = len(names)
+    tickets = np.bincount(groups, minlength=size)
+    per_level = [np.bincount(groups, weights=(level == code), minlength=size) for code in (1, 2)]
+    return {
+        name: {
+            "tickets": int(tickets[i]),
+            **{lvl: int(counts[i]) for lvl, counts in zip(LEVELS, per_level)},
+        }
+        for i, name in enumerate(names)
+    }
+
+
+def _summary(history: History, level: "np.ndarray") -> dict:
+    return {
+        "totals": {lvl: int(np.count_nonzero(level == code)) for code, lvl in enumerate(LEVELS, start=1)},
+        "by_category": _counts(history, level, history.category, history.categories),
+    }
+
+
+def evaluate(history: History, table: sla.RuleTable) -> dict:
+    """Final level each ticket would have reached under `table`, summarised."""
+    started = time.perf_counter()
+    secondary_at = np.full(history.created.shape, np.inf)
+    admin_at = np.full(history.created.shape, np.inf)
+
+    matched = {}
+    combo_policy = np.empty(len(history.combos), dtype=np.int32)
+    for i, combo in enumerate(history.combos):
+        policy = table.match(*combo)
+        combo_policy[i] = matched.setdefault(id(policy), (len(matched), policy))[0]
+    ticket_policy = combo_policy[history.combo] if len(history.combos) else history.combo
+
+    for code, policy in matched.values():
+        mask = ticket_policy == code
+        for duration, out in ((policy.secondary_after, secondary_at), (policy.admin_after, admin_at)):
+            if duration is not None:
+                out[mask] = _add(policy.calendar, history.created[mask], duration.total_seconds())
+
+    level = np.where(admin_at < history.end, 2, np.where(secondary_at < history.end, 1, 0)).astype(np.int8)
+    names = [policy.name for _, policy in sorted(matched.values(), key=lambda item: item[0])]
+    result = _summary(history, level)
+    result["by_policy"] = _counts(history, level, ticket_policy, names)
+    result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+# =====================================================
+# 📋 Candidate policies
+# =====================================================
+def _duration(raw, field) -> timedelta | None:
+    value = raw.get(field)
+    if value in (None, ""):
+        return None
+    try:
+        hours = float(value)
+    except (TypeError, ValueError):
+        raise SimulationError(f"{field} must be a number of hours.")
+    if hours <= 0:
+        raise SimulationError(f"{field} must be positive.")
+    return timedelta(hours=hours)
+
+
+def parse_scenario(raw: dict, calendars: dict, calendar_ids: dict) -> tuple[str, sla.RuleTable]:
+    """
+    {"name": "...", "policies": [{"name", "category", "building_name", "urgency",
+    "secondary_after_hours", "admin_after_hours", "calendar": "<BusinessCalendar name>"}]}
+    Earlier policies win ties, like lower ids do for SLAPolicy.
+    """
+    if not isinstance(raw, dict) or not isinstance(raw.get("policies"), list):
+        raise SimulationError('Each scenario needs a "policies" list.')
+    name = str(raw.get("name") or "scenario")
+    valid = {"category": set(Ticket.Category.values), "urgency": set(Ticket.Urgency.values)}
+
+    policies = []
+    for position, policy in enumerate(raw["policies"], start=1):
+        if not isinstance(policy, dict):
+            raise SimulationError(f"{name}: policy #{position} must be an object.")
+        pattern = tuple(str(policy.get(field) or "") for field in sla.MATCH_FIELDS)
+        for field, value in zip(sla.MATCH_FIELDS, pattern):
+            if field in valid and value and value not in valid[field]:
+                raise SimulationError(f"{name}: unknown {field} {value!r}.")
+        secondary_after = _duration(policy, "secondary_after_hours")
+        admin_after = _duration(policy, "admin_after_hours")
+        if secondary_after and admin_after and secondary_after >= admin_after:
+            raise SimulationError(f"{name}: secondary_after_hours must be below admin_after_hours.")
+        calendar = None
+        if policy.get("calendar"):
+            if policy["calendar"] not in calendar_ids:
+                raise SimulationError(f"{name}: unknown calendar {policy['calendar']!r}.")
+            calendar = calendars[calendar_ids[policy["calendar"]]]
+        policies.append((
+            pattern,
+            sla.CompiledPolicy(position, str(policy.get("name") or f"policy {position}"), secondary_after, admin_after, calendar),
+        ))
+    return name, sla.RuleTable(policies)
+
+
+# =====================================================
+# 🚀 Entry point
+# =====================================================
+def simulate(since, until, scenarios=()) -> dict:
+    """Evaluate the current policies and every candidate scenario over tickets created in [since, until)."""
+    since, until = parse_bound(since), parse_bound(until)
+    if since >= until:
+        raise SimulationError("since must be before until.")
+
+    started = time.perf_counter()
+    # Calendars only need to cover the simulated window: later deadlines never fire in it
+    calendars = sla.compile_calendars(
+        timezone.localtime(since).date() - timedelta(days=1),
+        timezone.localtime(until).date() + timedelta(days=1),
+    )
+    calendar_ids = dict(BusinessCalendar.objects.values_list("name", "id"))
+    tables = [("current", sla.RuleTable(sla.active_policies(calendars)))]
+    tables += [parse_scenario(raw, calendars, calendar_ids) for raw in scenarios]
+
+    history = load_history(since, until)
+    loaded = time.perf_counter()
+
+    return {
+        "since": since,
+        "until": until,
+        "tickets": int(len(history.created)),
+        "load_seconds": round(loaded - started, 3),
+        "actual": _summary(history, history.actual_level),
+        "scenarios": [{"name": name, **evaluate(history, table)} for name, table in tables],
+    }
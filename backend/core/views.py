@@ -1,15 +1,22 @@
 # ==================================================
 #                   Imports
 # ==================================================
+import csv
+import io
+import math
+from datetime import timedelta
+
 from django.conf import settings
 from django.utils import timezone
 from django.contrib.auth import get_user_model, authenticate
-from django.core.mail import send_mail
 from django.utils.encoding import force_str, force_bytes
-from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags, urlsafe_base64_encode, urlsafe_base64_decode
 from django.contrib.auth.tokens import default_token_generator
 from django.contrib.auth.hashers import make_password
 from django.db import IntegrityError
+from django.db.models import Q
 
 from django.shortcuts import get_object_or_404
 
@@ -34,7 +41,7 @@ from core.models import (
     TicketAssignment,
     StudentProfile,
     Role,
-    DomainRoleMapping,   # ✅ Added here so Pylance recognizes it
+    RevokedToken,
 )
 
 
@@ -57,15 +64,20 @@ from core.serializers import (
 # -------------------- Tasks --------------------
 from core.tasks import check_escalation
 
+# -------------------- Authentication --------------------
+from core.authentication import RevocableRefreshToken
+
+# -------------------- Pagination --------------------
+from core.pagination import UserDirectoryPagination
+
 # -------------------- Throttles --------------------
-from core.throttles import OTPThrottle, PasswordResetThrottle
+from core.throttles import OTPThrottle, PasswordResetThrottle, LoginAnomalyThrottle
+from rest_framework.settings import api_settings
 
 # -------------------- Helpers --------------------
 from core.utils.audit import create_audit
 from core.utils.email_utils import deliver_code, send_verification_email
-from core.utils.security import generate_otp
-
-from django.contrib.auth.models import update_last_login
+from core.utils import auth_cache, domain_roles, email_utils, invites, last_login, otp, rbac, roster, sla, sla_simulator
 
 
 
@@ -76,6 +88,7 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = UserProfile.objects.select_related("user").all()
     serializer_class = UserProfileSerializer
     permission_classes = [AllowAny]  # allow registration/login
+    pagination_class = UserDirectoryPagination  # keyset on id: ?cursor=...&page_size=...
 
     # -------------------- User CRUD --------------------
     def retrieve(self, request, pk=None):
@@ -127,31 +140,71 @@ class UserViewSet(viewsets.ModelViewSet):
         user = profile.user
         profile.delete()
         user.delete()
-        create_audit("User Deleted", performed_by=request.user, target_user=user, details=f"User {user.email} deleted")
+        create_audit("User Deleted", performed_by=request.user, target_user=user, details="User {email} deleted", extra={"email": user.email})
         return Response({"message": "User deleted successfully"}, status=status.HTTP_200_OK)
 
     def get_queryset(self):
-        """Supports filters like ?can_fix=true, ?can_assign=true, ?role=Maintenance Officer"""
-        qs = UserProfile.objects.select_related("user", "role").all()
+        """
+        Supports filters like ?can_fix=true, ?can_assign=true, ?role=Maintenance Officer
+        and ?search=ann (prefix of first name, last name or email; every word must match).
+        All filters run in SQL: permission flags become role ids from the compiled role table.
+        """
+        qs = UserProfile.objects.select_related("user", "role", "student_profile")
+        params = self.request.query_params
+        table = rbac.get_table()
+
+        for param, perm in (("can_fix", rbac.Perm.FIX), ("can_assign", rbac.Perm.ASSIGN)):
+            value = params.get(param)
+            if value is not None:
+                role_ids = table.role_ids_with(perm)
+                qs = qs.filter(role_id__in=role_ids) if value.lower() == "true" else qs.exclude(role_id__in=role_ids)
+
+        role = params.get("role")
+        if role:
+            qs = qs.filter(role__name__iexact=role)
+
+        # Prefix search, served by the UPPER(...) text_pattern_ops indexes on CustomUser
+        for term in params.get("search", "").split():
+            qs = qs.filter(
+                Q(user__first_name__istartswith=term)
+                | Q(user__last_name__istartswith=term)
+                | Q(user__email__istartswith=term)
+            )
+        return qs
 
-        can_fix = self.request.query_params.get("can_fix")
-        can_assign = self.request.query_params.get("can_assign")
-        role = self.request.query_params.get("role")
+    @action(detail=False, methods=["get"])
+    def count(self, request):
+        """Number of users matching the list filters (the list itself is paginated)."""
+        return Response({"count": self.get_queryset().count()})
 
-        if can_fix is not None:
-            qs = [p for p in qs if p.can_fix] if can_fix.lower() == "true" else [p for p in qs if not p.can_fix]
-        if can_assign is not None:
-            qs = [p for p in qs if p.can_assign] if can_assign.lower() == "true" else [p for p in qs if not p.can_assign]
-        if role:
-            qs = [p for p in qs if p.role and p.role.name.lower() == role.lower()]
+    # -------------------- Registrar Roster Sync --------------------
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    def roster_sync(self, request):
+        """Multipart `file` (roster CSV), optional `dry_run`; returns the sync report."""
+        if not request.user.profile.can_manage_users:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({'error': 'A roster CSV file is required'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if isinstance(qs, list):
-            ids = [p.id for p in qs]
-            qs = UserProfile.objects.filter(id__in=ids).select_related("user")
-        return qs
+        dry_run = str(request.data.get("dry_run", "")).lower() in ("1", "true", "yes")
+        try:
+            report = roster.sync(
+                io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline=""),
+                dry_run=dry_run,
+                performed_by=request.user,
+            )
+        except (roster.RosterError, UnicodeDecodeError, csv.Error) as e:
+            return Response({'error': f"Invalid roster: {e}"}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
 
     # -------------------- Email Login --------------------
-    @action(detail=False, methods=["post"], permission_classes=[AllowAny])
+    @action(
+        detail=False,
+        methods=["post"],
+        permission_classes=[AllowAny],
+        throttle_classes=[*api_settings.DEFAULT_THROTTLE_CLASSES, LoginAnomalyThrottle],  # same as EmailLoginView
+    )
     def email_login(self, request):
         email = request.data.get("email")
         password = request.data.get("password")
@@ -160,18 +213,17 @@ class UserViewSet(viewsets.ModelViewSet):
 
         user = authenticate(request, email=email, password=password)
         if not user:
-            create_audit("Login Failed", None, None, details=f"Failed login attempt for {email}")
+            create_audit("Login Failed", None, None, details="Failed login attempt for {email}", extra={"email": email})
             return Response({"error": "Invalid credentials"}, status=401)
 
         if not user.is_active:
             return Response({"error": "Account not active"}, status=403)
 
-        from django.contrib.auth.models import update_last_login
-        update_last_login(None, user)
+        last_login.record(user)
 
         refresh = RefreshToken.for_user(user)
         profile_data = UserProfileSerializer(user.profile).data
-        create_audit("Login Success", user, user, details=f"Successful login for {email}")
+        create_audit("Login Success", user, user, details="Successful login for {email}", extra={"email": email})
 
         return Response(
             {"access": str(refresh.access_token), "refresh": str(refresh), "profile": profile_data},
@@ -192,12 +244,8 @@ class UserViewSet(viewsets.ModelViewSet):
         if password != confirm_password:
             return Response({'error': 'Passwords do not match'}, status=status.HTTP_400_BAD_REQUEST)
 
-        domain = email.split('@')[-1].lower()
-        mapping = DomainRoleMapping.objects.filter(domain__iexact=domain).first()
-        if mapping:
-            role = mapping.role
-        else:
-            role, _ = Role.objects.get_or_create(name="Visitor", defaults={"description": "Unmapped domain"})
+        # Default role by email domain (subdomains and *.wildcards included), Visitor if unmapped
+        role = domain_roles.resolve(email)
 
         if role.name == "Student":
             course = request.data.get('course')
@@ -225,8 +273,8 @@ class UserViewSet(viewsets.ModelViewSet):
         token = default_token_generator.make_token(user)
         verify_url = f"http://localhost:5173/verify-email/{uidb64}/{token}/"
         deliver_code(email, "Verify your account", f"Click here: {verify_url}", "LINK")
-        create_audit("User Created", None, user, details=f"Self-service registration for {email}")
-        create_audit("Verification Link Sent", None, user, details=f"Link sent to {email}")
+        create_audit("User Created", None, user, details="Self-service registration for {email}", extra={"email": email})
+        create_audit("Verification Link Sent", None, user, details="Link sent to {email}", extra={"email": email})
 
         return Response({
             "message": "User registered successfully. Please verify your email.",
@@ -245,31 +293,31 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'], permission_classes=[AllowAny], throttle_classes=[OTPThrottle])
     def verify_otp(self, request):
         email = request.data.get('email')
-        otp = request.data.get('otp')
-        if not email or not otp:
+        otp_code = request.data.get('otp')
+        if not email or not otp_code:
             return Response({'error': 'Email and OTP required'}, status=status.HTTP_400_BAD_REQUEST)
         try:
             user = User.objects.get(email=email)
         except User.DoesNotExist:
             return Response({'error': 'User not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        if not user.otp_created_at or timezone.now() > user.otp_created_at + timezone.timedelta(minutes=5):
-            user.clear_otp()
-            user.save()
-            create_audit("OTP Expired", None, user, details=f"Expired OTP for {email}")
+        verdict = otp.email_verification.verify(user.pk, otp_code)
+        if verdict is otp.Verdict.EXPIRED:
+            create_audit("OTP Expired", None, user, details="Expired OTP for {email}", extra={"email": email})
             return Response({'error': 'OTP expired'}, status=status.HTTP_400_BAD_REQUEST)
-
-        if not user.check_otp(otp):
-            create_audit("OTP Failed", None, user, details=f"Invalid OTP attempt for {email}")
+        if verdict is otp.Verdict.LOCKED:
+            create_audit("OTP Failed", None, user, details="OTP locked after too many attempts for {email}", extra={"email": email, "reason": "locked"})
+            return Response({'error': 'Too many attempts, request a new OTP'}, status=status.HTTP_400_BAD_REQUEST)
+        if verdict is not otp.Verdict.OK:
+            create_audit("OTP Failed", None, user, details="Invalid OTP attempt for {email}", extra={"email": email, "reason": "invalid"})
             return Response({'error': 'Invalid OTP'}, status=status.HTTP_400_BAD_REQUEST)
 
         user.is_active = True
-        user.clear_otp()
-        user.save()
+        user.save(update_fields=["is_active"])
         profile = user.profile
         profile.is_email_verified = True
         profile.save()
-        create_audit("OTP Verified", user, user, details=f"OTP verified, account activated for {email}")
+        create_audit("OTP Verified", user, user, details="OTP verified, account activated for {email}", extra={"email": email})
         return Response({'message': 'Email verified, account activated. You can now log in.'})
 
     # -------------------- Resend OTP --------------------
@@ -286,11 +334,9 @@ class UserViewSet(viewsets.ModelViewSet):
         if user.is_active:
             return Response({'error': 'Account already verified'}, status=status.HTTP_400_BAD_REQUEST)
 
-        otp_code = generate_otp()
-        user.set_otp(otp_code)
-        user.save()
+        otp_code = otp.email_verification.issue(user.pk)
         deliver_code(email, "Your New OTP Code", f"Your new OTP is {otp_code}", "Resent OTP")
-        create_audit("OTP Resent", None, user, details=f"New OTP generated for {email}")
+        create_audit("OTP Resent", None, user, details="New OTP generated for {email}", extra={"email": email})
         return Response({'message': 'New OTP resent successfully'}, status=status.HTTP_200_OK)
 
     # -------------------- Invite Flow (Staff Registration) --------------------
@@ -299,32 +345,59 @@ class UserViewSet(viewsets.ModelViewSet):
         if not request.user.profile.can_manage_users:
             return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
 
-        email = request.data.get('email')
-        role = request.data.get('role')
-
-        valid_roles = [r[0] for r in UserProfile.Role.choices if r[0] not in ['Student']]
-        if role not in valid_roles:
+        role = self._invite_role(request.data.get('role'))
+        if role is None:
             return Response({'error': 'Invalid role'}, status=status.HTTP_400_BAD_REQUEST)
 
-        existing = Invite.objects.filter(email=email, is_used=False).first()
-        if existing:
-            if existing.expires_at < timezone.now():
-                existing.delete()
-            else:
-                return Response({'error': 'Active invite already exists'}, status=status.HTTP_400_BAD_REQUEST)
-
-        invite = Invite.objects.create(email=email, role=role, created_by=request.user)
-        invite_link = f"http://127.0.0.1:8000/api/users/{invite.token}/accept_invite/"
-
-        create_audit("Invite Created", request.user, target_invite=invite, details=f"Invite for {email} ({role})")
+        created, skipped = invites.create_invites([request.data.get('email')], role, request.user)
+        if not created:
+            return Response({'error': skipped[0]['reason'].capitalize()}, status=status.HTTP_400_BAD_REQUEST)
 
+        invite = created[0]
         return Response({
             'message': 'Invite created successfully',
-            'invite_link': invite_link,
+            'invite_link': email_utils.invite_link(invite),
             'expires_at': invite.expires_at,
             'requires_admin_approval': invite.requires_admin_approval
         }, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
+    def bulk_invite(self, request):
+        """{"emails": [...], "role": "<role name>"}: one invite per new email, emailed in one batch."""
+        if not request.user.profile.can_manage_users:
+            return Response({'error': 'Unauthorized'}, status=status.HTTP_403_FORBIDDEN)
+
+        role = self._invite_role(request.data.get('role'))
+        if role is None:
+            return Response({'error': 'Invalid role'}, status=status.HTTP_400_BAD_REQUEST)
+        emails = request.data.get('emails')
+        if not isinstance(emails, list) or not emails:
+            return Response({'error': 'emails must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(emails) > settings.INVITE_BULK_MAX:
+            return Response(
+                {'error': f'At most {settings.INVITE_BULK_MAX} emails per request'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        created, skipped = invites.create_invites([str(email) for email in emails], role, request.user)
+        return Response({
+            'created': [
+                {
+                    'email': invite.email,
+                    'invite_link': email_utils.invite_link(invite),
+                    'expires_at': invite.expires_at,
+                    'requires_admin_approval': invite.requires_admin_approval,
+                }
+                for invite in created
+            ],
+            'skipped': skipped,
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    @staticmethod
+    def _invite_role(name):
+        role = Role.objects.filter(name__iexact=(name or '').strip()).first()
+        return role if role is not None and invites.is_invitable(role) else None
+
     @action(detail=True, methods=['post'], permission_classes=[AllowAny], url_path="accept_invite")
     def accept_invite(self, request, pk=None):
         token = pk
@@ -341,7 +414,7 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        create_audit("Invite Accepted", user, target_invite=invite, details=f"Invite accepted for {invite.email}")
+        create_audit("Invite Accepted", user, target_invite=invite, details="Invite accepted for {email}", extra={"email": invite.email})
         return Response({'message': 'Account created successfully'}, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['post'], permission_classes=[AllowAny], url_path="accept_invite")
@@ -360,7 +433,7 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         user = serializer.save()
 
-        create_audit("Invite Accepted", user, target_invite=invite, details=f"Invite accepted for {invite.email}")
+        create_audit("Invite Accepted", user, target_invite=invite, details="Invite accepted for {email}", extra={"email": invite.email})
         return Response({'message': 'Account created successfully'}, status=status.HTTP_201_CREATED)
 
     @action(detail=False, methods=['post'], permission_classes=[IsAuthenticated])
@@ -381,7 +454,7 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         serializer.save()
 
-        create_audit("Invite Approved", request.user, target_invite=invite, details=f"Invite approved for {invite.email}")
+        create_audit("Invite Approved", request.user, target_invite=invite, details="Invite approved for {email}", extra={"email": invite.email})
         return Response({'message': 'Invite approved. User may now accept the invite.'}, status=status.HTTP_200_OK)
     
 
@@ -436,7 +509,8 @@ class UserViewSet(viewsets.ModelViewSet):
             action="Password Reset Requested",
             performed_by=None,
             target_user=user,
-            details=f"Password reset code generated for {user.email}"
+            details="Password reset code generated for {email}",
+            extra={"email": user.email},
         )
 
         return Response({"message": "Password reset code sent"}, status=status.HTTP_200_OK)
@@ -463,32 +537,31 @@ class UserViewSet(viewsets.ModelViewSet):
         except User.DoesNotExist:
             return Response({"error": "Invalid email or code"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Fetch latest unused OTPs
-        reset_qs = PasswordResetCode.objects.filter(user=user, is_used=False).order_by('-created_at')
-        if not reset_qs.exists():
+        # Latest unused OTP (older ones were marked used when it was issued)
+        reset_code = PasswordResetCode.objects.filter(user=user, is_used=False).order_by('-created_at').first()
+        if reset_code is None:
             return Response({"error": "Invalid or already used code"}, status=status.HTTP_400_BAD_REQUEST)
 
-        reset_code = reset_qs.first()
-
-        # Check expiry
-        if reset_code.is_expired():
+        # Validate submitted code (keyed HMAC, attempt-limited)
+        verdict = reset_code.verify_code(code)
+        if verdict is otp.Verdict.EXPIRED:
             return Response({"error": "Code expired"}, status=status.HTTP_400_BAD_REQUEST)
-
-        # Validate submitted code
-        if not reset_code.check_code(code):
+        if verdict is otp.Verdict.LOCKED:
+            return Response({"error": "Too many attempts, request a new code"}, status=status.HTTP_400_BAD_REQUEST)
+        if verdict is not otp.Verdict.OK or not reset_code.mark_used():
             return Response({"error": "Invalid code"}, status=status.HTTP_400_BAD_REQUEST)
 
         # Reset password
         user.set_password(new_password)
         user.save()
-        reset_code.mark_used()
 
         # Log audit
         create_audit(
             action="Password Reset Confirmed",
             performed_by=user,
             target_user=user,
-            details=f"Password reset successful for {user.email}"
+            details="Password reset successful for {email}",
+            extra={"email": user.email},
         )
 
         return Response({"message": "Password has been reset successfully"}, status=status.HTTP_200_OK)
@@ -503,7 +576,9 @@ class UserViewSet(viewsets.ModelViewSet):
 # ==================================================
 #                  Ticket Management
 # ==================================================
-from core.models import Ticket, TicketAssignment, AuditLog, UserProfile, TicketImage
+from core.models import Ticket, TicketAssignment, TicketEvent, AuditLog, UserProfile, TicketImage
+from core.serializers import TicketEventSerializer
+from core.pagination import TicketTimelinePagination
 
 from django.db.models import Prefetch
 
@@ -515,6 +590,9 @@ class TicketViewSet(viewsets.ModelViewSet):
     - /api/tickets/my_reports/
     - /api/tickets/assigned/
     - /api/tickets/unassigned/
+    - /api/tickets/{id}/timeline/
+    - /api/tickets/sla_report/
+    - /api/tickets/sla_simulate/
     """
 
     queryset = Ticket.objects.all().select_related("reporter", "location").prefetch_related(
@@ -523,6 +601,7 @@ class TicketViewSet(viewsets.ModelViewSet):
     )
     serializer_class = TicketSerializer
     permission_classes = [IsAuthenticated]
+    SLA_REPORT_MAX_DUE_WITHIN_HOURS = 24 * 366
 
     def _prefetch_queryset(self, qs):
         """Helper: consistently apply select_related and prefetch_related."""
@@ -553,7 +632,8 @@ class TicketViewSet(viewsets.ModelViewSet):
         create_audit(
             AuditLog.Action.TICKET_CREATED,
             performed_by=request.user,
-            details=f"Ticket {ticket.id} created"
+            target_ticket=ticket,
+            details="Ticket {ticket} created"
         )
 
         headers = self.get_success_headers(serializer.data)
@@ -606,7 +686,8 @@ class TicketViewSet(viewsets.ModelViewSet):
             create_audit(
                 AuditLog.Action.TICKET_CREATED,
                 performed_by=request.user,
-                details=f"Ticket {ticket.id} created"
+                target_ticket=ticket,
+                details="Ticket {ticket} created"
             )
             return Response(self.get_serializer(ticket).data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -631,15 +712,21 @@ class TicketViewSet(viewsets.ModelViewSet):
         if ticket.category not in getattr(profile, "allowed_categories", lambda: [])():
             return Response({'error': f'This user cannot fix {ticket.category} tickets.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        TicketAssignment.objects.get_or_create(ticket=ticket, user=assignee)
+        if not TicketAssignment.objects.filter(ticket=ticket, user=assignee).exists():
+            assignment = TicketAssignment(ticket=ticket, user=assignee)
+            assignment._performed_by = request.user
+            assignment.save()
         ticket.status = Ticket.Status.ASSIGNED
+        ticket._performed_by = request.user
         ticket.save(update_fields=["status", "updated_at"])
 
         create_audit(
             AuditLog.Action.TICKET_ASSIGNED,
             performed_by=request.user,
             target_user=assignee,
-            details=f"Ticket {ticket.id} assigned to {assignee.email}"
+            target_ticket=ticket,
+            details="Ticket {ticket} assigned to {email}",
+            extra={"email": assignee.email},
         )
         return Response({'message': f'Ticket {ticket.id} assigned to {assignee.email}'})
 
@@ -671,8 +758,9 @@ class TicketViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Ticket is already closed.'}, status=status.HTTP_400_BAD_REQUEST)
 
         ticket.status = Ticket.Status.CLOSED
+        ticket._performed_by = request.user
         ticket.save(update_fields=["status", "updated_at"])
-        create_audit(AuditLog.Action.TICKET_CLOSED, performed_by=request.user, details=f"Ticket {ticket.id} closed")
+        create_audit(AuditLog.Action.TICKET_CLOSED, performed_by=request.user, target_ticket=ticket, details="Ticket {ticket} closed")
         return Response({'message': f'Ticket {ticket.id} has been closed successfully'})
 
     @action(detail=True, methods=['post'], url_path="resolve")
@@ -684,10 +772,11 @@ class TicketViewSet(viewsets.ModelViewSet):
 
         serializer = TicketResolutionSerializer(data=request.data, context={'request': request})
         if serializer.is_valid():
-            resolution = serializer.save(ticket=ticket)
+            ticket._performed_by = request.user
+            resolution = serializer.save(ticket=ticket, resolved_by=request.user)
             ticket.status = Ticket.Status.RESOLVED
             ticket.save(update_fields=["status", "updated_at"])
-            create_audit(AuditLog.Action.TICKET_RESOLVED, performed_by=request.user, details=f"Ticket {ticket.id} resolved")
+            create_audit(AuditLog.Action.TICKET_RESOLVED, performed_by=request.user, target_ticket=ticket, details="Ticket {ticket} resolved")
             return Response(TicketResolutionSerializer(resolution).data, status=status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -699,9 +788,66 @@ class TicketViewSet(viewsets.ModelViewSet):
             return Response({'error': 'Only closed tickets can be reopened.'}, status=status.HTTP_400_BAD_REQUEST)
 
         ticket.status = Ticket.Status.REOPENED
+        ticket._performed_by = request.user
         ticket.save(update_fields=["status", "updated_at"])
-        create_audit(AuditLog.Action.TICKET_REOPENED, performed_by=request.user, details=f"Ticket {ticket.id} reopened")
+        create_audit(AuditLog.Action.TICKET_REOPENED, performed_by=request.user, target_ticket=ticket, details="Ticket {ticket} reopened")
         return Response({'message': f'Ticket {ticket.id} has been reopened'})
+
+    @action(detail=False, methods=['get'], url_path="sla_report")
+    def sla_report(self, request):
+        """Open tickets per SLA policy: breached, escalated, due soon, business hours open (admin only)."""
+        if not getattr(request.user.profile, "is_admin_level", False):
+            return Response({'error': 'You are not authorized to view SLA reports.'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            hours = float(request.query_params.get("due_within_hours", 4))
+        except ValueError:
+            hours = math.nan
+        if not (math.isfinite(hours) and 0 <= hours <= self.SLA_REPORT_MAX_DUE_WITHIN_HOURS):
+            return Response(
+                {'error': f'due_within_hours must be a number between 0 and {self.SLA_REPORT_MAX_DUE_WITHIN_HOURS}.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        due_within = timedelta(hours=hours)
+
+        open_tickets = Ticket.objects.exclude(status__in=Ticket.INACTIVE_STATUSES)
+        return Response(sla.build_report(open_tickets, timezone.now(), due_within))
+
+    @action(detail=False, methods=['post'], url_path="sla_simulate")
+    def sla_simulate(self, request):
+        """
+        What-if over historical tickets (admin only, read-only):
+        {"since": "2025-08-01", "until": "2025-12-20", "scenarios": [{"name": ..., "policies": [...]}]}
+        """
+        if not getattr(request.user.profile, "is_admin_level", False):
+            return Response({'error': 'You are not authorized to run SLA simulations.'}, status=status.HTTP_403_FORBIDDEN)
+
+        if not isinstance(request.data, dict):
+            return Response({'error': 'Request body must be a JSON object.'}, status=status.HTTP_400_BAD_REQUEST)
+        now = timezone.now()
+        scenarios = request.data.get("scenarios") or []
+        if not isinstance(scenarios, list):
+            return Response({'error': 'scenarios must be a list.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            result = sla_simulator.simulate(
+                request.data.get("since") or now - timedelta(days=183),
+                request.data.get("until") or now,
+                scenarios,
+            )
+        except sla_simulator.SimulationError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result)
+
+    @action(detail=True, methods=['get'], url_path="timeline")
+    def timeline(self, request, pk=None):
+        """
+        Ticket history from the event store, oldest first.
+        One range scan on (ticket, seq); ?cursor= continues long timelines.
+        """
+        ticket = self.get_object()
+        events = TicketEvent.objects.filter(ticket=ticket).select_related("actor")
+        paginator = TicketTimelinePagination()
+        page = paginator.paginate_queryset(events, request, view=self)
+        return paginator.get_paginated_response(TicketEventSerializer(page, many=True).data)
     
 
 
@@ -729,10 +875,40 @@ class LocationViewSet(viewsets.ModelViewSet):
 #                  User Profile
 # ==================================================
 class UserProfileView(APIView):
+    """
+    The signed-in user's profile, fetched on every page load.
+    The rendered payload is cached per user under the auth cache version stamps
+    (core/utils/auth_cache.py), which move on any change to the user, profile,
+    student profile, role or permissions. The stamps are also the ETag, so an
+    unchanged profile is a 304 without reading the cache entry or the database.
+    """
     permission_classes = [IsAuthenticated]
+    PAYLOAD_VERSION = 1  # bump when the payload shape changes
 
     def get(self, request):
-        profile = UserProfile.objects.select_related("user", "role").get(user=request.user)
+        user_version, roles_version = auth_cache.versions(request.user)
+        tag = f"profile-{self.PAYLOAD_VERSION}-{request.user.pk}-{user_version}-{roles_version}"
+        etag = f'"{tag}"'
+
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            key = f"auth:{tag}"
+            payload = cache.get(key)
+            if payload is None:
+                payload = self.render(request.user)
+                cache.set(key, payload, settings.AUTH_CACHE_TTL_SECONDS)
+            response = Response(payload)
+
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"  # browsers revalidate with If-None-Match
+        patch_vary_headers(response, ["Authorization"])
+        return response
+
+    @staticmethod
+    def render(user):
+        profile = UserProfile.objects.select_related("user", "role", "student_profile").get(user=user)
+        user = profile.user
         features = []
 
         if profile.can_report:
@@ -755,18 +931,18 @@ class UserProfileView(APIView):
         if getattr(profile, "student_profile", None):
             sp = profile.student_profile
             student_data = {
-                "full_name": f"{sp.user_profile.user.first_name} {sp.user_profile.user.last_name}".strip(),
+                "full_name": f"{user.first_name} {user.last_name}".strip(),
                 "course": sp.course_code,
                 "year_level": sp.year_level,
                 "student_id": sp.student_id,
             }
 
-        return Response({
-            "id": request.user.id,
-            "email": request.user.email,
-            "first_name": request.user.first_name,
-            "last_name": request.user.last_name,
-            "full_name": f"{request.user.first_name} {request.user.last_name}".strip(),
+        return {
+            "id": user.id,
+            "email": user.email,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "full_name": f"{user.first_name} {user.last_name}".strip(),
             "role": {
                 "id": profile.role.id if profile.role else None,
                 "name": profile.role.name if profile.role else None,
@@ -780,7 +956,7 @@ class UserProfileView(APIView):
             "features": features,
             "allowed_categories": profile.allowed_categories(),
             "student_profile": student_data,
-        })
+        }
 
 
 
@@ -792,75 +968,69 @@ class UserProfileView(APIView):
 class EmailLoginView(TokenObtainPairView):
     serializer_class = EmailTokenObtainPairSerializer
     permission_classes = [AllowAny]
+    throttle_classes = [*api_settings.DEFAULT_THROTTLE_CLASSES, LoginAnomalyThrottle]
 
     def post(self, request, *args, **kwargs):
-        # Call parent JWT view first
-        response = super().post(request, *args, **kwargs)
-
-        if response.status_code == 200:
-            data = response.data
-            access = data.get("access")
-            refresh = data.get("refresh")
-
-            if not access or not refresh:
-                return Response(
-                    {"error": "Authentication failed"},
-                    status=status.HTTP_401_UNAUTHORIZED,
-                )
+        # The serializer loads user + profile + role in one query and hashes the password once
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        data = serializer.validated_data
+        access = data.get("access")
+        refresh = data.get("refresh")
+        if not access or not refresh:
+            return Response(
+                {"error": "Authentication failed"},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
 
-            cookie_max_age = int(settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds())
-            secure_flag = not settings.DEBUG
+        cookie_max_age = int(settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds())
+        secure_flag = not settings.DEBUG
+        user = serializer.user
 
-            email = request.data.get("email")
-            try:
-                user = User.objects.get(email=email)
-
-                # ✅ Update last_login on successful JWT login
-                update_last_login(None, user)
-
-                profile, created = UserProfile.objects.get_or_create(user=user)
-
-                if created:
-                    # ✅ Assign default role
-                    if user.is_superuser:
-                        profile.role, _ = Role.objects.get_or_create(name="University Admin")
-                        profile.is_email_verified = True
-                    else:
-                        default_role, _ = Role.objects.get_or_create(name="Student")
-                        profile.role = profile.role or default_role
-                    profile.save()
-
-                serialized_profile = UserProfileSerializer(profile).data
-
-                response = Response(
-                    {
-                        "access": access,
-                        "profile": serialized_profile,
-                    },
-                    status=status.HTTP_200_OK,
-                )
-                response.set_cookie(
-                    key="refresh_token",
-                    value=refresh,
-                    httponly=True,
-                    secure=secure_flag,
-                    samesite="Strict",
-                    max_age=cookie_max_age,
-                )
+        # ✅ Update last_login on successful JWT login (buffered, written in batches)
+        last_login.record(user)
 
-                # ✅ Audit log
-                create_audit(
-                    "Login",
-                    performed_by=user,
-                    target_user=user,
-                    details="User logged in",
-                )
+        try:
+            profile = user.profile  # already loaded by the serializer
+        except UserProfile.DoesNotExist:
+            # ✅ Assign default role
+            profile = UserProfile(user=user)
+            if user.is_superuser:
+                profile.role, _ = Role.objects.get_or_create(name="University Admin")
+                profile.is_email_verified = True
+            else:
+                profile.role, _ = Role.objects.get_or_create(name="Student")
+            profile.save()
 
-            except User.DoesNotExist:
-                return Response(
-                    {"error": "User not found"},
-                    status=status.HTTP_404_NOT_FOUND,
-                )
+        serialized_profile = UserProfileSerializer(profile).data
+
+        response = Response(
+            {
+                "access": access,
+                "profile": serialized_profile,
+            },
+            status=status.HTTP_200_OK,
+        )
+        response.set_cookie(
+            key="refresh_token",
+            value=refresh,
+            httponly=True,
+            secure=secure_flag,
+            samesite="Strict",
+            max_age=cookie_max_age,
+        )
+
+        # ✅ Audit log
+        create_audit(
+            "Login",
+            performed_by=user,
+            target_user=user,
+            details="User logged in",
+        )
 
         return response
 
@@ -894,12 +1064,10 @@ class CookieTokenRefreshView(TokenRefreshView):
         if response.status_code == 200 and "access" in response.data:
             new_access = response.data["access"]
 
-            # Remove refresh from JSON body (security)
-            if "refresh" in response.data:
-                del response.data["refresh"]
+            # Remove refresh from JSON body (security); with rotation the old one is now revoked
+            new_refresh = response.data.pop("refresh", None)
 
             # Set new refresh cookie if rotation is enabled
-            new_refresh = response.data.get("refresh")
             if new_refresh:
                 cookie_max_age = int(
                     settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"].total_seconds()
@@ -1030,12 +1198,12 @@ class ForgotPasswordView(APIView):
         # Construct reset link pointing to frontend
         reset_link = f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/"
 
-        # Send password reset email
-        send_mail(
+        # Queue password reset email (sent from the outbox after this request)
+        deliver_code(
+            user.email,
             subject="Password Reset",
-            message=f"Click the link to reset your password:\n{reset_link}",
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[email],
+            body=f"Click the link to reset your password:\n{reset_link}",
+            code_type="password_reset_link",
         )
 
         return Response(
@@ -1108,11 +1276,11 @@ class LogoutView(APIView):
 
         if refresh_token:
             try:
-                # ✅ Blacklist the refresh token if app has blacklist app enabled
-                token = RefreshToken(refresh_token)
-                token.blacklist()
-            except Exception:
-                # If blacklist app is not configured, ignore
+                # ✅ Revoke the refresh token (core/utils/revocation.py)
+                token = RevocableRefreshToken(refresh_token)
+                token.blacklist(reason=RevokedToken.Reason.LOGOUT)
+            except TokenError:
+                # Already expired or revoked
                 pass
 
         # ✅ Build response
@@ -1148,14 +1316,98 @@ class LogoutView(APIView):
 # ==================================================
 from rest_framework.permissions import IsAdminUser
 from core.serializers import AuditLogSerializer  # make sure you have this
+from core.pagination import KeysetCursorPagination
+
+import json
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+
+AUDIT_EXPORT_FIELDS = [
+    "id", "action", "performed_by_id", "target_user_id", "target_invite_id",
+    "target_ticket_id", "details", "extra", "ip_address", "timestamp",
+]
+
+
+def filter_audit_logs(qs, params):
+    """
+    Apply audit log filters from query params. Each filter is backed by a
+    composite (column, timestamp, id) index, see AuditLog.Meta.
+    - ?action=Login&action=Logout (or comma-separated)
+    - ?performed_by= / ?target_user= / ?target_ticket= / ?target_invite= (ids)
+    - ?since= / ?until= (ISO datetimes, until is exclusive)
+    Malformed ids or datetimes raise ValidationError (400).
+    """
+    errors = {}
+    actions = [a for value in params.getlist("action") for a in value.split(",") if a]
+    if actions:
+        qs = qs.filter(action__in=actions)
+
+    for field in ("performed_by", "target_user", "target_ticket", "target_invite"):
+        value = params.get(field)
+        if not value:
+            continue
+        if not (value.isascii() and value.isdigit() and int(value) < 2**63):  # bigint ids
+            errors[field] = "Must be an integer id."
+            continue
+        qs = qs.filter(**{f"{field}_id": int(value)})
+
+    for field, lookup in (("since", "timestamp__gte"), ("until", "timestamp__lt")):
+        value = params.get(field)
+        if not value:
+            continue
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:  # well formed but not a valid date, e.g. month 13
+            parsed = None
+        if parsed is None:
+            errors[field] = "Must be an ISO 8601 datetime."
+            continue
+        qs = qs.filter(**{lookup: parsed})
+
+    if errors:
+        raise ValidationError(errors)
+    return qs
+
 
 class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
     """
-    Returns all audit logs. Admin only.
+    Returns audit logs, newest first, keyset-paginated on (timestamp, id).
+    - /api/audit-logs/?action=&performed_by=&target_user=&target_ticket=&target_invite=&since=&until=
+    - /api/audit-logs/?cursor=<next cursor>
+    - /api/audit-logs/export/ (streaming NDJSON, same filters)
     """
-    queryset = AuditLog.objects.all().order_by("-timestamp")
+    # performed_by is prefetched, not joined: audit rows may live in another database
+    queryset = AuditLog.objects.select_related("user_agent").prefetch_related("performed_by")
     serializer_class = AuditLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetCursorPagination
+    keyset_ordering = ("-timestamp", "-id")
+
+    def get_queryset(self):
+        return filter_audit_logs(super().get_queryset(), self.request.query_params)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """Stream matching audit logs as NDJSON without building the whole response in memory."""
+        if not getattr(request.user.profile, "is_admin_level", False):
+            return Response({'error': 'You are not authorized to export audit logs.'}, status=status.HTTP_403_FORBIDDEN)
+
+        qs = filter_audit_logs(AuditLog.objects.all(), request.query_params)
+        rows = qs.order_by(*self.keyset_ordering).values(*AUDIT_EXPORT_FIELDS).iterator(chunk_size=2000)
+
+        def stream():
+            for row in rows:
+                row["timestamp"] = row["timestamp"].isoformat()
+                row["details"] = AuditLog.format_details(
+                    row["details"], row["extra"],
+                    ticket=row["target_ticket_id"], user=row["target_user_id"], invite=row["target_invite_id"],
+                )
+                yield json.dumps(row, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+        response = StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+        response["Content-Disposition"] = 'attachment; filename="audit-logs.ndjson"'
+        return response
 
 # If you prefer a simple APIView instead:
 from rest_framework.views import APIView
@@ -1163,14 +1415,19 @@ from rest_framework.views import APIView
 class AuditLogsAPIView(APIView):
     """
     GET /api/audit-logs/
-    Admin-only: returns all audit logs
+    Admin-only: returns audit logs (same filters and cursor paging as AuditLogViewSet)
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        logs = AuditLog.objects.all().order_by("-timestamp")
-        serializer = AuditLogSerializer(logs, many=True)
-        return Response(serializer.data)
+        logs = filter_audit_logs(
+            AuditLog.objects.select_related("user_agent").prefetch_related("performed_by"),
+            request.query_params,
+        )
+        paginator = KeysetCursorPagination()
+        page = paginator.paginate_queryset(logs, request, view=self)
+        serializer = AuditLogSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
     
 
 from rest_framework.permissions import IsAdminUser
@@ -7,6 +7,9 @@ from dotenv import load_dotenv
 from datetime import timedelta
 from pathlib import Path
 import os
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,6 +20,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # Quick-start development settings
 SECRET_KEY = os.environ.get("DJANGO_SECRET_KEY", "unsafe-secret-key")
 DEBUG = os.environ.get("DEBUG", "True") == "True"
+TESTING = sys.argv[1:2] == ["test"]  # manage.py test
 
 ALLOWED_HOSTS = ["localhost", "127.0.0.1"]
 if not DEBUG:
@@ -30,6 +34,7 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",  # OpClass indexes (user directory prefix search)
 
     # ✅ WebSockets
     "channels",
@@ -133,6 +138,46 @@ DATABASES = {
     }
 }
 
+# Optional dedicated database for AuditLog (see core/db_routers.py).
+# Set AUDIT_DB_NAME to enable; unset keeps audit rows on "default".
+if os.environ.get("AUDIT_DB_NAME"):
+    DATABASES["audit"] = {
+        # No FK constraints there: the referenced tables live in "default"
+        "ENGINE": os.environ.get("AUDIT_DB_ENGINE", "core.db_backends.postgresql_audit"),
+        "NAME": os.environ["AUDIT_DB_NAME"],
+        "USER": os.environ.get("AUDIT_DB_USER", DATABASES["default"]["USER"]),
+        "PASSWORD": os.environ.get("AUDIT_DB_PASSWORD", DATABASES["default"]["PASSWORD"]),
+        "HOST": os.environ.get("AUDIT_DB_HOST", DATABASES["default"]["HOST"]),
+        "PORT": os.environ.get("AUDIT_DB_PORT", DATABASES["default"]["PORT"]),
+    }
+
+DATABASE_ROUTERS = ["core.db_routers.AuditLogRouter"]
+
+# -------------------------------------------------------------------
+# Cache (shared by all workers: throttles, login anomaly sketches)
+# -------------------------------------------------------------------
+# Redis at CACHE_REDIS_URL (else REDIS_URL). Login-anomaly blocks, task
+# leases, auth version stamps, email OTP codes and the last_login buffer must
+# be seen by every worker, so a per-process cache is only accepted in DEBUG
+# and tests (see core/checks.py).
+SHARED_CACHE_REQUIRED = not (DEBUG or TESTING)
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL") or os.environ.get("REDIS_URL")
+if CACHE_REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_REDIS_URL,
+        }
+    }
+elif not SHARED_CACHE_REQUIRED:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+else:
+    raise ImproperlyConfigured("Set CACHE_REDIS_URL or REDIS_URL: the cache must be shared by all workers.")
+
 # -------------------------------------------------------------------
 # Celery
 # -------------------------------------------------------------------
@@ -143,22 +188,50 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Asia/Manila"
 
+# Periodic tasks hold a lease in the cache while they run (core/utils/locks.py);
+# it is renewed every ttl / 3, so this only bounds how long a crashed run blocks the next one
+TASK_LEASE_TTL_SECONDS = 120
+
 # ✅ Celery Beat Schedule
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
-    "check-escalation-every-hour": {
+    "check-escalation-every-minute": {
         "task": "core.tasks.check_escalation",
-        "schedule": crontab(minute=0, hour="*"),  # every hour on the hour
+        "schedule": crontab(),  # every minute; a run only scans tickets that are due
+    },
+    "flush-last-logins-every-minute": {
+        "task": "core.tasks.flush_last_logins",
+        "schedule": crontab(),  # every minute; bounds last_login staleness (core/utils/last_login.py)
     },
     "cleanup-old-audit-logs-daily": {
         "task": "core.tasks.cleanup_audit_logs",
         "schedule": crontab(minute=0, hour=3),  # every day at 3 AM
     },
+    "create-audit-log-partitions-daily": {
+        "task": "core.tasks.create_audit_log_partitions",
+        "schedule": crontab(minute=45, hour=2),  # every day at 2:45 AM
+    },
     "cleanup-password-reset-codes-daily": {
         "task": "core.tasks.cleanup_password_reset_codes",
         "schedule": crontab(minute=30, hour=3),  # every day at 3:30 AM
     },
+    "cleanup-revoked-tokens-daily": {
+        "task": "core.tasks.cleanup_revoked_tokens",
+        "schedule": crontab(minute=45, hour=3),  # every day at 3:45 AM
+    },
+    "drain-email-outbox-every-minute": {
+        "task": "core.tasks.drain_email_outbox",
+        "schedule": crontab(),  # retries and anything a post-commit kick missed (core/utils/outbox.py)
+    },
+    "cleanup-email-outbox-daily": {
+        "task": "core.tasks.cleanup_email_outbox",
+        "schedule": crontab(minute=30, hour=4),  # every day at 4:30 AM
+    },
+    "purge-stale-accounts-daily": {
+        "task": "core.tasks.purge_stale_accounts",
+        "schedule": crontab(minute=15, hour=4),  # every day at 4:15 AM
+    },
 }
 
 # -------------------------------------------------------------------
@@ -172,6 +245,47 @@ AUDIT_LOG_HIGH_SENS_ACTIONS = [
     "Password Reset Confirmed",
 ]
 
+# PostgreSQL: core_auditlog is range-partitioned by month (one partition set
+# per sensitivity). Retention drops whole months, so a row is kept until its
+# entire month is older than the retention window.
+AUDIT_LOG_PARTITION_PREMAKE_MONTHS = 3  # future monthly partitions kept ready
+
+# Cold archive: aged rows are exported to compressed NDJSON before retention drops them
+AUDIT_LOG_ARCHIVE_ENABLED = os.environ.get("AUDIT_LOG_ARCHIVE_ENABLED", "True") == "True"
+AUDIT_LOG_ARCHIVE_DIR = os.environ.get("AUDIT_LOG_ARCHIVE_DIR", str(BASE_DIR / "archive" / "audit_logs"))
+AUDIT_LOG_ARCHIVE_COMPRESSION = os.environ.get("AUDIT_LOG_ARCHIVE_COMPRESSION", "gzip")  # "gzip"; "zstd" needs zstandard (not in requirements.txt)
+
+# -------------------------------------------------------------------
+# Retention purges (core/utils/purge.py)
+# -------------------------------------------------------------------
+PURGE_BATCH_SIZE = 1000  # rows per DELETE
+PURGE_BATCH_SLEEP_SECONDS = 0.05  # pause between batches
+PURGE_TIME_BUDGET_SECONDS = 300  # per run; the next run resumes from a checkpoint
+UNVERIFIED_ACCOUNT_RETENTION_DAYS = 30  # never verified, never logged in
+INVITE_RETENTION_DAYS = 30  # unused invites, counted from expiry
+
+# -------------------------------------------------------------------
+# Failed-login anomaly detection (core/utils/login_anomaly.py)
+# -------------------------------------------------------------------
+LOGIN_ANOMALY_ENABLED = True
+LOGIN_ANOMALY_WINDOW_SECONDS = 600  # sliding window
+LOGIN_ANOMALY_BUCKET_SECONDS = 60  # window granularity
+LOGIN_ANOMALY_IP_THRESHOLD = 50  # failures per IP per window
+LOGIN_ANOMALY_EMAIL_THRESHOLD = 20  # failures per email per window
+LOGIN_ANOMALY_SKETCH_WIDTH = 2048
+LOGIN_ANOMALY_SKETCH_DEPTH = 4
+LOGIN_ANOMALY_TOP_K = 20
+LOGIN_ANOMALY_FLUSH_SECONDS = 5  # how often each worker merges into the cache
+LOGIN_ANOMALY_AUTO_THROTTLE = os.environ.get("LOGIN_ANOMALY_AUTO_THROTTLE", "False") == "True"
+LOGIN_ANOMALY_BLOCK_SECONDS = 900
+
+# -------------------------------------------------------------------
+# SLA policies (core/utils/sla.py)
+# -------------------------------------------------------------------
+SLA_RULES_CHECK_SECONDS = 30  # how often a worker checks for changed policies/calendars
+SLA_CALENDAR_PAST_DAYS = 400  # business-hours calendars are precomputed over this range
+SLA_CALENDAR_FUTURE_DAYS = 800
+
 # -------------------------------------------------------------------
 # Media
 # -------------------------------------------------------------------
@@ -194,6 +308,22 @@ else:
     EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 
 DEFAULT_FROM_EMAIL = "fixit@university.edu"
+
+# One-time codes (core/utils/otp.py): HMAC-SHA256 digests, attempt-limited
+EMAIL_OTP_TTL_SECONDS = 300
+OTP_MAX_ATTEMPTS = 5  # wrong guesses before a code is locked
+
+# Invites (core/utils/invites.py): emails per bulk request
+INVITE_BULK_MAX = 500
+
+# Email outbox (core/utils/outbox.py): requests enqueue, a Celery task sends in batches
+EMAIL_OUTBOX_BATCH_SIZE = 100  # messages per SMTP session
+EMAIL_OUTBOX_CLAIM_SECONDS = 300  # a claimed batch is retried after this if its drainer died
+EMAIL_OUTBOX_DRAIN_SECONDS = 50  # per run; the beat runs every minute
+EMAIL_OUTBOX_MAX_ATTEMPTS = 8
+EMAIL_OUTBOX_RETRY_BASE_SECONDS = 30  # doubles per failed attempt
+EMAIL_OUTBOX_RETRY_MAX_SECONDS = 3600
+EMAIL_OUTBOX_RETENTION_DAYS = 7  # sent/failed rows; also the dedup window
 FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
 
 # -------------------------------------------------------------------
@@ -201,7 +331,7 @@ FRONTEND_URL = os.environ.get("FRONTEND_URL", "http://localhost:5173")
 # -------------------------------------------------------------------
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "core.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.IsAuthenticated",
@@ -235,8 +365,30 @@ SIMPLE_JWT = {
     "USER_ID_CLAIM": "user_id",
     "SIGNING_KEY": os.environ.get("JWT_SIGNING_KEY", SECRET_KEY),
     "ALGORITHM": "HS256",
+    # Rotation/logout revoke refresh tokens (core/utils/revocation.py)
+    "TOKEN_REFRESH_SERIALIZER": "core.authentication.RevocableTokenRefreshSerializer",
 }
 
+# Refresh-token revocation: per-process Bloom filter over RevokedToken rows
+REVOCATION_BLOOM_MIN_CAPACITY = 10_000
+REVOCATION_BLOOM_FP_RATE = 0.01  # "maybe" answers confirmed by a DB lookup
+REVOCATION_REBUILD_SECONDS = 3600  # full rebuild drops expired tokens
+REVOCATION_SYNC_OVERLAP_SECONDS = 60  # re-read window for revocations committed late
+
+# Authenticated user + profile + role + permissions, cached per user (core/utils/auth_cache.py)
+AUTH_CACHE_TTL_SECONDS = 300  # shared cache
+AUTH_CACHE_LOCAL_TTL_SECONDS = 60  # in-process LRU; both are version-checked on every request
+AUTH_CACHE_LOCAL_SIZE = 2048
+RBAC_CHECK_SECONDS = 5  # compiled role table (core/utils/rbac.py) outside authenticated requests
+DOMAIN_ROLES_CHECK_SECONDS = 10  # email domain → role trie (core/utils/domain_roles.py)
+
+# last_login is buffered in the cache and written in batches (core/utils/last_login.py)
+LAST_LOGIN_WRITE_BEHIND = True
+LAST_LOGIN_FLUSH_SECONDS = 60  # bucket width; worst-case staleness is about twice this
+
+# Registrar roster sync (core/utils/roster.py): rows diffed and written per transaction
+ROSTER_BATCH_SIZE = 2000
+
 # -------------------------------------------------------------------
 # Password validation
 # -------------------------------------------------------------------
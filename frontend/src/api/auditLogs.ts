@@ -1,8 +1,8 @@
 import { api } from "./client";
 
-// Fetch all audit logs
-export async function getAllAuditLogs() {
-  const res = await api.get("/audit-logs/");
+// Fetch one page of audit logs ({ next, results }); pass `next` to continue
+export async function getAllAuditLogs(params?: Record<string, string>, cursorUrl?: string) {
+  const res = cursorUrl ? await api.get(cursorUrl) : await api.get("/audit-logs/", { params });
   return res.data;
 }
 
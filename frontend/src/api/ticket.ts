@@ -56,6 +56,29 @@ export interface Ticket {
   images?: TicketImage[]; // API returns list of images
   created_at: string;
   updated_at: string;
+  sla_policy: string;
+  sla_secondary_due_at: string | null;
+  sla_admin_due_at: string | null;
+  sla_breached: boolean;
+}
+
+// SLA report (admin only)
+export interface SlaReportRow {
+  policy_id: number | null;
+  policy: string;
+  open: number;
+  breached: number;
+  secondary: number;
+  admin: number;
+  due_soon: number;
+  avg_business_hours_open: number;
+}
+
+export interface SlaReport {
+  generated_at: string;
+  due_within_hours: number;
+  totals: Omit<SlaReportRow, "policy_id" | "policy" | "avg_business_hours_open">;
+  policies: SlaReportRow[];
 }
 
 // -------------------- API Functions --------------------
@@ -66,6 +89,14 @@ export const getAllTickets = async (): Promise<Ticket[]> => {
   return data;
 };
 
+// Open tickets per SLA policy (admin only)
+export const getSlaReport = async (dueWithinHours = 4): Promise<SlaReport> => {
+  const { data } = await api.get<SlaReport>("/tickets/sla_report/", {
+    params: { due_within_hours: dueWithinHours },
+  });
+  return data;
+};
+
 // Fetch single ticket by ID
 export const getTicketById = async (id: number): Promise<Ticket> => {
   const { data } = await api.get<Ticket>(`/tickets/${id}/`);
@@ -1,11 +1,17 @@
 import { api } from "./client";
 
-// Fetch all users
-export async function getAllUsers() {
-  const res = await api.get("/users/");
+// Fetch one page of users ({ next, results }); pass `next` to continue
+export async function getUsers(params?: Record<string, string>, cursorUrl?: string) {
+  const res = cursorUrl ? await api.get(cursorUrl) : await api.get("/users/", { params });
   return res.data;
 }
 
+// Count users matching the same filters as getUsers
+export async function getUserCount(params?: Record<string, string>): Promise<number> {
+  const res = await api.get("/users/count/", { params });
+  return res.data.count;
+}
+
 // Fetch single user
 export async function getUserById(id: number) {
   const res = await api.get(`/users/${id}/`);
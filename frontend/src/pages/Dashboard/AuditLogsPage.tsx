@@ -15,13 +15,16 @@ export default function AuditLogsPage() {
   const [logs, setLogs] = useState<AuditLog[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  const [next, setNext] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     const fetchLogs = async () => {
       try {
         setLoading(true);
-        const res = await api.get("/audit-logs/"); // Adjust to your backend endpoint
-        setLogs(res.data);
+        const res = await api.get("/audit-logs/"); // Keyset-paginated: { next, results }
+        setLogs(res.data.results ?? res.data);
+        setNext(res.data.next ?? null);
       } catch (err: any) {
         setError(err.response?.data?.detail || "Failed to load audit logs");
       } finally {
@@ -31,6 +34,20 @@ export default function AuditLogsPage() {
     fetchLogs();
   }, []);
 
+  const loadMore = async () => {
+    if (!next) return;
+    try {
+      setLoadingMore(true);
+      const res = await api.get(next);
+      setLogs((prev) => [...prev, ...res.data.results]);
+      setNext(res.data.next ?? null);
+    } catch (err: any) {
+      setError(err.response?.data?.detail || "Failed to load audit logs");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   if (loading) return <p className="p-4">Loading audit logs...</p>;
   if (error) return <p className="p-4 text-red-500">{error}</p>;
 
@@ -66,6 +83,18 @@ export default function AuditLogsPage() {
           </tbody>
         </table>
       </div>
+
+      {next && (
+        <div className="mt-4 text-center">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-4 py-2 bg-gray-200 rounded hover:bg-gray-300 disabled:opacity-50"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -1,7 +1,8 @@
 // 📂 src/pages/Dashboard/Dashboard.tsx
 import { useEffect, useState } from "react";
-import { getAllTickets } from "../../api/ticket";
-import { getAllUsers } from "../../api/users";
+import { getAllTickets, getSlaReport } from "../../api/ticket";
+import type { SlaReport } from "../../api/ticket";
+import { getUserCount } from "../../api/users";
 import { useAuthStore } from "../../store/authStore";
 import {
   Chart as ChartJS,
@@ -29,6 +30,8 @@ export default function Dashboard() {
   const { user } = useAuthStore();
   const [ticketCount, setTicketCount] = useState(0);
   const [pendingCount, setPendingCount] = useState(0);
+  const [breachedCount, setBreachedCount] = useState(0);
+  const [slaReport, setSlaReport] = useState<SlaReport | null>(null);
   const [userCount, setUserCount] = useState(0);
   const [ticketsByStatus, setTicketsByStatus] = useState<any>({});
   const [ticketsByCategory, setTicketsByCategory] = useState<any>({});
@@ -47,9 +50,13 @@ export default function Dashboard() {
             t.status === "In Progress"
         );
         setPendingCount(pendingTickets.length);
+        setBreachedCount(tickets.filter((t: any) => t.sla_breached).length);
 
-        const users = await getAllUsers();
-        setUserCount(users.length);
+        if (user?.permissions.is_admin_level) {
+          setSlaReport(await getSlaReport());
+        }
+
+        setUserCount(await getUserCount());
 
         const statusCounts: Record<string, number> = {};
         tickets.forEach((t: any) => {
@@ -107,7 +114,7 @@ export default function Dashboard() {
     }
 
     loadData();
-  }, []);
+  }, [user]);
 
   if (!user) return <p>Loading user info...</p>;
 
@@ -122,7 +129,7 @@ export default function Dashboard() {
       ) : (
         <>
           {/* --- Counts --- */}
-          <div className="grid grid-cols-3 gap-4 mb-6">
+          <div className="grid grid-cols-4 gap-4 mb-6">
             {/* Tickets visible to staff/fixers/admins */}
             {(permissions.can_report ||
               permissions.can_fix ||
@@ -148,8 +155,51 @@ export default function Dashboard() {
                 <p className="text-3xl">{pendingCount}</p>
               </div>
             )}
+
+            {/* SLA breaches visible to fixers/admins */}
+            {(permissions.can_fix || permissions.can_assign) && (
+              <div className="bg-white shadow rounded p-4 text-center">
+                <h2 className="text-lg font-semibold">SLA Breached</h2>
+                <p className="text-3xl text-red-600">{breachedCount}</p>
+              </div>
+            )}
           </div>
 
+          {/* --- SLA by policy (admins) --- */}
+          {slaReport && (
+            <div className="bg-white shadow rounded p-4 mb-6">
+              <h2 className="text-lg font-semibold mb-2">
+                SLA by Policy (due within {slaReport.due_within_hours}h)
+              </h2>
+              <table className="w-full text-sm">
+                <thead>
+                  <tr className="text-left border-b">
+                    <th className="py-1">Policy</th>
+                    <th>Open</th>
+                    <th>Breached</th>
+                    <th>Secondary</th>
+                    <th>Admin</th>
+                    <th>Due soon</th>
+                    <th>Avg business hours open</th>
+                  </tr>
+                </thead>
+                <tbody>
+                  {slaReport.policies.map((row) => (
+                    <tr key={`${row.policy_id}-${row.policy}`} className="border-b">
+                      <td className="py-1">{row.policy}</td>
+                      <td>{row.open}</td>
+                      <td className={row.breached ? "text-red-600" : ""}>{row.breached}</td>
+                      <td>{row.secondary}</td>
+                      <td>{row.admin}</td>
+                      <td>{row.due_soon}</td>
+                      <td>{row.avg_business_hours_open}</td>
+                    </tr>
+                  ))}
+                </tbody>
+              </table>
+            </div>
+          )}
+
           {/* --- Charts --- */}
           <div className="grid grid-cols-2 gap-6">
             {/* Tickets by Status for staff/fixers/admins */}
@@ -35,35 +35,48 @@ export default function UsersPage() {
   const [error, setError] = useState<string | null>(null);
   const [deletingId, setDeletingId] = useState<number | null>(null);
 
-  // Pagination state
-  const [page, setPage] = useState(1);
-  const [totalPages, setTotalPages] = useState(1);
+  // Keyset pagination ({ next, results }) + prefix search on name/email
+  const [next, setNext] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [searchInput, setSearchInput] = useState("");
+  const [search, setSearch] = useState("");
+
+  useEffect(() => {
+    const timer = setTimeout(() => setSearch(searchInput.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchInput]);
 
   const fetchUsers = useCallback(async () => {
     if (!isAuthorized) return;
 
     try {
       setLoading(true);
-      const res = await api.get("/users/", { params: { page } });
-
-      const data = res.data;
-      if (Array.isArray(data)) {
-        // Backend returns plain array
-        setUsers(data);
-        setTotalPages(1);
-      } else {
-        // Backend returns paginated response
-        setUsers(data.results || []);
-        setTotalPages(data.total_pages || 1);
-      }
-
+      const res = await api.get("/users/", {
+        params: search ? { search } : undefined,
+      });
+      setUsers(res.data.results ?? []);
+      setNext(res.data.next ?? null);
       setError(null);
     } catch (err: any) {
       setError(err.response?.data?.detail || "Failed to load users");
     } finally {
       setLoading(false);
     }
-  }, [page, isAuthorized]);
+  }, [search, isAuthorized]);
+
+  const loadMore = async () => {
+    if (!next) return;
+    try {
+      setLoadingMore(true);
+      const res = await api.get(next);
+      setUsers((prev) => [...prev, ...res.data.results]);
+      setNext(res.data.next ?? null);
+    } catch (err: any) {
+      setError(err.response?.data?.detail || "Failed to load users");
+    } finally {
+      setLoadingMore(false);
+    }
+  };
 
   useEffect(() => {
     if (!isAuthorized) {
@@ -106,11 +119,7 @@ export default function UsersPage() {
     }
   };
 
-  const handlePrevPage = () => setPage((p) => Math.max(p - 1, 1));
-  const handleNextPage = () => setPage((p) => Math.min(p + 1, totalPages));
-
   if (!isAuthorized) return <p className="p-4 text-red-500">Not authorized</p>;
-  if (loading) return <p className="p-4">Loading users...</p>;
   if (error) return <p className="p-4 text-red-500">{error}</p>;
 
   return (
@@ -125,6 +134,14 @@ export default function UsersPage() {
         </button>
       </div>
 
+      <input
+        type="search"
+        value={searchInput}
+        onChange={(e) => setSearchInput(e.target.value)}
+        placeholder="Search by name or email..."
+        className="w-full md:w-1/3 mb-4 px-3 py-2 border rounded"
+      />
+
       <div className="overflow-x-auto bg-white shadow rounded-lg">
         <table className="w-full text-left border-collapse">
           <thead className="bg-gray-200">
@@ -139,14 +156,21 @@ export default function UsersPage() {
             </tr>
           </thead>
           <tbody>
-            {users.length === 0 && (
+            {loading && (
+              <tr>
+                <td colSpan={7} className="p-4 text-center">
+                  Loading users...
+                </td>
+              </tr>
+            )}
+            {!loading && users.length === 0 && (
               <tr>
                 <td colSpan={7} className="p-4 text-center">
                   No users found.
                 </td>
               </tr>
             )}
-            {users.map((u) => (
+            {!loading && users.map((u) => (
               <tr key={u.id} className="border-t hover:bg-gray-50">
                 <td className="p-2">{u.id}</td>
                 <td className="p-2">{u.full_name || "--"}</td>
@@ -185,24 +209,14 @@ export default function UsersPage() {
       </div>
 
       {/* Pagination */}
-      {totalPages > 1 && (
-        <div className="flex justify-center mt-4 space-x-2">
-          <button
-            onClick={handlePrevPage}
-            disabled={page === 1}
-            className="px-3 py-1 rounded border disabled:opacity-50"
-          >
-            Previous
-          </button>
-          <span className="px-3 py-1">
-            Page {page} of {totalPages}
-          </span>
+      {!loading && next && (
+        <div className="mt-4 text-center">
           <button
-            onClick={handleNextPage}
-            disabled={page === totalPages}
-            className="px-3 py-1 rounded border disabled:opacity-50"
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-4 py-2 bg-gray-200 rounded hover:bg-gray-300 disabled:opacity-50"
           >
-            Next
+            {loadingMore ? "Loading..." : "Load more"}
           </button>
         </div>
       )}